@@ -6,8 +6,13 @@ Routes are organized in separate blueprint modules in the routes package.
 """
 
 from flask import Flask
-from database import init_database, add_sample_data
+from database import init_app, init_database, add_sample_data
 from routes import register_blueprints
+from services.due_scheduler import init_overdue_notices
+from services.fee_policy import FeePolicy, set_fee_policy
+from services.library_service import set_search_backend
+from services.report_cache import patron_report_cache, PATRON_REPORT_CACHE_SIZE
+from services.search_cache import search_cache, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
 
 
 def create_app():
@@ -20,12 +25,29 @@ def create_app():
     app = Flask(__name__)
     app.secret_key = "super secret key"
     
+    # Pooled database connections, released at the end of each request
+    init_app(app)
+    
     # Initialize the database
     init_database()
     
     # Add sample data for testing and demonstration
     add_sample_data()
     
+    # Serve title/author searches from the in-memory trigram index
+    set_search_backend(app.config.setdefault('SEARCH_BACKEND', 'index'))
+    search_cache.configure(app.config.setdefault('SEARCH_CACHE_SIZE', SEARCH_CACHE_SIZE),
+                           app.config.setdefault('SEARCH_CACHE_TTL', SEARCH_CACHE_TTL))
+    
+    # Serialized patron status reports, reused while their ETag holds
+    patron_report_cache.configure(app.config.setdefault('PATRON_REPORT_CACHE_SIZE', PATRON_REPORT_CACHE_SIZE))
+    
+    # Late fee rates, tier, cap and grace (FeePolicy keyword arguments)
+    set_fee_policy(FeePolicy(**app.config.setdefault('LATE_FEE_POLICY', {})))
+    
+    # Overdue notices as loans pass their due date (opt-in: OVERDUE_NOTICES)
+    init_overdue_notices(app)
+    
     # Register all route blueprints
     register_blueprints(app)
     
@@ -0,0 +1,77 @@
+"""
+Benchmark the late fee sweep against the per-loan scalar path.
+
+Usage:
+    python -m benchmarks.late_fee_sweep [--loans 100000] [--repeat 3]
+
+Builds a throwaway database of open loans with due dates spread over the
+last 40 days and times sweep_late_fees() with NumPy, with the scalar
+loop, and (for a sample) calculate_late_fee_for_book() per loan.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import database
+from database import get_db_connection, init_database, reset_pool
+from services.fee_sweep import np, sweep_late_fees
+from services.library_service import calculate_late_fee_for_book
+
+
+def seed(loans: int):
+    now = datetime.now()
+    conn = get_db_connection()
+    try:
+        conn.executemany(
+            "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) "
+            "VALUES (?, ?, ?, ?, NULL)",
+            (
+                (f"{i % 5000:06d}", i, (now - timedelta(days=i % 40 + 14)).isoformat(),
+                 (now - timedelta(days=i % 40)).isoformat())
+                for i in range(loans)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--loans", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sample", type=int, default=2000, help="loans timed through calculate_late_fee_for_book")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, "bench.db")
+        reset_pool()
+        init_database()
+        seed(args.loans)
+
+        vectorized = best_of(args.repeat, lambda: sweep_late_fees(vectorized=True))
+        scalar = best_of(args.repeat, lambda: sweep_late_fees(vectorized=False))
+        sample = min(args.sample, args.loans)
+        per_loan = best_of(1, lambda: [calculate_late_fee_for_book(f"{i % 5000:06d}", i) for i in range(sample)])
+        reset_pool()
+
+    print(f"loans={args.loans} numpy={'yes' if np is not None else 'no'}")
+    print(f"sweep (vectorized): {vectorized * 1000:9.1f} ms")
+    print(f"sweep (scalar):     {scalar * 1000:9.1f} ms")
+    print(f"per-loan calls:     {per_loan / sample * args.loans * 1000:9.1f} ms (extrapolated from {sample})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark get_patron_status_report at growing loan histories.
+
+Usage:
+    python -m benchmarks.patron_status_report [--histories 10,1000,5000] [--repeat 200]
+
+For each history size, one patron gets that many returned loans plus a few
+active ones; the single-statement report is timed against the previous
+three-query version (kept below as the baseline).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import database
+from database import get_db_connection, init_database, reset_pool
+from services.fee_policy import get_fee_policy
+from services.library_service import get_patron_status_report
+
+ACTIVE_LOANS = 3
+
+
+def three_query_report(patron_id: str) -> Dict:
+    """The report as it was before the single-statement query (the baseline)."""
+    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+        return {"status": "error", "message": "Invalid patron ID. Must be exactly 6 digits."}
+
+    LATE_GRACE_DAYS = 14
+    fee_for = get_fee_policy().fee
+
+    conn = get_db_connection()
+    try:
+        active_rows = conn.execute(
+            """
+            SELECT br.book_id, br.borrow_date, br.due_date, br.return_date,
+                   b.title, b.author, b.isbn
+            FROM borrow_records br
+            LEFT JOIN books b ON b.id = br.book_id
+            WHERE br.patron_id = ? AND br.return_date IS NULL
+            ORDER BY br.borrow_date DESC
+            """,
+            (patron_id,),
+        ).fetchall()
+
+        lifetime_row = conn.execute(
+            "SELECT COUNT(*) AS cnt FROM borrow_records WHERE patron_id = ?",
+            (patron_id,),
+        ).fetchone()
+        lifetime_loans = int(lifetime_row["cnt"]) if lifetime_row else 0
+
+        returned_rows = conn.execute(
+            """
+            SELECT br.book_id, br.borrow_date, br.due_date, br.return_date, b.title
+            FROM borrow_records br
+            LEFT JOIN books b ON b.id = br.book_id
+            WHERE br.patron_id = ? AND br.return_date IS NOT NULL
+            ORDER BY br.return_date DESC
+            LIMIT 5
+            """,
+            (patron_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    active_loans: List[Dict[str, Any]] = []
+    overdue_count = 0
+    total_accrued_fee = 0.0
+
+    for r in active_rows:
+        try:
+            borrowed_at = datetime.fromisoformat(r["borrow_date"])
+            due_at = datetime.fromisoformat(r["due_date"]) if r["due_date"] else borrowed_at + timedelta(days=LATE_GRACE_DAYS)
+        except Exception:
+            continue
+        days_over = max(0, (datetime.now().date() - due_at.date()).days) if due_at else 0
+        fee = fee_for(days_over)
+        if days_over > 0:
+            overdue_count += 1
+            total_accrued_fee += fee
+        active_loans.append({
+            "book_id": r["book_id"],
+            "title": r["title"],
+            "author": r["author"],
+            "isbn": r["isbn"],
+            "borrowed_at": borrowed_at.isoformat(),
+            "due_at": due_at.date().isoformat(),
+            "days_overdue": days_over,
+            "accrued_fee": fee,
+        })
+
+    total_accrued_fee = round(total_accrued_fee, 2)
+
+    recent_returns: List[Dict[str, Any]] = []
+    for r in returned_rows:
+        try:
+            due_at = datetime.fromisoformat(r["due_date"]) if r["due_date"] else None
+            returned_at = datetime.fromisoformat(r["return_date"])
+        except Exception:
+            continue
+        days_over = max(0, (datetime.now().date() - due_at.date()).days) if due_at else 0
+        recent_returns.append({
+            "book_id": r["book_id"],
+            "title": r["title"],
+            "returned_at": returned_at.isoformat(),
+            "was_late": days_over > 0,
+            "days_overdue": days_over,
+            "fee_at_return": fee_for(days_over),
+        })
+
+    return {
+        "status": "ok",
+        "patron_id": patron_id,
+        "summary": {
+            "active_count": len(active_loans),
+            "overdue_count": overdue_count,
+            "total_accrued_fee": total_accrued_fee,
+            "lifetime_loans": lifetime_loans,
+        },
+        "active_loans": active_loans,
+        "recent_returns": recent_returns,
+    }
+
+
+def seed(patron_id: str, history: int):
+    now = datetime.now()
+    rows = []
+    for i in range(history + ACTIVE_LOANS):
+        borrowed = now - timedelta(days=history + ACTIVE_LOANS - i + 14)
+        returned = None if i >= history else (borrowed + timedelta(days=10)).isoformat()
+        rows.append((patron_id, i % 50 + 1, borrowed.isoformat(), (borrowed + timedelta(days=14)).isoformat(), returned))
+    conn = get_db_connection()
+    try:
+        conn.executemany("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) "
+                         "VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--histories", default="10,1000,5000")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, "bench.db")
+        reset_pool()
+        init_database()
+        print(f"{'history':>8} {'report':>12} {'3 queries':>12}")
+        for n, history in enumerate(int(h) for h in args.histories.split(",")):
+            patron_id = f"{n + 1:06d}"
+            seed(patron_id, history)
+            report = per_call(lambda: get_patron_status_report(patron_id), args.repeat)
+            baseline = per_call(lambda: three_query_report(patron_id), args.repeat)
+            print(f"{history:>8} {report * 1e6:>10.0f}us {baseline * 1e6:>10.0f}us")
+        reset_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Command-line maintenance tasks for the Library Management System.
+
+Usage:
+    python cli.py import-books catalog.csv [--format csv|jsonl] [--batch-size 500]
+    python cli.py sweep-late-fees [--date YYYY-MM-DD] [--scalar] > fees.csv
+    python cli.py refresh-overdue [--date YYYY-MM-DD] [--full]
+    python cli.py check-patron-stats [--repair]
+    python cli.py export-patron-reports [--format ndjson|csv] [--date YYYY-MM-DD] > reports.ndjson
+"""
+
+import argparse
+import csv
+import sys
+from datetime import date
+
+import database
+from database import init_database
+from services.catalog_import import BATCH_SIZE, import_books_from_file
+from services.fee_sweep import sweep_late_fees
+from services.overdue_ledger import refresh_overdue_ledger
+from services.patron_stats import check_patron_stats
+from services.patron_export import EXPORT_FORMATS, export_patron_status_reports
+
+
+def import_books(args) -> int:
+    """Bulk import a CSV/JSONL catalog file and print a per-row error report."""
+    init_database()
+    report = import_books_from_file(args.path, fmt=args.format, batch_size=args.batch_size)
+    if "errors" not in report:
+        print(report["message"], file=sys.stderr)
+        return 2
+
+    for err in report["errors"]:
+        print(f"line {err['line']}: {err['message']} (isbn={err['isbn']})", file=sys.stderr)
+    print(f"processed={report['processed']} inserted={report['inserted']} "
+          f"duplicates={report['duplicates']} invalid={report['invalid']} failed={report['failed']}")
+    if report["status"] == "error":
+        print(report["message"], file=sys.stderr)
+        return 2
+    return 1 if report["errors"] else 0
+
+
+def sweep_fees(args) -> int:
+    """Write the late fee of every active loan as CSV, with totals on stderr."""
+    init_database()
+    sweep = sweep_late_fees(today=args.date, vectorized=not args.scalar)
+    writer = csv.DictWriter(sys.stdout, fieldnames=["record_id", "patron_id", "book_id",
+                                                    "due_date", "days_overdue", "fee_amount"])
+    writer.writeheader()
+    writer.writerows(sweep["loans"])
+    print(f"as_of={sweep['as_of']} loans={len(sweep['loans'])} patrons={len(sweep['patrons'])} "
+          f"total_fee={sweep['total_fee']:.2f} skipped={sweep['skipped']}", file=sys.stderr)
+    return 0
+
+
+def refresh_overdue(args) -> int:
+    """Bring the overdue_loans ledger up to date (run daily)."""
+    init_database()
+    result = refresh_overdue_ledger(today=args.date, full=args.full)
+    print(f"as_of={result['as_of']} full={result['full']} added={result['added']} "
+          f"updated={result['updated']} size={result['size']}")
+    return 0
+
+
+def check_stats(args) -> int:
+    """Report (and optionally repair) patron_stats rows that disagree with borrow_records."""
+    init_database()
+    result = check_patron_stats(repair=args.repair)
+    for m in result["mismatches"]:
+        print(f"patron {m['patron_id']}: stored={m['stored']} actual={m['actual']}", file=sys.stderr)
+    print(f"patrons={result['patrons']} mismatches={len(result['mismatches'])} repaired={result['repaired']}")
+    return 1 if len(result["mismatches"]) > result["repaired"] else 0
+
+
+def export_reports(args) -> int:
+    """Stream every patron's status report to stdout, with the count on stderr."""
+    init_database()
+    count = export_patron_status_reports(sys.stdout, fmt=args.format, today=args.date)
+    print(f"patrons={count}", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Library Management System maintenance tasks")
+    parser.add_argument("--database", default=database.DATABASE, help="SQLite database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("import-books", help="bulk import books from a CSV or JSONL file")
+    cmd.add_argument("path")
+    cmd.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    cmd.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    cmd.set_defaults(func=import_books)
+
+    cmd = commands.add_parser("sweep-late-fees", help="compute late fees for every active loan (CSV on stdout)")
+    cmd.add_argument("--date", type=date.fromisoformat, default=None, help="billing date (default: today)")
+    cmd.add_argument("--scalar", action="store_true", help="skip NumPy and use the per-loan loop")
+    cmd.set_defaults(func=sweep_fees)
+
+    cmd = commands.add_parser("refresh-overdue", help="update the overdue loan ledger")
+    cmd.add_argument("--date", type=date.fromisoformat, default=None, help="ledger date (default: today)")
+    cmd.add_argument("--full", action="store_true", help="rebuild from every active loan")
+    cmd.set_defaults(func=refresh_overdue)
+
+    cmd = commands.add_parser("check-patron-stats", help="verify the per-patron loan counters")
+    cmd.add_argument("--repair", action="store_true", help="rewrite counters that disagree")
+    cmd.set_defaults(func=check_stats)
+
+    cmd = commands.add_parser("export-patron-reports", help="write every patron's status report to stdout")
+    cmd.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    cmd.add_argument("--date", type=date.fromisoformat, default=None, help="report date (default: today)")
+    cmd.set_defaults(func=export_reports)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    database.DATABASE = args.database
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
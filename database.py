@@ -3,50 +3,469 @@ Database module for Library Management System
 Handles all database operations and connections
 """
 
+import json
+import logging
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+from flask import g, has_app_context
+
+from lru import LRUCache
+from migrations import FTS_TABLE, fts_available, migrate
+
+logger = logging.getLogger(__name__)
+
 # Database configuration
 DATABASE = 'library.db'
+POOL_SIZE = 5
+POOL_TIMEOUT = 10.0
+BOOK_CACHE_SIZE = 1024
+# Book columns that never change after insert: the only ones BookCache keeps
+BOOK_METADATA_COLUMNS = ('id', 'title', 'author', 'isbn', 'total_copies')
+DB_PROFILE = 'performance'
+
+# SQLite tuning profiles, selectable via app.config['DB_PROFILE'].
+# journal_mode is persistent in the database file and is set by
+# init_database(); the rest are per-connection and set on connect.
+SQLITE_PROFILES = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',      # readers no longer block on writers
+        'synchronous': 'NORMAL',    # one fsync per checkpoint, safe with WAL
+        'cache_size': -20000,       # ~20 MB page cache (negative = KiB)
+        'mmap_size': 268435456,     # 256 MB memory-mapped I/O
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,       # ms to wait on a locked database
+    },
+}
+PRAGMA_NAMES = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+
+
+def resolve_profile(profile, overrides: Optional[Dict] = None) -> Dict:
+    """Turn a profile name (or explicit pragma dict) plus overrides into validated pragmas."""
+    if isinstance(profile, dict):
+        pragmas = dict(profile)
+    elif profile in SQLITE_PROFILES:
+        pragmas = dict(SQLITE_PROFILES[profile])
+    else:
+        raise ValueError(f'Unknown database profile: {profile!r}')
+    pragmas.update(overrides or {})
+
+    for name, value in pragmas.items():
+        if name not in PRAGMA_NAMES:
+            raise ValueError(f'Unsupported pragma: {name!r}')
+        if not isinstance(value, int) and not str(value).isalpha():
+            raise ValueError(f'Invalid value for pragma {name}: {value!r}')
+    return pragmas
+
+
+def apply_pragmas(conn, pragmas: Dict, names=PRAGMA_NAMES):
+    """Apply the given pragmas (restricted to names) to a connection."""
+    for name in names:
+        if name in pragmas:
+            conn.execute(f'PRAGMA {name} = {pragmas[name]}')
+
+
+DB_PRAGMAS = resolve_profile(DB_PROFILE)
+CONNECTION_PRAGMAS = tuple(name for name in PRAGMA_NAMES if name != 'journal_mode')
+
+
+def configure_profile(profile, overrides: Optional[Dict] = None):
+    """Select the SQLite performance profile used for new connections."""
+    global DB_PROFILE, DB_PRAGMAS
+    DB_PRAGMAS = resolve_profile(profile, overrides)
+    DB_PROFILE = profile if isinstance(profile, str) else 'custom'
+    reset_pool()
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled sqlite3 connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to its owner (the pool, or the current Flask request)
+    instead of tearing it down.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, release):
+        self._conn = conn
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        """
+        Release the connection instead of closing it.
+
+        Uncommitted work is rolled back first: a request-scoped connection
+        stays with the request, and a transaction left open would keep the
+        write lock and break the next BEGIN IMMEDIATE.
+        """
+        if self._conn.in_transaction:
+            self._conn.rollback()
+        if self._release is not None:
+            self._release()
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared across threads."""
+
+    def __init__(self, database: str, max_size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT,
+                 pragmas: Optional[Dict] = None):
+        self.database = database
+        self.pragmas = pragmas or {}
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: List[sqlite3.Connection] = []
+        self._cond = threading.Condition()
+        self._size = 0
+        self.opened = 0
+        self.checkouts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        apply_pragmas(conn, self.pragmas, CONNECTION_PRAGMAS)
+        return conn
+
+    def acquire(self) -> Tuple[sqlite3.Connection, bool]:
+        """Check out a connection; returns (connection, freshly_opened)."""
+        with self._cond:
+            if not self._idle and self._size >= self.max_size:
+                if not self._cond.wait_for(lambda: self._idle or self._size < self.max_size,
+                                           timeout=self.timeout):
+                    raise sqlite3.OperationalError('Timed out waiting for a database connection.')
+            self.checkouts += 1
+            if self._idle:
+                return self._idle.pop(), False
+            self._size += 1
+            self.opened += 1
+        try:
+            return self._connect(), True
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, discarding any uncommitted work."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        finally:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'opened': self.opened,
+                'checkouts': self.checkouts,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the process-wide connection pool, (re)creating it if DATABASE changed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.database != DATABASE:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = ConnectionPool(DATABASE, POOL_SIZE, POOL_TIMEOUT, DB_PRAGMAS)
+        return _pool
+
+
+def reset_pool():
+    """Close pooled connections and drop the pool and book cache (used by tests and on shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+    _book_cache.clear()
+    _bump_catalog_version()
+
 
 def get_db_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row  # This enables column access by name
-    return conn
+    """
+    Get a database connection.
+
+    Inside a Flask app context every call shares one pooled connection that
+    is released on teardown; elsewhere each call checks out a connection
+    from the pool and close() returns it.
+    """
+    pool = get_pool()
+    if has_app_context():
+        g.db_connection_calls = g.get('db_connection_calls', 0) + 1
+        if 'db_conn' not in g:
+            conn, opened = pool.acquire()
+            g.db_conn = conn
+            g.db_pool = pool
+            g.db_connections_opened = int(opened)
+        return PooledConnection(g.db_conn, None)
+
+    conn, _ = pool.acquire()
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            pool.release(conn)
+
+    return PooledConnection(conn, release)
+
+
+def get_connection_stats() -> Dict[str, int]:
+    """Get counters for the connection pool."""
+    return get_pool().stats()
+
+
+def get_request_connection_stats() -> Dict[str, int]:
+    """Get connection usage for the current Flask request."""
+    return {
+        'calls': g.get('db_connection_calls', 0),
+        'opened': g.get('db_connections_opened', 0),
+    }
+
+
+def close_request_connection(exc=None):
+    """Release the current request's connection back to the pool."""
+    conn = g.pop('db_conn', None)
+    pool = g.pop('db_pool', None)
+    if conn is not None and pool is not None:
+        pool.release(conn)
+
+
+def _add_connection_stats_header(response):
+    stats = get_request_connection_stats()
+    response.headers['X-DB-Connections'] = f"calls={stats['calls']}, opened={stats['opened']}"
+    return response
+
+
+class BookCache(LRUCache):
+    """
+    Bounded LRU cache of book metadata keyed by id, with an ISBN -> id index.
+
+    Backs get_book_metadata(). Only BOOK_METADATA_COLUMNS are kept;
+    available_copies changes with every borrow and return, from any
+    process, so it is only ever read from the database. Every invalidation bumps a generation counter, and put()
+    refuses rows read before the latest invalidation so a racing reader
+    cannot re-cache stale data.
+    """
+
+    def __init__(self, max_size: int = BOOK_CACHE_SIZE):
+        super().__init__(max_size, on_evict=self._forget_isbn)
+        self.database = None
+        self._ids_by_isbn: Dict[str, int] = {}
+        self.generation = 0
+
+    def _forget_isbn(self, book_id: int, book: Dict):
+        self._ids_by_isbn.pop(book['isbn'], None)
+
+    def get(self, book_id: int) -> Optional[Dict]:
+        book = super().get(book_id)
+        return dict(book) if book is not None else None
+
+    def get_by_isbn(self, isbn: str) -> Optional[Dict]:
+        with self._lock:
+            book_id = self._ids_by_isbn.get(isbn)
+            if book_id is None:
+                self.misses += 1
+                return None
+            return self.get(book_id)
+
+    def put(self, book: Dict, generation: Optional[int] = None):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            super().put(book['id'], {k: book[k] for k in BOOK_METADATA_COLUMNS if k in book})
+            self._ids_by_isbn[book['isbn']] = book['id']
+
+    def invalidate(self, book_id: Optional[int] = None, isbn: Optional[str] = None):
+        with self._lock:
+            self.generation += 1
+            if book_id is None and isbn is not None:
+                book_id = self._ids_by_isbn.get(isbn)
+            book = self.pop(book_id)
+            if book is not None:
+                self._forget_isbn(book_id, book)
+
+    def clear(self, database: Optional[str] = None):
+        with self._lock:
+            self.generation += 1
+            super().clear()
+            self._ids_by_isbn.clear()
+            self.database = database
+
+
+_book_cache = BookCache()
+
+
+def get_book_cache() -> BookCache:
+    """Get the book cache, emptying it if DATABASE has changed since it was filled."""
+    if _book_cache.database != DATABASE:
+        _book_cache.clear(DATABASE)
+    return _book_cache
+
+
+def get_book_cache_stats() -> Dict[str, int]:
+    """Get hit/miss counters for the book cache."""
+    return get_book_cache().stats()
+
+
+_catalog_listeners = []
+_catalog_version = 0
+_catalog_version_lock = threading.Lock()
+
+
+def get_catalog_version() -> int:
+    """Get a counter bumped on every catalog change made through this module."""
+    return _catalog_version
+
+
+def _bump_catalog_version():
+    global _catalog_version
+    with _catalog_version_lock:
+        _catalog_version += 1
+
+
+def get_catalog_revision() -> Optional[int]:
+    """
+    Get the catalog revision stored in the database.
+
+    Triggers on books bump it on every insert, delete and title, author or
+    isbn update (not availability changes), whichever process made the
+    write, so unlike get_catalog_version() it also moves for changes this
+    process was never notified of. None if the database has not been
+    migrated yet.
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute('SELECT revision FROM catalog_revision').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def add_catalog_listener(listener):
+    """
+    Register a callable notified after this process changes the catalog.
+
+    Listeners are called as listener(event, payload) with event 'insert'
+    (payload: the new book dict) or 'availability' (payload: book id).
+    """
+    if listener not in _catalog_listeners:
+        _catalog_listeners.append(listener)
+
+
+def remove_catalog_listener(listener):
+    """Unregister a catalog listener."""
+    if listener in _catalog_listeners:
+        _catalog_listeners.remove(listener)
+
+
+def notify_catalog_change(event: str, payload):
+    """Bump the catalog version and tell listeners about a committed change; listener errors never fail the write."""
+    _bump_catalog_version()
+    for listener in list(_catalog_listeners):
+        try:
+            listener(event, payload)
+        except Exception:
+            logger.exception('Catalog listener %r failed on %s', listener, event)
+
+
+_loan_listeners = []
+
+
+def add_loan_listener(listener):
+    """
+    Register a callable notified after this process opens or closes a loan.
+
+    Listeners are called as listener(event, loan) with event 'borrow' or
+    'return' and loan a dict of record_id, patron_id, book_id, due_date.
+    """
+    if listener not in _loan_listeners:
+        _loan_listeners.append(listener)
+
+
+def remove_loan_listener(listener):
+    """Unregister a loan listener."""
+    if listener in _loan_listeners:
+        _loan_listeners.remove(listener)
+
+
+def notify_loan_change(event: str, loan: Dict):
+    """Tell loan listeners about a committed borrow or return; listener errors never fail the write."""
+    for listener in list(_loan_listeners):
+        try:
+            listener(event, loan)
+        except Exception:
+            logger.exception('Loan listener %r failed on %s', listener, event)
+
+
+def init_app(app):
+    """Wire the connection manager and book cache into a Flask app."""
+    global POOL_SIZE, POOL_TIMEOUT
+    POOL_SIZE = app.config.setdefault('DB_POOL_SIZE', POOL_SIZE)
+    POOL_TIMEOUT = app.config.setdefault('DB_POOL_TIMEOUT', POOL_TIMEOUT)
+    _book_cache.max_size = app.config.setdefault('BOOK_CACHE_SIZE', _book_cache.max_size)
+    configure_profile(app.config.setdefault('DB_PROFILE', DB_PROFILE),
+                      app.config.get('DB_PRAGMAS'))
+    app.teardown_appcontext(close_request_connection)
+    if app.config.get('DB_CONNECTION_STATS'):
+        app.after_request(_add_connection_stats_header)
 
 def init_database():
-    """Initialize the database with required tables."""
+    """Initialize the database by applying any pending schema migrations."""
     conn = get_db_connection()
-    
-    # Create books table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            author TEXT NOT NULL,
-            isbn TEXT UNIQUE NOT NULL,
-            total_copies INTEGER NOT NULL,
-            available_copies INTEGER NOT NULL
-        )
-    ''')
-    
-    # Create borrow_records table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS borrow_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            patron_id TEXT NOT NULL,
-            book_id INTEGER NOT NULL,
-            borrow_date TEXT NOT NULL,
-            due_date TEXT NOT NULL,
-            return_date TEXT,
-            FOREIGN KEY (book_id) REFERENCES books (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    try:
+        # Switch journal mode before any tables are touched
+        apply_pragmas(conn, DB_PRAGMAS, ('journal_mode',))
+        migrate(conn)
+    finally:
+        conn.close()
 
 def add_sample_data():
     """Add sample data to the database if it's empty."""
@@ -87,35 +506,157 @@ def add_sample_data():
 def get_all_books() -> List[Dict]:
     """Get all books from the database."""
     conn = get_db_connection()
-    books = conn.execute('SELECT * FROM books ORDER BY title').fetchall()
-    conn.close()
+    try:
+        books = conn.execute('SELECT * FROM books ORDER BY title, id').fetchall()
+    finally:
+        conn.close()
     return [dict(book) for book in books]
 
+def get_books_page(limit: int, after: Optional[Tuple[str, int]] = None,
+                   before: Optional[Tuple[str, int]] = None) -> Tuple[List[Dict], bool]:
+    """
+    Get one page of books in (title, id) order using keyset pagination.
+
+    Args:
+        limit: maximum number of books to return
+        after: (title, id) key to page forward from
+        before: (title, id) key to page backward from
+
+    Returns:
+        tuple: (books in ascending order, whether more rows exist in the paging direction)
+    """
+    conn = get_db_connection()
+    try:
+        if before is not None:
+            books = conn.execute('''
+                SELECT * FROM books WHERE (title, id) < (?, ?)
+                ORDER BY title DESC, id DESC LIMIT ?
+            ''', (before[0], before[1], limit + 1)).fetchall()
+        elif after is not None:
+            books = conn.execute('''
+                SELECT * FROM books WHERE (title, id) > (?, ?)
+                ORDER BY title, id LIMIT ?
+            ''', (after[0], after[1], limit + 1)).fetchall()
+        else:
+            books = conn.execute(
+                'SELECT * FROM books ORDER BY title, id LIMIT ?', (limit + 1,)
+            ).fetchall()
+    finally:
+        conn.close()
+    has_more = len(books) > limit
+    books = [dict(book) for book in books[:limit]]
+    if before is not None:
+        books.reverse()
+    return books, has_more
+
 def get_book_by_id(book_id: int) -> Optional[Dict]:
-    """Get a specific book by ID."""
+    """Get a specific book by ID, read from the database."""
     conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
-    conn.close()
+    try:
+        book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
+    finally:
+        conn.close()
     return dict(book) if book else None
 
 def get_book_by_isbn(isbn: str) -> Optional[Dict]:
-    """Get a specific book by ISBN."""
+    """Get a specific book by ISBN, read from the database."""
     conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE isbn = ?', (isbn,)).fetchone()
-    conn.close()
+    try:
+        book = conn.execute('SELECT * FROM books WHERE isbn = ?', (isbn,)).fetchone()
+    finally:
+        conn.close()
     return dict(book) if book else None
 
+def get_available_copies(book_ids: List[int]) -> Dict[int, int]:
+    """Get the current available_copies of many books with one query, by book id."""
+    if not book_ids:
+        return {}
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            'SELECT id, available_copies FROM books WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(book_ids)),)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row['id']: row['available_copies'] for row in rows}
+
+def get_book_titles(book_ids: List[int]) -> Dict[int, str]:
+    """Get the titles of many books with one query, by book id (unknown ids are left out)."""
+    if not book_ids:
+        return {}
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            'SELECT id, title FROM books WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(book_ids)),)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row['id']: row['title'] for row in rows}
+
+def get_book_metadata(book_id: int) -> Optional[Dict]:
+    """
+    Get a book's BOOK_METADATA_COLUMNS through the book cache.
+
+    For callers that only need to know the book exists or what it is
+    called; a hit costs no database round trip. There is no
+    available_copies: use get_book_by_id, or let borrow_book_atomic decide.
+    """
+    cache = get_book_cache()
+    cached = cache.get(book_id)
+    if cached is not None:
+        return cached
+    generation = cache.generation
+    book = get_book_by_id(book_id)
+    if book is None:
+        return None
+    cache.put(book, generation)
+    return {k: book[k] for k in BOOK_METADATA_COLUMNS}
+
+def search_books_fts(field: str, needle: str) -> Optional[List[Dict]]:
+    """
+    Find books whose title or author contains needle, using the trigram FTS index.
+
+    The trigram tokenizer only indexes substrings of 3+ characters and folds
+    case the way SQLite does, so callers should re-check candidates. Rows
+    come back in the same (title, id) order as get_all_books().
+
+    Returns:
+        list: candidate books, or None if the index is unavailable for this query
+    """
+    if field not in ('title', 'author') or len(needle) < 3:
+        return None
+    conn = get_db_connection()
+    try:
+        if not fts_available(conn):
+            return None
+        phrase = '"' + needle.replace('"', '""') + '"'
+        books = conn.execute(f'''
+            SELECT b.* FROM {FTS_TABLE} f
+            JOIN books b ON b.id = f.rowid
+            WHERE {FTS_TABLE} MATCH ?
+            ORDER BY b.title, b.id
+        ''', (f'{field} : {phrase}',)).fetchall()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return [dict(book) for book in books]
+
 def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
     """Get currently borrowed books for a patron."""
     conn = get_db_connection()
-    records = conn.execute('''
-        SELECT br.*, b.title, b.author 
-        FROM borrow_records br 
-        JOIN books b ON br.book_id = b.id 
-        WHERE br.patron_id = ? AND br.return_date IS NULL
-        ORDER BY br.borrow_date
-    ''', (patron_id,)).fetchall()
-    conn.close()
+    try:
+        records = conn.execute('''
+            SELECT br.*, b.title, b.author 
+            FROM borrow_records br 
+            JOIN books b ON br.book_id = b.id 
+            WHERE br.patron_id = ? AND br.return_date IS NULL
+            ORDER BY br.borrow_date
+        ''', (patron_id,)).fetchall()
+    finally:
+        conn.close()
     
     borrowed_books = []
     for record in records:
@@ -133,42 +674,109 @@ def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
 def get_patron_borrow_count(patron_id: str) -> int:
     """Get the number of books currently borrowed by a patron."""
     conn = get_db_connection()
-    count = conn.execute('''
-        SELECT COUNT(*) as count FROM borrow_records 
-        WHERE patron_id = ? AND return_date IS NULL
-    ''', (patron_id,)).fetchone()['count']
-    conn.close()
-    return count
+    try:
+        row = conn.execute(
+            'SELECT active_count FROM patron_stats WHERE patron_id = ?', (patron_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return row['active_count'] if row else 0
+
+def get_patron_stats(patron_id: str) -> Dict:
+    """
+    Get a patron's loan counters, kept current by triggers on borrow_records.
+    
+    Returns:
+        dict: active_count, lifetime_count, and next_due_date (earliest due
+        date of an active loan, None without one: the patron has an overdue
+        loan once it has passed)
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            'SELECT active_count, lifetime_count, next_due_date FROM patron_stats WHERE patron_id = ?',
+            (patron_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return {'active_count': 0, 'lifetime_count': 0, 'next_due_date': None}
+    return dict(row)
 
 def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
     """Insert a new book into the database."""
     conn = get_db_connection()
     try:
-        conn.execute('''
+        book_id = conn.execute('''
             INSERT INTO books (title, author, isbn, total_copies, available_copies)
             VALUES (?, ?, ?, ?, ?)
-        ''', (title, author, isbn, total_copies, available_copies))
+        ''', (title, author, isbn, total_copies, available_copies)).lastrowid
         conn.commit()
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        return False
+    finally:
         conn.close()
-        return True
+    get_book_cache().invalidate(isbn=isbn)
+    notify_catalog_change('insert', {
+        'id': book_id, 'title': title, 'author': author, 'isbn': isbn,
+        'total_copies': total_copies, 'available_copies': available_copies,
+    })
+    return True
+
+def insert_books_bulk(books: List[Tuple[str, str, str, int, int]]) -> Optional[set]:
+    """
+    Insert a batch of (title, author, isbn, total_copies, available_copies) rows in one transaction.
+
+    ISBNs that already exist are skipped by the ON CONFLICT clause rather
+    than looked up beforehand.
+
+    Returns:
+        set: ISBNs actually inserted, or None if the batch failed
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM books').fetchone()[0]
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (isbn) DO NOTHING
+        ''', books)
+        # AUTOINCREMENT ids are monotonic, so anything above last_id is ours
+        rows = [dict(row) for row in conn.execute('SELECT * FROM books WHERE id > ? ORDER BY id', (last_id,))]
+        conn.commit()
     except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        return None
+    finally:
         conn.close()
-        return False
+    cache = get_book_cache()
+    for book in rows:
+        cache.invalidate(isbn=book['isbn'])
+        notify_catalog_change('insert', book)
+    return {book['isbn'] for book in rows}
 
 def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> bool:
     """Insert a new borrow record into the database."""
     conn = get_db_connection()
     try:
-        conn.execute('''
+        record_id = conn.execute('''
             INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
             VALUES (?, ?, ?, ?)
-        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
+        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat())).lastrowid
         conn.commit()
-        conn.close()
-        return True
     except Exception as e:
-        conn.close()
+        if conn.in_transaction:
+            conn.rollback()
         return False
+    finally:
+        conn.close()
+    notify_loan_change('borrow', {'record_id': record_id, 'patron_id': patron_id,
+                                  'book_id': book_id, 'due_date': due_date.isoformat()})
+    return True
 
 def update_book_availability(book_id: int, change: int) -> bool:
     """Update the available copies of a book by a given amount (+1 for return, -1 for borrow)."""
@@ -178,24 +786,110 @@ def update_book_availability(book_id: int, change: int) -> bool:
             UPDATE books SET available_copies = available_copies + ? WHERE id = ?
         ''', (change, book_id))
         conn.commit()
-        conn.close()
-        return True
     except Exception as e:
-        conn.close()
+        if conn.in_transaction:
+            conn.rollback()
         return False
+    finally:
+        conn.close()
+    notify_catalog_change('availability', book_id)
+    return True
 
 def update_borrow_record_return_date(patron_id: str, book_id: int, return_date: datetime) -> bool:
     """Update the return date for a borrow record."""
     conn = get_db_connection()
     try:
+        conn.execute('BEGIN IMMEDIATE')
+        closed = conn.execute('''
+            SELECT id, due_date FROM borrow_records
+            WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+        ''', (patron_id, book_id)).fetchall()
         conn.execute('''
             UPDATE borrow_records 
             SET return_date = ? 
             WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
         ''', (return_date.isoformat(), patron_id, book_id))
         conn.commit()
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        return False
+    finally:
         conn.close()
-        return True
+    for row in closed:
+        notify_loan_change('return', {'record_id': row['id'], 'patron_id': patron_id,
+                                      'book_id': book_id, 'due_date': row['due_date']})
+    return True
+
+def borrow_book_atomic(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> Tuple[bool, str]:
+    """
+    Claim a copy of a book and record the loan in a single transaction.
+
+    The availability check and decrement is one conditional UPDATE, so
+    concurrent borrows can never drive available_copies below zero.
+
+    Returns:
+        tuple: (success: bool, reason: str) where reason is 'ok', 'unavailable' or 'error'
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        claimed = conn.execute('''
+            UPDATE books SET available_copies = available_copies - 1
+            WHERE id = ? AND available_copies > 0
+        ''', (book_id,)).rowcount
+        if not claimed:
+            conn.rollback()
+            return False, 'unavailable'
+        record_id = conn.execute('''
+            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+            VALUES (?, ?, ?, ?)
+        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat())).lastrowid
+        conn.commit()
     except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        return False, 'error'
+    finally:
         conn.close()
-        return False
+    notify_catalog_change('availability', book_id)
+    notify_loan_change('borrow', {'record_id': record_id, 'patron_id': patron_id,
+                                  'book_id': book_id, 'due_date': due_date.isoformat()})
+    return True, 'ok'
+
+def return_book_atomic(patron_id: str, book_id: int, return_date: datetime) -> Tuple[bool, str]:
+    """
+    Close the patron's oldest active loan of a book and release the copy in a single transaction.
+
+    Returns:
+        tuple: (success: bool, reason: str) where reason is 'ok', 'no_active_loan' or 'error'
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        loan = conn.execute('''
+            SELECT id, due_date FROM borrow_records
+            WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+            ORDER BY borrow_date
+            LIMIT 1
+        ''', (patron_id, book_id)).fetchone()
+        if loan is None:
+            conn.rollback()
+            return False, 'no_active_loan'
+        conn.execute('UPDATE borrow_records SET return_date = ? WHERE id = ?',
+                     (return_date.isoformat(), loan['id']))
+        conn.execute('''
+            UPDATE books SET available_copies = MIN(available_copies + 1, total_copies)
+            WHERE id = ?
+        ''', (book_id,))
+        conn.commit()
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        return False, 'error'
+    finally:
+        conn.close()
+    notify_catalog_change('availability', book_id)
+    notify_loan_change('return', {'record_id': loan['id'], 'patron_id': patron_id,
+                                  'book_id': book_id, 'due_date': loan['due_date']})
+    return True, 'ok'
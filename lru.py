@@ -0,0 +1,107 @@
+"""
+LRU cache shared by the book, search result and patron report caches.
+
+LRUCache keeps the most recently used entries up to a size bound, can
+expire entries after a TTL, and counts hits, misses and evictions; each
+cache builds its own keying and invalidation rules on top of it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU map with an optional per-entry TTL.
+
+    get() treats an entry older than ttl seconds as absent and drops it
+    (an expiration), and drops an entry its check callable rejects (a
+    rejection); both count as misses. put() evicts least recently used
+    entries beyond max_size, calling on_evict(key, value) for each. A
+    max_size of 0 or less disables caching.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None, clock=time.monotonic,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._on_evict = on_evict
+        # Reentrant so subclasses can hold it across get/put calls
+        self._lock = threading.RLock()
+        self._entries: 'OrderedDict[Hashable, Tuple[Optional[float], Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.rejections = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, check: Optional[Callable[[Any], bool]] = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if check is not None and not check(value):
+                del self._entries[key]
+                self.rejections += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            expires_at = self._clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted_key, (_, evicted) = self._entries.popitem(last=False)
+                self.evictions += 1
+                if self._on_evict is not None:
+                    self._on_evict(evicted_key, evicted)
+
+    def pop(self, key: Hashable) -> Any:
+        """Remove an entry without counting a lookup; returns its value or None."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def configure(self, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        """Change the size bound and/or TTL; the cache is emptied."""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
@@ -0,0 +1,367 @@
+"""
+Schema migrations for the Library Management System database.
+
+Each migration is a (version, description, steps) entry, where a step is
+either an SQL statement or a callable taking the connection. The schema
+version is stored in SQLite's PRAGMA user_version, so migrate() only runs
+the entries newer than the database it is handed. Append new migrations
+to the end of MIGRATIONS; never edit one that has shipped.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple, Union
+
+Step = Union[str, Callable]
+
+FTS_TABLE = 'books_fts'
+
+# What patron_stats holds for each patron, computed from borrow_records.
+# The backfill and the consistency check both use it.
+PATRON_STATS_SELECT = '''
+    SELECT patron_id,
+           SUM(return_date IS NULL) AS active_count,
+           COUNT(*) AS lifetime_count,
+           MIN(CASE WHEN return_date IS NULL THEN NULLIF(due_date, '') END) AS next_due_date
+    FROM borrow_records
+    GROUP BY patron_id
+'''
+
+
+def table_exists(conn, name: str) -> bool:
+    """Check whether a table exists in this database."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def fts_available(conn) -> bool:
+    """Check whether the books full-text index exists in this database."""
+    return table_exists(conn, FTS_TABLE)
+
+
+def _create_books_fts(conn):
+    """
+    Create the trigram FTS5 index over book titles and authors.
+
+    The index is optional: on SQLite builds without FTS5 (or without the
+    trigram tokenizer, added in 3.34) the step is skipped and search keeps
+    using the catalog scan.
+    """
+    try:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+                title, author,
+                content='books', content_rowid='id',
+                tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return
+    # External-content table: keep it in step with books via triggers
+    conn.execute(f'''
+        CREATE TRIGGER books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO {FTS_TABLE} (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, 'Create books and borrow_records tables', [
+        '''
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            isbn TEXT UNIQUE NOT NULL,
+            total_copies INTEGER NOT NULL,
+            available_copies INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS borrow_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patron_id TEXT NOT NULL,
+            book_id INTEGER NOT NULL,
+            borrow_date TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            return_date TEXT,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+        ''',
+    ]),
+    (2, 'Index active loans, patron history and catalog ordering', [
+        # Active loans: borrow limit checks, returns, late fees
+        '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_active
+        ON borrow_records (patron_id, book_id, borrow_date)
+        WHERE return_date IS NULL
+        ''',
+        # Lifetime counts and most recent returns per patron
+        '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron_return
+        ON borrow_records (patron_id, return_date)
+        ''',
+        # get_all_books() ORDER BY title
+        '''
+        CREATE INDEX IF NOT EXISTS idx_books_title
+        ON books (title, id)
+        ''',
+    ]),
+    (3, 'Optional trigram full-text index on book titles and authors', [
+        _create_books_fts,
+    ]),
+    (4, 'Overdue loan ledger and due-date index', [
+        # Active loans by due date: finds the loans that crossed it since the last refresh
+        '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_due_active
+        ON borrow_records (due_date)
+        WHERE return_date IS NULL
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS overdue_loans (
+            record_id INTEGER PRIMARY KEY REFERENCES borrow_records (id),
+            patron_id TEXT NOT NULL,
+            book_id INTEGER NOT NULL,
+            due_date TEXT NOT NULL,
+            fee_amount REAL NOT NULL,
+            updated_on TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_overdue_loans_patron_book
+        ON overdue_loans (patron_id, book_id)
+        ''',
+        # Fees still below the cap are the only ones a refresh rewrites
+        '''
+        CREATE INDEX IF NOT EXISTS idx_overdue_loans_fee
+        ON overdue_loans (fee_amount)
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS overdue_ledger_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            refreshed_on TEXT NOT NULL,
+            last_record_id INTEGER NOT NULL,
+            policy TEXT NOT NULL
+        )
+        ''',
+        # Returns leave the ledger immediately, whichever code path records them
+        '''
+        CREATE TRIGGER IF NOT EXISTS overdue_loans_on_return
+        AFTER UPDATE OF return_date ON borrow_records
+        WHEN new.return_date IS NOT NULL
+        BEGIN
+            DELETE FROM overdue_loans WHERE record_id = new.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS overdue_loans_on_delete
+        AFTER DELETE ON borrow_records
+        BEGIN
+            DELETE FROM overdue_loans WHERE record_id = old.id;
+        END
+        ''',
+    ]),
+    (5, 'Trigger-maintained per-patron loan counters', [
+        # next_due_date is the overdue hint: the earliest due date of an active loan
+        '''
+        CREATE TABLE IF NOT EXISTS patron_stats (
+            patron_id TEXT PRIMARY KEY,
+            active_count INTEGER NOT NULL DEFAULT 0,
+            lifetime_count INTEGER NOT NULL DEFAULT 0,
+            next_due_date TEXT
+        ) WITHOUT ROWID
+        ''',
+        'INSERT OR REPLACE INTO patron_stats ' + PATRON_STATS_SELECT,
+        '''
+        CREATE TRIGGER IF NOT EXISTS patron_stats_on_insert
+        AFTER INSERT ON borrow_records
+        BEGIN
+            INSERT INTO patron_stats (patron_id, active_count, lifetime_count, next_due_date)
+            VALUES (new.patron_id, new.return_date IS NULL, 1,
+                    CASE WHEN new.return_date IS NULL THEN NULLIF(new.due_date, '') END)
+            ON CONFLICT (patron_id) DO UPDATE SET
+                active_count = active_count + excluded.active_count,
+                lifetime_count = lifetime_count + 1,
+                next_due_date = COALESCE(MIN(next_due_date, excluded.next_due_date),
+                                         next_due_date, excluded.next_due_date);
+        END
+        ''',
+        # Returns and due date changes: the patron's few active loans are
+        # re-read through idx_borrow_records_active for the new hint
+        '''
+        CREATE TRIGGER IF NOT EXISTS patron_stats_on_update
+        AFTER UPDATE OF return_date, due_date ON borrow_records
+        WHEN old.patron_id = new.patron_id
+        BEGIN
+            UPDATE patron_stats SET
+                active_count = active_count - (old.return_date IS NULL) + (new.return_date IS NULL),
+                next_due_date = (SELECT MIN(NULLIF(due_date, '')) FROM borrow_records
+                                 WHERE patron_id = new.patron_id AND return_date IS NULL)
+            WHERE patron_id = new.patron_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS patron_stats_on_move
+        AFTER UPDATE OF patron_id ON borrow_records
+        WHEN old.patron_id IS NOT new.patron_id
+        BEGIN
+            UPDATE patron_stats SET
+                active_count = active_count - (old.return_date IS NULL),
+                lifetime_count = lifetime_count - 1,
+                next_due_date = (SELECT MIN(NULLIF(due_date, '')) FROM borrow_records
+                                 WHERE patron_id = old.patron_id AND return_date IS NULL)
+            WHERE patron_id = old.patron_id;
+            DELETE FROM patron_stats WHERE patron_id = old.patron_id AND lifetime_count = 0;
+            INSERT INTO patron_stats (patron_id, active_count, lifetime_count, next_due_date)
+            VALUES (new.patron_id, new.return_date IS NULL, 1,
+                    CASE WHEN new.return_date IS NULL THEN NULLIF(new.due_date, '') END)
+            ON CONFLICT (patron_id) DO UPDATE SET
+                active_count = active_count + excluded.active_count,
+                lifetime_count = lifetime_count + 1,
+                next_due_date = COALESCE(MIN(next_due_date, excluded.next_due_date),
+                                         next_due_date, excluded.next_due_date);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS patron_stats_on_delete
+        AFTER DELETE ON borrow_records
+        BEGIN
+            UPDATE patron_stats SET
+                active_count = active_count - (old.return_date IS NULL),
+                lifetime_count = lifetime_count - 1,
+                next_due_date = (SELECT MIN(NULLIF(due_date, '')) FROM borrow_records
+                                 WHERE patron_id = old.patron_id AND return_date IS NULL)
+            WHERE patron_id = old.patron_id;
+            DELETE FROM patron_stats WHERE patron_id = old.patron_id AND lifetime_count = 0;
+        END
+        ''',
+    ]),
+    (6, 'Per-patron circulation version for status report ETags', [
+        'ALTER TABLE patron_stats ADD COLUMN version INTEGER NOT NULL DEFAULT 0',
+        # Bumped on every change to a patron's loans. The insert trigger
+        # upserts so it works whether it fires before or after
+        # patron_stats_on_insert creates the row.
+        '''
+        CREATE TRIGGER IF NOT EXISTS patron_stats_version_on_insert
+        AFTER INSERT ON borrow_records
+        BEGIN
+            INSERT INTO patron_stats (patron_id, version) VALUES (new.patron_id, 1)
+            ON CONFLICT (patron_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS patron_stats_version_on_update
+        AFTER UPDATE ON borrow_records
+        BEGIN
+            UPDATE patron_stats SET version = version + 1
+            WHERE patron_id IN (old.patron_id, new.patron_id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS patron_stats_version_on_delete
+        AFTER DELETE ON borrow_records
+        BEGIN
+            UPDATE patron_stats SET version = version + 1 WHERE patron_id = old.patron_id;
+        END
+        ''',
+    ]),
+    (7, 'Catalog revision counter for in-memory indexes', [
+        # One row, bumped by every write to books from any connection, so a
+        # process can tell when the catalog changed behind its listeners
+        'CREATE TABLE IF NOT EXISTS catalog_revision (revision INTEGER NOT NULL)',
+        'INSERT INTO catalog_revision (revision) VALUES (0)',
+        '''
+        CREATE TRIGGER IF NOT EXISTS catalog_revision_on_insert
+        AFTER INSERT ON books
+        BEGIN
+            UPDATE catalog_revision SET revision = revision + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS catalog_revision_on_update
+        AFTER UPDATE ON books
+        BEGIN
+            UPDATE catalog_revision SET revision = revision + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS catalog_revision_on_delete
+        AFTER DELETE ON books
+        BEGIN
+            UPDATE catalog_revision SET revision = revision + 1;
+        END
+        ''',
+    ]),
+    (8, 'Only metadata updates move the catalog revision', [
+        # available_copies changes with every borrow and return; the indexes
+        # read it fresh instead of rebuilding for it
+        'DROP TRIGGER IF EXISTS catalog_revision_on_update',
+        '''
+        CREATE TRIGGER IF NOT EXISTS catalog_revision_on_update
+        AFTER UPDATE OF title, author, isbn ON books
+        BEGIN
+            UPDATE catalog_revision SET revision = revision + 1;
+        END
+        ''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    """Get the schema version recorded in the database file."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, target: int = LATEST_VERSION) -> List[int]:
+    """
+    Bring the database schema up to the target version.
+
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failure leaves the database at the last
+    fully applied version. The version is read again once the write lock
+    is held, so a process that started alongside another skips the
+    migrations the other one has already committed.
+
+    Returns:
+        list: versions that were applied
+    """
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            current = get_schema_version(conn)
+            if version <= current:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
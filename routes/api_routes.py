@@ -2,8 +2,22 @@
 API Routes - JSON API endpoints
 """
 
-from flask import Blueprint, jsonify, request
-from services.library_service import calculate_late_fee_for_book, search_books_in_catalog
+import itertools
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.overdue_ledger import get_patron_overdue
+from services.patron_export import EXPORT_FORMATS, iter_patron_status_reports
+from services.report_cache import patron_report_cache
+from services.library_service import (
+    calculate_late_fee_for_book, calculate_late_fees_bulk, get_catalog_page, get_search_stats,
+    get_patron_status_report, get_patron_status_etag,
+    iter_search_results, search_books_page, search_books_ranked, search_books_batch,
+    encode_search_cursor, suggest_books,
+    CATALOG_PAGE_SIZE, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE, SEARCH_STREAM_MAX_SIZE, SEARCH_TOP_K,
+    SUGGEST_LIMIT, SEARCH_BATCH_MAX_QUERIES, LATE_FEE_BATCH_MAX_LOANS
+)
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -16,24 +30,234 @@ def get_late_fee(patron_id, book_id):
     result = calculate_late_fee_for_book(patron_id, book_id)
     return jsonify(result), 501 if 'not implemented' in result.get('status', '') else 200
 
+@api_bp.route('/late_fee/<patron_id>')
+def get_patron_late_fees(patron_id):
+    """
+    Calculate late fees for every book a patron has borrowed.
+    Bulk variant of the R4 late fee endpoint
+    """
+    if not patron_id.isdigit() or len(patron_id) != 6:
+        return jsonify({'error': 'Invalid patron ID. Must be exactly 6 digits.'}), 400
+    results = calculate_late_fees_bulk(patron_id=patron_id)
+    return jsonify({'patron_id': patron_id, 'results': results, 'count': len(results)})
+
+@api_bp.route('/late_fee/batch', methods=['POST'])
+def get_late_fees_batch():
+    """
+    Calculate late fees for many patron/book pairs in one request.
+    Body: {"loans": [{"patron_id": ..., "book_id": ...}, ...]}
+    """
+    body = request.get_json(silent=True) or {}
+    loans = body.get('loans')
+    if not isinstance(loans, list) or not all(isinstance(l, dict) for l in loans):
+        return jsonify({'error': 'Expected a JSON body with a "loans" list'}), 400
+    if len(loans) > LATE_FEE_BATCH_MAX_LOANS:
+        return jsonify({'error': f'At most {LATE_FEE_BATCH_MAX_LOANS} loans per batch'}), 400
+    pairs = [(l.get('patron_id'), l.get('book_id')) for l in loans]
+    if not all(isinstance(p, str) and isinstance(b, int) and not isinstance(b, bool) for p, b in pairs):
+        return jsonify({'error': '"patron_id" must be a string and "book_id" an integer'}), 400
+    
+    results = calculate_late_fees_bulk(pairs)
+    return jsonify({'results': results, 'count': len(results)})
+
+@api_bp.route('/overdue/<patron_id>')
+def get_patron_overdue_api(patron_id):
+    """
+    List a patron's overdue loans and fees from the overdue ledger.
+    """
+    if not patron_id.isdigit() or len(patron_id) != 6:
+        return jsonify({'error': 'Invalid patron ID. Must be exactly 6 digits.'}), 400
+    loans = get_patron_overdue(patron_id)
+    return jsonify({
+        'patron_id': patron_id,
+        'overdue': loans,
+        'count': len(loans),
+        'total_fee': round(sum(l['fee_amount'] for l in loans), 2),
+    })
+
+@api_bp.route('/patron/<patron_id>/status')
+def get_patron_status_api(patron_id):
+    """
+    Patron status report (R7), for kiosks that poll it.
+    
+    The ETag changes with the patron's circulation and with the date; a
+    matching If-None-Match gets 304 without building the report, and
+    reports still current are served from a server-side cache.
+    """
+    if not patron_id.isdigit() or len(patron_id) != 6:
+        return jsonify({'error': 'Invalid patron ID. Must be exactly 6 digits.'}), 400
+    today = datetime.now().date()
+    etag = get_patron_status_etag(patron_id, today)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = patron_report_cache.get(patron_id, etag)
+        if body is None:
+            body = json.dumps(get_patron_status_report(patron_id, today)).encode()
+            patron_report_cache.put(patron_id, etag, body)
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Clients may keep the report but must revalidate before each use
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api_bp.route('/patrons/status')
+def export_patron_status_api():
+    """
+    Stream the status report of every patron (format=ndjson, the default,
+    or format=csv for the summary columns only).
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format. Use one of: {', '.join(sorted(EXPORT_FORMATS))}"}), 400
+    serialize, mimetype = EXPORT_FORMATS[fmt]
+    # The report generator reads from the request's connection as it streams
+    body = stream_with_context(serialize(iter_patron_status_reports()))
+    return Response(body, mimetype=mimetype)
+
+@api_bp.route('/books')
+def list_books_api():
+    """
+    List catalog books one page at a time.
+    API interface for R2: Book Catalog Display (keyset pagination)
+    """
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', CATALOG_PAGE_SIZE, type=int)
+    
+    try:
+        page = get_catalog_page(cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'results': page['books'],
+        'count': len(page['books']),
+        'limit': page['page_size'],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+    })
+
 @api_bp.route('/search')
 def search_books_api():
     """
     Search for books via API endpoint.
     Alternative API interface for R5: Book Search Functionality
+    
+    Results come one page at a time (limit, cursor -> next_cursor). With
+    format=ndjson they are streamed one JSON object per line instead,
+    followed by a final {"count", "next_cursor"} line. sort=relevance
+    returns only the top k ranked matches (boost=available favours books
+    with a copy on the shelf).
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    cursor = request.args.get('cursor') or None
     
     if not search_term:
         return jsonify({'error': 'Search term is required'}), 400
     
-    # Use business logic function
-    books = search_books_in_catalog(search_term, search_type)
+    if request.args.get('sort') == 'relevance':
+        k = request.args.get('k', SEARCH_TOP_K, type=int)
+        books = search_books_ranked(search_term, search_type, k,
+                                    boost_available=request.args.get('boost') == 'available')
+        return jsonify({
+            'search_term': search_term,
+            'search_type': search_type,
+            'sort': 'relevance',
+            'results': books,
+            'count': len(books),
+        })
+    
+    if request.args.get('format') == 'ndjson':
+        limit = request.args.get('limit', SEARCH_STREAM_MAX_SIZE, type=int)
+        limit = max(1, min(limit, SEARCH_STREAM_MAX_SIZE))
+        try:
+            results = iter_search_results(search_term, search_type, cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return Response(_stream_ndjson(results, limit), mimetype='application/x-ndjson')
+    
+    limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+    try:
+        page = search_books_page(search_term, search_type, cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
         'search_term': search_term,
         'search_type': search_type,
-        'results': books,
-        'count': len(books)
+        'results': page['books'],
+        'count': len(page['books']),
+        'limit': page['limit'],
+        'next_cursor': page['next_cursor'],
+    })
+
+def _stream_ndjson(results, limit):
+    """Serialize up to limit results one line at a time, then the paging trailer."""
+    count = 0
+    last = None
+    for book in itertools.islice(results, limit):
+        yield json.dumps(book) + '\n'
+        count += 1
+        last = book
+    has_more = next(results, None) is not None
+    next_cursor = encode_search_cursor(last) if last is not None and has_more else None
+    yield json.dumps({'count': count, 'next_cursor': next_cursor}) + '\n'
+
+@api_bp.route('/search/batch', methods=['POST'])
+def search_batch_api():
+    """
+    Run many searches in one request.
+    Body: {"queries": [{"q": ..., "type": ...}, ...], "limit": n}
+    
+    Each query gets its own {search_term, search_type, results, count,
+    has_more} entry, in request order; results are capped at limit.
+    """
+    body = request.get_json(silent=True) or {}
+    queries = body.get('queries')
+    if not isinstance(queries, list) or not all(isinstance(q, dict) for q in queries):
+        return jsonify({'error': 'Expected a JSON body with a "queries" list'}), 400
+    if len(queries) > SEARCH_BATCH_MAX_QUERIES:
+        return jsonify({'error': f'At most {SEARCH_BATCH_MAX_QUERIES} queries per batch'}), 400
+    if not all(isinstance(q.get('q', ''), str) and isinstance(q.get('type', 'title'), str) for q in queries):
+        return jsonify({'error': 'Query "q" and "type" must be strings'}), 400
+    
+    limit = body.get('limit', SEARCH_PAGE_SIZE)
+    if not isinstance(limit, int):
+        return jsonify({'error': '"limit" must be an integer'}), 400
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    
+    pairs = [(q.get('q', '').strip(), q.get('type', 'title')) for q in queries]
+    answers = search_books_batch(pairs)
+    return jsonify({
+        'results': [
+            {
+                'search_term': term,
+                'search_type': search_type,
+                'results': books[:limit],
+                'count': len(books[:limit]),
+                'has_more': len(books) > limit,
+            }
+            for (term, search_type), books in zip(pairs, answers)
+        ],
+        'count': len(pairs),
     })
+
+@api_bp.route('/suggest')
+def suggest_api():
+    """
+    Suggest titles/authors starting with what has been typed so far.
+    Typeahead for the R5 search form (type=title|author, default both)
+    """
+    prefix = request.args.get('q', '')
+    limit = request.args.get('limit', SUGGEST_LIMIT, type=int)
+    suggestions = suggest_books(prefix, request.args.get('type'), limit)
+    return jsonify({'query': prefix, 'suggestions': suggestions})
+
+@api_bp.route('/search/stats')
+def search_stats_api():
+    """
+    Report search cache and index counters.
+    Used to tune SEARCH_CACHE_SIZE / SEARCH_CACHE_TTL
+    """
+    return jsonify(get_search_stats())
@@ -3,8 +3,9 @@ Catalog Routes - Book catalog related endpoints
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from database import get_all_books
-from services.library_service import add_book_to_catalog
+from services.library_service import add_book_to_catalog, get_catalog_page, CATALOG_PAGE_SIZE
+
+PAGE_SIZE_CHOICES = (10, 25, 50, 100)
 
 catalog_bp = Blueprint('catalog', __name__)
 
@@ -16,11 +17,22 @@ def index():
 @catalog_bp.route('/catalog')
 def catalog():
     """
-    Display all books in the catalog.
+    Display the book catalog, one page at a time.
     Implements R2: Book Catalog Display
     """
-    books = get_all_books()
-    return render_template('catalog.html', books=books)
+    cursor = request.args.get('cursor') or None
+    page_size = request.args.get('page_size', CATALOG_PAGE_SIZE, type=int)
+    if page_size not in PAGE_SIZE_CHOICES:
+        page_size = CATALOG_PAGE_SIZE
+    
+    try:
+        page = get_catalog_page(cursor, page_size)
+    except ValueError:
+        flash('Invalid catalog page. Showing the first page.', 'error')
+        page = get_catalog_page(None, page_size)
+    
+    return render_template('catalog.html', books=page['books'], page=page,
+                           page_size_choices=PAGE_SIZE_CHOICES)
 
 @catalog_bp.route('/add_book', methods=['GET', 'POST'])
 def add_book():
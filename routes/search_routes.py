@@ -3,7 +3,7 @@ Search Routes - Book search functionality
 """
 
 from flask import Blueprint, render_template, request, flash
-from services.library_service import search_books_in_catalog
+from services.library_service import search_books_in_catalog, search_books_ranked, SEARCH_TOP_K
 
 search_bp = Blueprint('search', __name__)
 
@@ -15,14 +15,20 @@ def search_books():
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    sort = 'relevance' if request.args.get('sort') == 'relevance' else 'title'
     
     if not search_term:
-        return render_template('search.html', books=[], search_term='', search_type=search_type)
+        return render_template('search.html', books=[], search_term='', search_type=search_type, sort=sort)
     
     # Use business logic function
-    books = search_books_in_catalog(search_term, search_type)
+    if sort == 'relevance':
+        k = request.args.get('k', SEARCH_TOP_K, type=int)
+        books = search_books_ranked(search_term, search_type, k,
+                                    boost_available=request.args.get('boost') == 'available')
+    else:
+        books = search_books_in_catalog(search_term, search_type)
     
     if not books:
         flash('Search functionality is not yet implemented.', 'error')
     
-    return render_template('search.html', books=books, search_term=search_term, search_type=search_type)
+    return render_template('search.html', books=books, search_term=search_term, search_type=search_type, sort=sort)
@@ -0,0 +1,143 @@
+"""
+Catalog Import Module - Bulk loading of books from CSV or JSONL files
+Streams the input file and inserts validated rows in batched transactions
+"""
+
+import csv
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database import insert_books_bulk
+from .library_service import validate_book_fields
+
+BATCH_SIZE = 500
+DUPLICATE_MESSAGE = "A book with this ISBN already exists."
+DATABASE_ERROR_MESSAGE = "Database error occurred while adding the book."
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def detect_format(path: str) -> Optional[str]:
+    """Guess the import format from the file extension."""
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def iter_book_rows(path: str, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Stream rows from a CSV (with header) or JSONL file.
+
+    Yields:
+        tuple: (line_number, row dict or None, parse error message or None)
+    """
+    if fmt == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row, None
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield line_number, None, "Malformed JSON."
+                    continue
+                if not isinstance(row, dict):
+                    yield line_number, None, "Each line must be a JSON object."
+                    continue
+                yield line_number, row, None
+
+
+def _parse_book(row: Dict) -> Tuple[Optional[Tuple[str, str, str, int]], Optional[str]]:
+    """Validate one input row with the R1 rules; returns ((title, author, isbn, copies), error)."""
+    title = row.get('title')
+    author = row.get('author')
+    isbn = row.get('isbn')
+    if isinstance(isbn, str):
+        isbn = isbn.strip()
+    total_copies = row.get('total_copies')
+    if isinstance(total_copies, str):
+        # CSV cells (and JSON strings) are parsed like the add-book form's field
+        try:
+            total_copies = int(total_copies)
+        except ValueError:
+            return None, "Total copies must be a positive integer."
+
+    error = validate_book_fields(title, author, isbn, total_copies)
+    if error:
+        return None, error
+    return (title.strip(), author.strip(), isbn, total_copies), None
+
+
+def import_books_from_file(path: str, fmt: Optional[str] = None, batch_size: int = BATCH_SIZE) -> Dict:
+    """
+    Bulk import books into the catalog.
+
+    Rows are validated like add_book_to_catalog and inserted batch_size at a
+    time, each batch in a single transaction. Duplicate ISBNs (already in
+    the catalog or repeated in the file) are reported, not inserted.
+
+    Args:
+        path: CSV file with title,author,isbn,total_copies columns, or JSONL
+        fmt: 'csv' or 'jsonl' (detected from the extension if omitted)
+        batch_size: rows per transaction
+
+    Returns:
+        dict: counts plus an "errors" list of {line, isbn, message}
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in ('csv', 'jsonl'):
+        return {"status": "error", "message": "Unsupported import format. Use CSV or JSONL."}
+    if batch_size <= 0:
+        return {"status": "error", "message": "Batch size must be a positive integer."}
+
+    report = {"status": "ok", "processed": 0, "inserted": 0, "duplicates": 0,
+              "invalid": 0, "failed": 0, "errors": []}
+    batch: List[Tuple[int, Tuple[str, str, str, int]]] = []
+    batch_isbns = set()
+
+    def error(line: int, isbn: Optional[str], message: str, kind: str):
+        report[kind] += 1
+        report["errors"].append({"line": line, "isbn": isbn, "message": message})
+
+    def flush():
+        inserted = insert_books_bulk([(t, a, i, c, c) for _, (t, a, i, c) in batch])
+        for line, (_, _, isbn, _) in batch:
+            if inserted is None:
+                error(line, isbn, DATABASE_ERROR_MESSAGE, "failed")
+            elif isbn in inserted:
+                report["inserted"] += 1
+            else:
+                error(line, isbn, DUPLICATE_MESSAGE, "duplicates")
+        batch.clear()
+        batch_isbns.clear()
+
+    try:
+        for line, row, parse_error in iter_book_rows(path, fmt):
+            report["processed"] += 1
+            if parse_error:
+                error(line, None, parse_error, "invalid")
+                continue
+            book, message = _parse_book(row)
+            if message:
+                error(line, row.get('isbn'), message, "invalid")
+                continue
+            if book[2] in batch_isbns:
+                error(line, book[2], DUPLICATE_MESSAGE, "duplicates")
+                continue
+            batch.append((line, book))
+            batch_isbns.add(book[2])
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        if batch:
+            flush()
+        report["status"] = "error"
+        report["message"] = f"Could not read import file: {e}"
+
+    return report
@@ -0,0 +1,217 @@
+"""
+Due Scheduler Module - Overdue notices driven by a min-heap of due dates
+Active loans are loaded once, then kept current through database loan
+notifications; a worker sleeps until the earliest loan becomes overdue
+and hands an event to each configured sink (log, mail spool)
+"""
+
+import heapq
+import logging
+import os
+import threading
+from datetime import datetime, time, timedelta
+from email.message import EmailMessage
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database import add_loan_listener, get_db_connection, remove_loan_listener
+
+logger = logging.getLogger(__name__)
+
+# Longest the worker sleeps before re-checking the clock
+MAX_WAIT = 3600.0
+
+
+def overdue_at(due_date: str) -> datetime:
+    """When a loan becomes overdue: the start of the day after its due date, as late fees count it."""
+    due = datetime.fromisoformat(due_date).date()
+    return datetime.combine(due + timedelta(days=1), time.min)
+
+
+class LogSink:
+    """Write each overdue notice to the application log."""
+
+    def __init__(self, log: logging.Logger = logger):
+        self.log = log
+
+    def __call__(self, event: Dict):
+        self.log.warning("Loan %s overdue: patron %s, book %s, due %s",
+                         event["record_id"], event["patron_id"], event["book_id"], event["due_date"][:10])
+
+
+class MailSpoolSink:
+    """Drop each overdue notice into a local mail spool directory as an .eml file."""
+
+    def __init__(self, directory: str, sender: str = "library@localhost"):
+        self.directory = directory
+        self.sender = sender
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, event: Dict):
+        msg = EmailMessage()
+        msg["From"] = self.sender
+        msg["To"] = f"patron-{event['patron_id']}@localhost"
+        msg["Subject"] = "Library book overdue"
+        msg["X-Patron-ID"] = event["patron_id"]
+        msg.set_content(
+            f"Book {event['book_id']} was due on {event['due_date'][:10]}. "
+            "Please return it; late fees now apply.\n"
+        )
+        name = f"{event['overdue_at'][:10]}-{event['record_id']}.eml"
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(bytes(msg))
+
+
+class DueDateScheduler:
+    """
+    Emit an overdue event for each loan the moment it becomes overdue.
+
+    Pending loans sit in a min-heap keyed on overdue_at(); returns cancel
+    lazily (the heap entry is skipped when it surfaces), so a borrow, a
+    return and each notice cost O(log n) and a wake-up does work only for
+    loans that are actually due.
+    """
+
+    def __init__(self, sinks: Optional[List[Callable[[Dict], None]]] = None,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.sinks = list(sinks or [])
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[datetime, int]] = []
+        self._loans: Dict[int, Dict] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.emitted = 0
+
+    def seed(self, since: Optional[datetime] = None) -> int:
+        """
+        Load the active loans that become overdue after since (default: now).
+
+        Returns:
+            int: number of loans scheduled
+        """
+        since = since or self._clock()
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(
+                "SELECT id, patron_id, book_id, due_date FROM borrow_records WHERE return_date IS NULL"
+            ).fetchall()
+        finally:
+            conn.close()
+        scheduled = 0
+        for r in rows:
+            loan = {"record_id": r["id"], "patron_id": r["patron_id"],
+                    "book_id": r["book_id"], "due_date": r["due_date"]}
+            try:
+                if overdue_at(loan["due_date"]) > since and self.schedule(loan):
+                    scheduled += 1
+            except (TypeError, ValueError):
+                continue
+        return scheduled
+
+    def schedule(self, loan: Dict) -> bool:
+        """Track a loan until it becomes overdue; returns False if it already is tracked."""
+        when = overdue_at(loan["due_date"])
+        with self._cond:
+            if loan["record_id"] in self._loans:
+                return False
+            self._loans[loan["record_id"]] = dict(loan, overdue_at=when.isoformat())
+            heapq.heappush(self._heap, (when, loan["record_id"]))
+            if self._heap[0][1] == loan["record_id"]:
+                # New earliest deadline: the worker must wake sooner
+                self._cond.notify()
+        return True
+
+    def cancel(self, record_id: int):
+        """Stop tracking a loan (it was returned)."""
+        with self._cond:
+            self._loans.pop(record_id, None)
+
+    def on_loan_change(self, event: str, loan: Dict):
+        """Loan listener: schedule new loans, cancel returned ones."""
+        if event == "borrow":
+            self.schedule(loan)
+        elif event == "return":
+            self.cancel(loan["record_id"])
+
+    def _pop_due(self, now: datetime) -> List[Dict]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, record_id = heapq.heappop(self._heap)
+            loan = self._loans.pop(record_id, None)
+            if loan is not None:
+                due.append(loan)
+        return due
+
+    def next_due(self) -> Optional[datetime]:
+        """When the next pending loan becomes overdue (None if nothing is pending)."""
+        with self._cond:
+            while self._heap and self._heap[0][1] not in self._loans:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now: Optional[datetime] = None) -> List[Dict]:
+        """Emit events for every loan overdue by now; returns them."""
+        with self._cond:
+            events = self._pop_due(now or self._clock())
+        for event in events:
+            for sink in self.sinks:
+                try:
+                    sink(event)
+                except Exception:
+                    logger.exception("Overdue sink %r failed for loan %s", sink, event["record_id"])
+            self.emitted += 1
+        return events
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                upcoming = self._heap[0][0] if self._heap else None
+                wait = MAX_WAIT if upcoming is None else (upcoming - self._clock()).total_seconds()
+                if wait > 0:
+                    self._cond.wait(min(wait, MAX_WAIT))
+                    continue
+            self.run_due()
+
+    def start(self, since: Optional[datetime] = None):
+        """Subscribe to loan changes, seed from the database and start the worker thread."""
+        if self._thread is not None:
+            return
+        add_loan_listener(self.on_loan_change)
+        self.seed(since)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="due-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the worker thread and unsubscribe."""
+        remove_loan_listener(self.on_loan_change)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {"pending": len(self._loans), "heap": len(self._heap), "emitted": self.emitted}
+
+
+def init_overdue_notices(app) -> Optional[DueDateScheduler]:
+    """
+    Start overdue notices if OVERDUE_NOTICES is set in the app config.
+
+    Events always go to the log; OVERDUE_MAIL_SPOOL names a directory to
+    also spool notice emails into.
+    """
+    if not app.config.get("OVERDUE_NOTICES"):
+        return None
+    sinks: List[Callable[[Dict], None]] = [LogSink()]
+    if app.config.get("OVERDUE_MAIL_SPOOL"):
+        sinks.append(MailSpoolSink(app.config["OVERDUE_MAIL_SPOOL"]))
+    scheduler = DueDateScheduler(sinks)
+    scheduler.start()
+    app.extensions["due_scheduler"] = scheduler
+    return scheduler
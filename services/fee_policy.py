@@ -0,0 +1,124 @@
+"""
+Fee Policy Module - The late fee rule, in one place
+A FeePolicy turns days overdue into a fee through a table precomputed up
+to the day the fee stops growing; everything that charges, reports or
+refunds late fees asks the active policy, and reads due dates through
+due_day() and days_overdue()
+"""
+
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional: only fee_array() needs it
+    np = None
+
+# Beyond this many days the table stops and fees are computed directly
+MAX_TABLE_DAYS = 3650
+
+
+class FeePolicy:
+    """
+    Tiered, capped late fee rule (R5 by default).
+
+    After grace_days without charge, each overdue day costs first_rate for
+    the first tier_days and later_rate after that, and a loan's fee never
+    exceeds cap. Fees are rounded to cents.
+    """
+
+    def __init__(self, first_rate: float = 0.50, later_rate: float = 1.00, tier_days: int = 7,
+                 cap: float = 15.00, grace_days: int = 0):
+        if min(first_rate, later_rate, cap) < 0 or min(tier_days, grace_days) < 0:
+            raise ValueError("Fee policy rates, days and cap must not be negative.")
+        self.first_rate = float(first_rate)
+        self.later_rate = float(later_rate)
+        self.tier_days = int(tier_days)
+        self.cap = float(cap)
+        self.grace_days = int(grace_days)
+        self._table = self._build_table()
+        # True when the last table entry holds for every later day
+        last = len(self._table) - 1
+        self._saturated = self._table[-1] == self.cap or (
+            self.later_rate == 0 and last >= self.grace_days + self.tier_days)
+        self._table_arr = np.array(self._table) if np is not None else None
+
+    def _compute(self, days_overdue: int) -> float:
+        days = days_overdue - self.grace_days
+        if days <= 0:
+            return 0.0
+        first = min(days, self.tier_days)
+        rest = max(0, days - self.tier_days)
+        return round(min(first * self.first_rate + rest * self.later_rate, self.cap), 2)
+
+    def _build_table(self) -> List[float]:
+        table = [0.0]
+        for days in range(1, MAX_TABLE_DAYS + 1):
+            table.append(self._compute(days))
+            if table[-1] == self.cap:
+                break
+            if self.later_rate == 0 and days >= self.grace_days + self.tier_days:
+                break
+        return table
+
+    @property
+    def max_fee(self) -> float:
+        """The most a single loan can be charged."""
+        if self._saturated:
+            return self._table[-1]
+        return self.cap
+
+    def fee(self, days_overdue: int) -> float:
+        """Fee for one loan that is days_overdue days late (0 or less means on time)."""
+        if days_overdue <= 0:
+            return 0.0
+        if days_overdue < len(self._table):
+            return self._table[days_overdue]
+        return self._table[-1] if self._saturated else self._compute(days_overdue)
+
+    def fees(self, days_overdue: Iterable[int]) -> List[float]:
+        """fee() for each of many loans."""
+        return [self.fee(days) for days in days_overdue]
+
+    def fee_array(self, days_overdue):
+        """fee() over a NumPy integer array (requires NumPy)."""
+        if np is None:
+            raise RuntimeError("NumPy is required for array fee lookups.")
+        days = np.asarray(days_overdue, dtype=np.int64)
+        last = len(self._table) - 1
+        fees = self._table_arr[np.clip(days, 0, last)]
+        if not self._saturated and (days > last).any():
+            beyond = days > last
+            fees[beyond] = [self._compute(int(d)) for d in days[beyond]]
+        return fees
+
+    def __repr__(self):
+        return (f"FeePolicy(first_rate={self.first_rate}, later_rate={self.later_rate}, "
+                f"tier_days={self.tier_days}, cap={self.cap}, grace_days={self.grace_days})")
+
+
+def due_day(value) -> Optional[date]:
+    """The day a stored due_date (ISO date or timestamp) falls on, or None if it does not parse."""
+    try:
+        return datetime.fromisoformat(value).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def days_overdue(due: date, on: date) -> int:
+    """Whole days a loan due on due is late on day on (0 if not late)."""
+    return max(0, (on - due).days)
+
+
+_policy = FeePolicy()
+
+
+def get_fee_policy() -> FeePolicy:
+    """Get the fee policy in force."""
+    return _policy
+
+
+def set_fee_policy(policy: Optional[FeePolicy] = None):
+    """Replace the fee policy in force (None restores the R5 default)."""
+    global _policy
+    _policy = policy or FeePolicy()
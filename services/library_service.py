@@ -3,15 +3,90 @@ Library Service Module - Business Logic Functions
 Contains all the core business logic for the Library Management System
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from .payment_service import PaymentGateway
+import asyncio
+import base64
+import binascii
+import bisect
+import hashlib
+import heapq
+import itertools
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .payment_service import AsyncPaymentGateway, PaymentGateway
+from .fee_policy import days_overdue, due_day, get_fee_policy
+from .search_cache import search_cache
+from .search_index import catalog_index, prefix_index, SUGGEST_LIMIT
+import database
+from migrations import table_exists
 from database import (
-    get_book_by_id, get_book_by_isbn, get_patron_borrow_count,
-    insert_book, insert_borrow_record, update_book_availability,
-    update_borrow_record_return_date, get_all_books, get_db_connection
+    get_book_by_isbn, get_book_metadata, get_book_titles, get_patron_borrow_count,
+    insert_book, borrow_book_atomic, return_book_atomic,
+    get_all_books, get_books_page, get_db_connection, search_books_fts,
+    get_catalog_version, get_catalog_revision
     )
 
+CATALOG_PAGE_SIZE = 25
+CATALOG_MAX_PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 25
+SEARCH_MAX_PAGE_SIZE = 100
+SEARCH_STREAM_MAX_SIZE = 1000
+SEARCH_TOP_K = 10
+SEARCH_MAX_TOP_K = 100
+SUGGEST_MAX_LIMIT = 20
+SEARCH_BATCH_MAX_QUERIES = 100
+LATE_FEE_BATCH_MAX_LOANS = 500
+PAYMENT_CONCURRENCY = 5
+
+# "scan" walks get_all_books(); "index" answers title/author queries from
+# the in-memory trigram index (same results, no per-query scan); "fts" asks
+# the SQLite trigram index for candidates and falls back to the scan when
+# it can't answer. FTS folds case per character, so a title like "Straße"
+# is not found by "ss" the way casefold() finds it.
+SEARCH_BACKENDS = ("scan", "index", "fts")
+SEARCH_BACKEND = "scan"
+
+def set_search_backend(backend: str):
+    """Select the search backend used by search_books_in_catalog."""
+    global SEARCH_BACKEND
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend!r}")
+    SEARCH_BACKEND = backend
+
+def validate_book_fields(title: str, author: str, isbn: str, total_copies: int) -> Optional[str]:
+    """
+    Apply the R1 field rules to a new book.
+    
+    Returns:
+        str: the first validation error message, or None if the book is valid
+    """
+    if title is not None and not isinstance(title, str):
+        return "Title must be text."
+    
+    if not title or not title.strip():
+        return "Title is required."
+    
+    if len(title.strip()) > 200:
+        return "Title must be less than 200 characters."
+    
+    if author is not None and not isinstance(author, str):
+        return "Author must be text."
+    
+    if not author or not author.strip():
+        return "Author is required."
+    
+    if len(author.strip()) > 100:
+        return "Author must be less than 100 characters."
+    
+    if not isinstance(isbn, str) or len(isbn) != 13:
+        return "ISBN must be exactly 13 digits."
+    
+    # bool is an int subclass: True must not count as one copy
+    if not isinstance(total_copies, int) or isinstance(total_copies, bool) or total_copies <= 0:
+        return "Total copies must be a positive integer."
+    
+    return None
+
 def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
     """
     Add a new book to the catalog.
@@ -27,23 +102,9 @@ def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -
         tuple: (success: bool, message: str)
     """
     # Input validation
-    if not title or not title.strip():
-        return False, "Title is required."
-    
-    if len(title.strip()) > 200:
-        return False, "Title must be less than 200 characters."
-    
-    if not author or not author.strip():
-        return False, "Author is required."
-    
-    if len(author.strip()) > 100:
-        return False, "Author must be less than 100 characters."
-    
-    if len(isbn) != 13:
-        return False, "ISBN must be exactly 13 digits."
-    
-    if not isinstance(total_copies, int) or total_copies <= 0:
-        return False, "Total copies must be a positive integer."
+    error = validate_book_fields(title, author, isbn, total_copies)
+    if error:
+        return False, error
     
     # Check for duplicate ISBN
     existing = get_book_by_isbn(isbn)
@@ -57,6 +118,74 @@ def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -
     else:
         return False, "Database error occurred while adding the book."
 
+def _encode_cursor(payload: List) -> str:
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(token: str) -> List:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(payload, list):
+        raise ValueError("Invalid cursor.")
+    return payload
+
+def encode_catalog_cursor(direction: str, book: Dict) -> str:
+    """Encode a paging direction ('after'/'before') and a book's (title, id) key as an opaque token."""
+    return _encode_cursor([direction, book["title"], book["id"]])
+
+def decode_catalog_cursor(token: str) -> Tuple[str, Tuple[str, int]]:
+    """
+    Decode a cursor token produced by encode_catalog_cursor.
+    
+    Raises:
+        ValueError: if the token is malformed
+    """
+    payload = _decode_cursor(token)
+    if len(payload) != 3:
+        raise ValueError("Invalid cursor.")
+    direction, title, book_id = payload
+    if direction not in ("after", "before") or not isinstance(title, str) or not isinstance(book_id, int):
+        raise ValueError("Invalid cursor.")
+    return direction, (title, book_id)
+
+def get_catalog_page(cursor: Optional[str] = None, page_size: int = CATALOG_PAGE_SIZE) -> Dict:
+    """
+    Get one page of the catalog, ordered by title.
+    Implements R2 (Book Catalog Display) with keyset pagination
+    
+    Args:
+        cursor: token from a previous page's next_cursor/prev_cursor (None for the first page)
+        page_size: books per page, clamped to 1..CATALOG_MAX_PAGE_SIZE
+        
+    Returns:
+        dict: books, page_size, next_cursor, prev_cursor
+        
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    page_size = max(1, min(int(page_size), CATALOG_MAX_PAGE_SIZE))
+    direction, key = decode_catalog_cursor(cursor) if cursor else (None, None)
+    
+    if direction == "before":
+        books, has_more = get_books_page(page_size, before=key)
+        has_prev, has_next = has_more, True
+        if not has_more:
+            # Paged back to the start: serve a full first page instead of a short one
+            direction, key = None, None
+    if direction != "before":
+        books, has_more = get_books_page(page_size, after=key)
+        has_prev, has_next = key is not None, has_more
+    
+    return {
+        "books": books,
+        "page_size": page_size,
+        "next_cursor": encode_catalog_cursor("after", books[-1]) if books and has_next else None,
+        "prev_cursor": encode_catalog_cursor("before", books[0]) if books and has_prev else None,
+    }
+
 def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     """
     Allow a patron to borrow a book.
@@ -73,14 +202,11 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
         return False, "Invalid patron ID. Must be exactly 6 digits."
     
-    # Check if book exists and is available
-    book = get_book_by_id(book_id)
+    # Check if book exists; availability is claimed atomically below
+    book = get_book_metadata(book_id)
     if not book:
         return False, "Book not found."
     
-    if book['available_copies'] <= 0:
-        return False, "This book is currently not available."
-    
     # Check patron's current borrowed books count
     current_borrowed = get_patron_borrow_count(patron_id)
     
@@ -91,15 +217,13 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     borrow_date = datetime.now()
     due_date = borrow_date + timedelta(days=14)
     
-    # Insert borrow record and update availability
-    borrow_success = insert_borrow_record(patron_id, book_id, borrow_date, due_date)
+    # Claim a copy and insert the borrow record in one transaction
+    borrow_success, reason = borrow_book_atomic(patron_id, book_id, borrow_date, due_date)
     if not borrow_success:
+        if reason == 'unavailable':
+            return False, "This book is currently not available."
         return False, "Database error occurred while creating borrow record."
     
-    availability_success = update_book_availability(book_id, -1)
-    if not availability_success:
-        return False, "Database error occurred while updating book availability."
-    
     return True, f'Successfully borrowed "{book["title"]}". Due date: {due_date.strftime("%Y-%m-%d")}.'
 
 def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
@@ -108,39 +232,26 @@ def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     Implements R4 (Return Book):
       - Validate patron_id
       - Validate book_id exists
-      - Close the active borrow record for (patron_id, book_id)
-      - Increment the book's available_copies
+      - Close the active borrow record for (patron_id, book_id) and
+        increment the book's available_copies atomically
       - Return a clear (success, message) tuple
     """
 
     if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
         return False, "Invalid patron ID. Must be exactly 6 digits."
     
-    book = get_book_by_id(book_id)
+    book = get_book_metadata(book_id)
     if not book:
         return False, "Book not found."
     
-    # Mark as returned
+    # Close the loan and release the copy in one transaction
     return_date = datetime.now()
-
-    try:
-        result = update_borrow_record_return_date(patron_id, book_id, return_date)
-    except TypeError:
-        result = update_borrow_record_return_date(patron_id, book_id)
-    
-    if isinstance(result, tuple):
-        ok = bool(result[0])
-        detail = result[1] if len(result) > 1 else ""
-    else:
-        ok = bool(result)
-        detail = ""
+    ok, reason = return_book_atomic(patron_id, book_id, return_date)
     
     if not ok:
-        return False, detail or "No active loan found for this patron and book."
-    
-    availability_ok = update_book_availability(book_id, +1)
-    if not availability_ok:
-        return False, "Return recorded, but failed to update availability. Please contact support."
+        if reason == 'no_active_loan':
+            return False, "No active loan found for this patron and book."
+        return False, "Database error occurred while recording the return."
 
     return True, f'Returned "{book["title"]}" successfully.'
 
@@ -151,58 +262,210 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
                 "fee_amount": 0.0, "days_overdue": 0}
 
     conn = get_db_connection()
-    active = conn.execute(
-        """
-        SELECT patron_id, book_id, borrow_date, due_date, return_date
-        FROM borrow_records
-        WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
-        ORDER BY borrow_date DESC
-        LIMIT 1
-        """, (patron_id, book_id)
-        ).fetchone()
+    try:
+        active = conn.execute(
+            """
+            SELECT patron_id, book_id, borrow_date, due_date, return_date
+            FROM borrow_records
+            WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+            ORDER BY borrow_date DESC
+            LIMIT 1
+            """, (patron_id, book_id)
+            ).fetchone()
 
-    rec = active or conn.execute(
-        """
-        SELECT patron_id, book_id, borrow_date, due_date, return_date
-        FROM borrow_records
-        WHERE patron_id = ? AND book_id = ?
-        ORDER BY COALESCE(return_date, borrow_date) DESC
-        LIMIT 1
-        """, (patron_id, book_id)
-        ).fetchone()
-    conn.close()
+        rec = active or conn.execute(
+            """
+            SELECT patron_id, book_id, borrow_date, due_date, return_date
+            FROM borrow_records
+            WHERE patron_id = ? AND book_id = ?
+            ORDER BY COALESCE(return_date, borrow_date) DESC
+            LIMIT 1
+            """, (patron_id, book_id)
+            ).fetchone()
+    finally:
+        conn.close()
+
+    return _late_fee_from_record(patron_id, book_id, rec)
 
+def _late_fee_from_record(patron_id: str, book_id: int, rec) -> Dict:
+    """Build the calculate_late_fee_for_book result for the loan record it selected."""
     if rec is None:
         return {"status": "error", "message": "No loan found for this patron/book.",
                 "fee_amount": 0.0, "days_overdue": 0}
 
+    # Due dates are read like the overdue ledger and fee sweep read them
+    due = due_day(rec["due_date"])
     try:
-        borrowed_at = datetime.fromisoformat(rec["borrow_date"])
-        due_at = datetime.fromisoformat(rec["due_date"])
+        datetime.fromisoformat(rec["borrow_date"])
         returned_at = datetime.fromisoformat(rec["return_date"]) if rec["return_date"] else None
     except Exception:
+        due = None
+    if due is None:
         return {"status": "error", "message": "Corrupt borrow record timestamps.",
                 "fee_amount": 0.0, "days_overdue": 0}
 
     ref = returned_at or datetime.now()
-    days_overdue = max(0, (ref.date() - due_at.date()).days)
+    days_over = days_overdue(due, ref.date())
 
-    fee = 0.0
-    if days_overdue > 0:
-        first = min(days_overdue, 7)
-        rest = max(0, days_overdue - 7)
-        fee = min(first * 0.50 + rest * 1.00, 15.00)
+    fee = get_fee_policy().fee(days_over)
 
     return {
         "status": "ok",
         "patron_id": patron_id,
         "book_id": book_id,
-        "due_date": due_at.date().isoformat(),
-        "days_overdue": int(days_overdue),
+        "due_date": due.isoformat(),
+        "days_overdue": days_over,
         "fee_amount": round(fee, 2),
         "calculated_at": ref.isoformat(),
     }
 
+def _select_fee_record(records: List) -> Optional[Dict]:
+    """
+    Pick the loan calculate_late_fee_for_book reports on: the newest active
+    loan, else the most recently returned one.
+    """
+    active = [r for r in records if r["return_date"] is None]
+    if active:
+        return max(active, key=lambda r: r["borrow_date"])
+    if records:
+        return max(records, key=lambda r: r["return_date"] or r["borrow_date"])
+    return None
+
+def calculate_late_fees_bulk(pairs: Optional[List[Tuple[str, int]]] = None,
+                             patron_id: Optional[str] = None) -> List[Dict]:
+    """
+    Calculate late fees for many loans with one query.
+    
+    Args:
+        pairs: (patron_id, book_id) pairs to report on, or
+        patron_id: a patron whose every borrowed book is reported on
+        
+    Returns:
+        list: one calculate_late_fee_for_book-shaped dict per pair, in
+        order (per book, by book id, for a whole patron)
+        
+    Raises:
+        ValueError: unless exactly one of pairs and patron_id is given
+    """
+    if (pairs is None) == (patron_id is None):
+        raise ValueError("Pass either pairs or patron_id.")
+    wanted: List[Tuple[str, int]] = []
+    if patron_id is not None:
+        if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+            return [{"status": "error", "message": "Invalid patron ID. Must be exactly 6 digits.",
+                     "fee_amount": 0.0, "days_overdue": 0}]
+        query = """
+            SELECT patron_id, book_id, borrow_date, due_date, return_date
+            FROM borrow_records
+            WHERE patron_id = ?
+        """
+        params: Tuple = (patron_id,)
+    else:
+        wanted = sorted({(p, b) for p, b in pairs if p and p.isdigit() and len(p) == 6})
+        # One JSON parameter instead of two per pair keeps any batch size in one statement
+        query = """
+            WITH wanted(patron_id, book_id) AS (
+                SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)
+            )
+            SELECT br.patron_id, br.book_id, br.borrow_date, br.due_date, br.return_date
+            FROM borrow_records br
+            JOIN wanted w ON br.patron_id = w.patron_id AND br.book_id = w.book_id
+        """
+        params = (json.dumps(wanted),)
+
+    records: Dict[Tuple[str, int], List] = {}
+    if patron_id is not None or wanted:
+        conn = get_db_connection()
+        try:
+            for row in conn.execute(query, params).fetchall():
+                records.setdefault((row["patron_id"], row["book_id"]), []).append(row)
+        finally:
+            conn.close()
+
+    if patron_id is not None:
+        pairs = sorted(records)
+    results = []
+    for pid, book_id in pairs:
+        if not pid or not pid.isdigit() or len(pid) != 6:
+            results.append({"status": "error", "message": "Invalid patron ID. Must be exactly 6 digits.",
+                            "fee_amount": 0.0, "days_overdue": 0})
+            continue
+        results.append(_late_fee_from_record(pid, book_id, _select_fee_record(records.get((pid, book_id), []))))
+    return results
+
+def _norm_text(s: str) -> str:
+    return (s or "").casefold()
+
+def _digits_only(s: str) -> str:
+    return "".join(ch for ch in (s or "") if ch.isdigit())
+
+def search_sort_key(book: Dict) -> Tuple[str, str, str, int]:
+    """Position of a book in search results: casefolded title, then author, then (title, id)."""
+    return (_norm_text(book.get("title", "")), _norm_text(book.get("author", "")),
+            book.get("title") or "", book.get("id") or 0)
+
+def normalize_search(search_term: str, search_type: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Normalize a search the way R6 compares it.
+    
+    Returns:
+        tuple: (search_type, stripped term, needle) where the needle is the
+        casefolded term for title/author and its digits for isbn, or None
+        if the query cannot match anything
+    """
+    if search_term is None:
+        return None
+
+    term = search_term.strip()
+    if not term:
+        return None
+
+    stype = (search_type or "title").strip().lower()
+    if stype not in {"title", "author", "isbn"}:
+        stype = "title"
+
+    needle = _digits_only(term) if stype == "isbn" else term.casefold()
+    if not needle:
+        return None
+    return stype, term, needle
+
+def _search_candidates(stype: str, term: str, needle: str) -> List[Dict]:
+    """Get the books worth checking for a query from the configured backend."""
+    candidates = None
+    if SEARCH_BACKEND == "index" and stype in {"title", "author"}:
+        catalog_index.ensure_built(get_all_books)
+        candidates = catalog_index.search(stype, needle)
+    elif SEARCH_BACKEND == "index":
+        catalog_index.ensure_built(get_all_books)
+        if len(needle) == 13 and catalog_index.exact_isbn_is_unique():
+            # A full ISBN can only match itself: use the UNIQUE isbn index
+            book = get_book_by_isbn(needle)
+            candidates = [book] if book else []
+        else:
+            candidates = catalog_index.search_isbn(needle)
+    elif SEARCH_BACKEND == "fts" and stype in {"title", "author"} and needle == term.lower():
+        # Needles whose full case folding expands (e.g. "ß" -> "ss") can't be
+        # expressed to SQLite's per-character folding, so they use the scan
+        candidates = search_books_fts(stype, needle)
+    return candidates if candidates is not None else (get_all_books() or [])
+
+def _filter_matches(books: List[Dict], stype: str, needle: str) -> List[Dict]:
+    """Keep the books whose normalized field contains the needle, in input order."""
+    # Index/FTS candidates are re-checked here so every backend shares one match rule
+    if stype in {"title", "author"}:
+        return [b for b in books if needle in _norm_text(b.get(stype, ""))]
+    return [b for b in books if needle in _digits_only(b.get("isbn", ""))]
+
+def _match_books(stype: str, term: str, needle: str) -> List[Dict]:
+    """Books matching a normalized query, in candidate order (uncached)."""
+    return _filter_matches(_search_candidates(stype, term, needle), stype, needle)
+
+def _find_books(stype: str, term: str, needle: str) -> List[Dict]:
+    """Match and order books for a normalized query (uncached)."""
+    results = _match_books(stype, term, needle)
+    results.sort(key=search_sort_key)
+    return results
+
 def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
     """
     R6 — Search the catalog.
@@ -213,109 +476,349 @@ def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
     - isbn: compare only digits; substring match on digits
     - Empty/whitespace search_term -> []
     - Returns a list of book dicts as provided by get_all_books()
+    - Repeated queries are answered from the search result cache until the
+      catalog changes
 
     Each book dict is expected to have at least: id, title, author, isbn, available_copies, total_copies.
     """
-    if search_term is None:
+    query = normalize_search(search_term, search_type)
+    if query is None:
         return []
+    stype, term, needle = query
 
-    term = search_term.strip()
-    if not term:
+    # Any catalog write (ours, or another process's via the stored
+    # revision), or a different database, retires cached results
+    version = (get_catalog_version(), get_catalog_revision(), database.DATABASE)
+    key = (stype, needle, SEARCH_BACKEND)
+    cached = search_cache.get(key, version)
+    if cached is not None:
+        return cached
+
+    results = _find_books(stype, term, needle)
+    search_cache.put(key, version, results)
+    return results
+
+def search_books_batch(queries: List[Tuple[str, str]]) -> List[List[Dict]]:
+    """
+    Run many R6 searches at once.
+    
+    Each (search_term, search_type) pair gets exactly the list
+    search_books_in_catalog would return. Repeated and cached queries are
+    answered once; the rest share one get_all_books() load (the index
+    backend looks them up in the index instead), and full 13-digit ISBNs
+    are resolved through a single digits -> books map built from it.
+    
+    Returns:
+        list: one result list per query, in query order
+    """
+    version = (get_catalog_version(), get_catalog_revision(), database.DATABASE)
+    normalized = [normalize_search(term, stype) for term, stype in queries]
+    answers: Dict[Tuple[str, str], List[Dict]] = {}
+    pending: Dict[Tuple[str, str], str] = {}
+    for query in normalized:
+        if query is None:
+            continue
+        stype, term, needle = query
+        key = (stype, needle)
+        if key in answers or key in pending:
+            continue
+        cached = search_cache.get(key + (SEARCH_BACKEND,), version)
+        if cached is not None:
+            answers[key] = cached
+        else:
+            pending[key] = term
+
+    if SEARCH_BACKEND == "index":
+        for (stype, needle), term in pending.items():
+            answers[(stype, needle)] = _find_books(stype, term, needle)
+    elif pending:
+        books = get_all_books() or []
+        by_isbn: Optional[Dict[str, List[Dict]]] = None
+        if any(stype == "isbn" and len(needle) == 13 for stype, needle in pending):
+            by_isbn = {}
+            for b in books:
+                by_isbn.setdefault(_digits_only(b.get("isbn", "")), []).append(b)
+            # A 13-digit needle is only an exact lookup if no ISBN has more digits
+            if any(len(digits) > 13 for digits in by_isbn):
+                by_isbn = None
+        for (stype, needle), term in pending.items():
+            if by_isbn is not None and stype == "isbn" and len(needle) == 13:
+                results = list(by_isbn.get(needle, []))
+            else:
+                results = _filter_matches(books, stype, needle)
+            results.sort(key=search_sort_key)
+            answers[(stype, needle)] = results
+
+    for key, term in pending.items():
+        search_cache.put(key + (SEARCH_BACKEND,), version, answers[key])
+    return [
+        [dict(b) for b in answers[(query[0], query[2])]] if query is not None else []
+        for query in normalized
+    ]
+
+def match_rank(hay: str, needle: str) -> int:
+    """
+    Grade how well a normalized field matches a needle it contains.
+    
+    Returns:
+        int: 3 exact, 2 prefix, 1 start of a later word, 0 elsewhere
+    """
+    if hay == needle:
+        return 3
+    if hay.startswith(needle):
+        return 2
+    pos = hay.find(needle, 1)
+    while pos > 0:
+        if not hay[pos - 1].isalnum():
+            return 1
+        pos = hay.find(needle, pos + 1)
+    return 0
+
+def search_books_ranked(search_term: str, search_type: str, k: int = SEARCH_TOP_K,
+                        boost_available: bool = False) -> List[Dict]:
+    """
+    Get the k most relevant R6 search results.
+    
+    Matches are ranked by match_rank on the searched field (digits for
+    isbn), then, with boost_available, books that have a copy on the shelf
+    ahead of those that don't, then in the usual result order. Only a
+    k-sized heap is kept, so the full match list is never sorted.
+    
+    Args:
+        k: number of results, clamped to 1..SEARCH_MAX_TOP_K
+        
+    Returns:
+        list: up to k book dicts, best first
+    """
+    query = normalize_search(search_term, search_type)
+    if query is None:
         return []
+    stype, term, needle = query
+    k = max(1, min(int(k), SEARCH_MAX_TOP_K))
 
-    stype = (search_type or "title").strip().lower()
-    if stype not in {"title", "author", "isbn"}:
-        stype = "title"
+    def hay(book: Dict) -> str:
+        return _digits_only(book.get("isbn", "")) if stype == "isbn" else _norm_text(book.get(stype, ""))
 
-    books = get_all_books() or []
-    results: List[Dict] = []
+    def rank(book: Dict):
+        available = 1 if boost_available and (book.get("available_copies") or 0) > 0 else 0
+        return (-match_rank(hay(book), needle), -available, search_sort_key(book))
 
-    # Helper functions
-    def _norm_text(s: str) -> str:
-        return (s or "").casefold()
+    return heapq.nsmallest(k, _match_books(stype, term, needle), key=rank)
 
-    def _digits_only(s: str) -> str:
-        return "".join(ch for ch in (s or "") if ch.isdigit())
+def encode_search_cursor(book: Dict) -> str:
+    """Encode the search_sort_key of the last book on a page as an opaque token."""
+    return _encode_cursor(list(search_sort_key(book)))
 
-    if stype in {"title", "author"}:
-        needle = term.casefold()
-        key = stype
-        for b in books:
-            hay = _norm_text(b.get(key, ""))
-            if needle in hay:
-                results.append(b)
-    else:
-        needle = _digits_only(term)
-        if not needle:
-            return []
-        for b in books:
-            hay = _digits_only(b.get("isbn", ""))
-            if needle in hay:
-                results.append(b)
-
-    results.sort(key=lambda x: (_norm_text(x.get("title", "")), _norm_text(x.get("author", ""))))
-    return results
+def decode_search_cursor(token: str) -> Tuple[str, str, str, int]:
+    """
+    Decode a cursor token produced by encode_search_cursor.
+    
+    Raises:
+        ValueError: if the token is malformed
+    """
+    payload = _decode_cursor(token)
+    if (len(payload) != 4 or not all(isinstance(part, str) for part in payload[:3])
+            or not isinstance(payload[3], int)):
+        raise ValueError("Invalid cursor.")
+    return tuple(payload)
 
-def get_patron_status_report(patron_id: str) -> Dict:
-    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
-        return {"status": "error", "message": "Invalid patron ID. Must be exactly 6 digits."}
+def iter_search_results(search_term: str, search_type: str, cursor: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Iterate over R6 search results in order, resuming after a cursor.
+    
+    The cursor is checked before anything is searched, so a bad token
+    raises here rather than part-way through a streamed response.
+    
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    after = decode_search_cursor(cursor) if cursor else None
+    results = search_books_in_catalog(search_term, search_type)
+    start = bisect.bisect_right(results, after, key=search_sort_key) if after else 0
+    return itertools.islice(results, start, None)
 
-    LATE_GRACE_DAYS = 14
-    RATE_FIRST_7 = 0.50
-    RATE_AFTER_7 = 1.00
-    FEE_CAP = 15.00
+def search_books_page(search_term: str, search_type: str, cursor: Optional[str] = None,
+                      limit: int = SEARCH_PAGE_SIZE) -> Dict:
+    """
+    Get one page of R6 search results.
+    
+    Args:
+        cursor: token from a previous page's next_cursor (None for the first page)
+        limit: results per page, clamped to 1..SEARCH_MAX_PAGE_SIZE
+        
+    Returns:
+        dict: books, limit, next_cursor
+        
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    limit = max(1, min(int(limit), SEARCH_MAX_PAGE_SIZE))
+    books = list(itertools.islice(iter_search_results(search_term, search_type, cursor), limit + 1))
+    has_more = len(books) > limit
+    books = books[:limit]
+    return {
+        "books": books,
+        "limit": limit,
+        "next_cursor": encode_search_cursor(books[-1]) if has_more else None,
+    }
 
-    def fee_for(days_over: int) -> float:
-        if days_over <= 0: return 0.0
-        first = min(days_over, 7)
-        rest = max(0, days_over - 7)
-        return round(min(first * RATE_FIRST_7 + rest * RATE_AFTER_7, FEE_CAP), 2)
+def suggest_books(prefix: str, search_type: str = None, limit: int = SUGGEST_LIMIT) -> List[Dict]:
+    """
+    Autocomplete a partially typed title or author.
+    
+    Args:
+        prefix: what the user has typed so far
+        search_type: "title", "author", or anything else for both
+        limit: number of suggestions, clamped to 1..SUGGEST_MAX_LIMIT
+        
+    Returns:
+        list: {"text", "field"} dicts whose text starts with the prefix (case-insensitive)
+    """
+    limit = max(1, min(int(limit), SUGGEST_MAX_LIMIT))
+    field = (search_type or "").strip().lower()
+    prefix_index.ensure_built(get_all_books)
+    return prefix_index.suggest(prefix, field if field in {"title", "author"} else None, limit)
 
-    conn = get_db_connection()
+def get_search_stats() -> Dict:
+    """Get search result cache and index counters, for tuning their sizes."""
+    return {
+        "backend": SEARCH_BACKEND,
+        "cache": search_cache.stats(),
+        "index": catalog_index.stats(),
+        "suggest": prefix_index.stats(),
+    }
 
-    active_rows = conn.execute(
-        """
-        SELECT br.book_id, br.borrow_date, br.due_date, br.return_date,
-               b.title, b.author, b.isbn
-        FROM borrow_records br
-        LEFT JOIN books b ON b.id = br.book_id
-        WHERE br.patron_id = ? AND br.return_date IS NULL
-        ORDER BY br.borrow_date DESC
-        """,
-        (patron_id,),
-    ).fetchall()
-
-    lifetime_row = conn.execute(
-        "SELECT COUNT(*) AS cnt FROM borrow_records WHERE patron_id = ?",
-        (patron_id,),
-    ).fetchone()
-    lifetime_loans = int(lifetime_row["cnt"]) if lifetime_row else 0
-
-    returned_rows = conn.execute(
-        """
-        SELECT br.book_id, br.borrow_date, br.due_date, br.return_date, b.title
+def reset_caches():
+    """
+    Drop the search cache, the search indexes and the per-database
+    patron_stats check (used by tests that swap the catalog or connection
+    source for the same database path).
+    """
+    search_cache.clear()
+    catalog_index.invalidate()
+    prefix_index.invalidate()
+    _has_patron_stats.clear()
+
+PATRON_RECENT_RETURNS = 5
+
+# One statement, three branches: active loans (return_date IS NULL), the
+# lifetime count (a patron_stats primary key read) and the latest returns
+# (the (patron_id, return_date) index read backwards, stopping after :recent
+# rows). Due days and days overdue are computed here rather than by parsing
+# timestamps in Python. {lifetime_count} is filled in below.
+_PATRON_STATUS_TEMPLATE = """
+    SELECT 'active' AS kind, l.borrow_date AS sort_key,
+           l.book_id, l.borrow_date, l.return_date,
+           date(l.borrow_date) AS borrow_day, NULL AS return_day, l.due_day,
+           MAX(0, CAST(julianday(:today) - julianday(l.due_day) AS INTEGER)) AS days_overdue,
+           b.title, b.author, b.isbn, NULL AS lifetime_loans
+    FROM (
+        SELECT book_id, borrow_date, return_date,
+               CASE WHEN due_date IS NULL OR due_date = ''
+                    THEN date(borrow_date, '+14 days')
+                    ELSE date(due_date) END AS due_day
+        FROM borrow_records
+        WHERE patron_id = :patron_id AND return_date IS NULL
+    ) l
+    LEFT JOIN books b ON b.id = l.book_id
+    UNION ALL
+    SELECT 'count', NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+           {lifetime_count}
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'returned', br.return_date,
+               br.book_id, br.borrow_date, br.return_date,
+               NULL, date(br.return_date), date(br.due_date),
+               MAX(0, CAST(julianday(:today) - julianday(date(br.due_date)) AS INTEGER)),
+               b.title, NULL, NULL, NULL
         FROM borrow_records br
         LEFT JOIN books b ON b.id = br.book_id
-        WHERE br.patron_id = ? AND br.return_date IS NOT NULL
+        WHERE br.patron_id = :patron_id AND br.return_date IS NOT NULL
         ORDER BY br.return_date DESC
-        LIMIT 5
-        """,
-        (patron_id,),
-    ).fetchall()
+        LIMIT :recent
+    )
+    ORDER BY kind, sort_key DESC
+"""
+
+PATRON_STATUS_SQL = _PATRON_STATUS_TEMPLATE.format(
+    lifetime_count="COALESCE((SELECT lifetime_count FROM patron_stats WHERE patron_id = :patron_id), 0)")
+# Databases without the patron_stats counters count the patron's loans instead
+PATRON_STATUS_SQL_UNCOUNTED = _PATRON_STATUS_TEMPLATE.format(
+    lifetime_count="(SELECT COUNT(*) FROM borrow_records WHERE patron_id = :patron_id)")
+
+# Database path -> whether it has the patron_stats table
+_has_patron_stats: Dict[str, bool] = {}
 
-    conn.close()
+def _patron_status_sql(conn) -> str:
+    """Pick the report statement for this database, checking for patron_stats once per database."""
+    path = database.DATABASE
+    if path not in _has_patron_stats:
+        _has_patron_stats[path] = table_exists(conn, "patron_stats")
+    return PATRON_STATUS_SQL if _has_patron_stats[path] else PATRON_STATUS_SQL_UNCOUNTED
+
+def get_patron_status_report(patron_id: str, today: Optional[date] = None) -> Dict:
+    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+        return {"status": "error", "message": "Invalid patron ID. Must be exactly 6 digits."}
+
+    today = (today or datetime.now().date()).isoformat()
+
+    params = {"patron_id": patron_id, "today": today, "recent": PATRON_RECENT_RETURNS}
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(_patron_status_sql(conn), params).fetchall()
+    finally:
+        conn.close()
 
+    active_rows = [r for r in rows if r["kind"] == "active"]
+    returned_rows = [r for r in rows if r["kind"] == "returned"]
+    lifetime_loans = next((int(r["lifetime_loans"] or 0) for r in rows if r["kind"] == "count"), 0)
+    return assemble_status_report(patron_id, active_rows, returned_rows, lifetime_loans)
+
+def get_patron_status_etag(patron_id: str, today: Optional[date] = None) -> str:
+    """
+    Get a validator for a patron's status report.
+    
+    Built from the patron's patron_stats row (its version changes with every
+    borrow, return or edit of the patron's loans), the date (days overdue
+    and fees move daily) and the fee policy, so it changes whenever the
+    report can. Books are never edited after insert, so catalog changes do
+    not enter into it.
+    """
+    today = today or datetime.now().date()
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            'SELECT active_count, lifetime_count, next_due_date, version FROM patron_stats WHERE patron_id = ?',
+            (patron_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    marker = tuple(row) if row else (0, 0, None, 0)
+    key = repr((patron_id, marker, today.isoformat(), repr(get_fee_policy())))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+def assemble_status_report(patron_id: str, active_rows, returned_rows, lifetime_loans: int) -> Dict:
+    """
+    Shape a patron status report from its loan rows.
+    
+    Args:
+        active_rows: active loans, newest first, with book_id, borrow_date,
+            borrow_day, due_day, days_overdue, title, author, isbn
+        returned_rows: the most recent returns, newest first, with book_id,
+            return_date, return_day, days_overdue, title
+        lifetime_loans: number of loans the patron ever made
+    """
+    fee_for = get_fee_policy().fee
     active_loans: List[Dict[str, Any]] = []
+    recent_returns: List[Dict[str, Any]] = []
     overdue_count = 0
     total_accrued_fee = 0.0
 
     for r in active_rows:
-        try:
-            borrowed_at = datetime.fromisoformat(r["borrow_date"])
-            due_at = datetime.fromisoformat(r["due_date"]) if r["due_date"] else borrowed_at + timedelta(days=LATE_GRACE_DAYS)
-        except Exception:
+        # Unreadable timestamps come back as NULL days: skip the row
+        if r["borrow_day"] is None or r["due_day"] is None:
             continue
-        days_over = max(0, (datetime.now().date() - due_at.date()).days) if due_at else 0
+        days_over = r["days_overdue"]
         fee = fee_for(days_over)
         if days_over > 0:
             overdue_count += 1
@@ -325,31 +828,27 @@ def get_patron_status_report(patron_id: str) -> Dict:
             "title": r["title"],
             "author": r["author"],
             "isbn": r["isbn"],
-            "borrowed_at": borrowed_at.isoformat(),
-            "due_at": due_at.date().isoformat(),
+            "borrowed_at": r["borrow_date"],
+            "due_at": r["due_day"],
             "days_overdue": days_over,
             "accrued_fee": fee,
         })
 
-    total_accrued_fee = round(total_accrued_fee, 2)
-
-    recent_returns: List[Dict[str, Any]] = []
     for r in returned_rows:
-        try:
-            due_at = datetime.fromisoformat(r["due_date"]) if r["due_date"] else None
-            returned_at = datetime.fromisoformat(r["return_date"])
-        except Exception:
+        if r["return_day"] is None:
             continue
-        days_over = max(0, (datetime.now().date() - due_at.date()).days) if due_at else 0
+        days_over = r["days_overdue"] or 0
         recent_returns.append({
             "book_id": r["book_id"],
             "title": r["title"],
-            "returned_at": returned_at.isoformat(),
+            "returned_at": r["return_date"],
             "was_late": days_over > 0,
             "days_overdue": days_over,
             "fee_at_return": fee_for(days_over),
         })
 
+    total_accrued_fee = round(total_accrued_fee, 2)
+
     return {
         "status": "ok",
         "patron_id": patron_id,
@@ -402,7 +901,7 @@ def pay_late_fees(patron_id: str, book_id: int, payment_gateway: PaymentGateway
         return False, "No late fees to pay for this book.", None
     
     # Get book details for payment description
-    book = get_book_by_id(book_id)
+    book = get_book_metadata(book_id)
     if not book:
         return False, "Book not found.", None
     
@@ -429,6 +928,76 @@ def pay_late_fees(patron_id: str, book_id: int, payment_gateway: PaymentGateway
         return False, f"Payment processing error: {str(e)}", None
 
 
+async def pay_all_late_fees(patron_id: str, payment_gateway: AsyncPaymentGateway = None,
+                            max_concurrency: int = PAYMENT_CONCURRENCY) -> Dict:
+    """
+    Pay every late fee a patron owes, one gateway charge per book, concurrently.
+    
+    Fees are the ones pay_late_fees would charge book by book, read with a
+    single query, and the book titles with one more before any charge
+    starts, so the charges themselves only wait on the gateway. Charges run at most max_concurrency at a time, so five
+    overdue books cost about one gateway round trip rather than five; one
+    failed charge does not stop the others.
+    
+    Args:
+        patron_id: 6-digit library card ID
+        payment_gateway: async payment gateway (injectable for testing)
+        max_concurrency: most charges in flight at once
+        
+    Returns:
+        dict: status, patron_id, payments (one {book_id, amount, success,
+        transaction_id, message} per overdue book, by book id), paid_count,
+        failed_count and total_paid
+    """
+    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+        return {"status": "error", "message": "Invalid patron ID. Must be exactly 6 digits."}
+    if max_concurrency < 1:
+        return {"status": "error", "message": "max_concurrency must be at least 1."}
+    
+    owed = [f for f in calculate_late_fees_bulk(patron_id=patron_id)
+            if f.get("status") == "ok" and f.get("fee_amount", 0.0) > 0]
+    titles = get_book_titles([f["book_id"] for f in owed])
+    
+    if payment_gateway is None:
+        payment_gateway = AsyncPaymentGateway()
+    limit = asyncio.BoundedSemaphore(max_concurrency)
+    
+    async def settle(fee: Dict) -> Dict:
+        payment = {"book_id": fee["book_id"], "amount": fee["fee_amount"],
+                   "success": False, "transaction_id": None}
+        title = titles.get(fee["book_id"])
+        if title is None:
+            payment["message"] = "Book not found."
+            return payment
+        async with limit:
+            try:
+                success, transaction_id, message = await payment_gateway.process_payment(
+                    patron_id=patron_id,
+                    amount=fee["fee_amount"],
+                    description=f"Late fees for '{title}'"
+                )
+            except Exception as e:
+                payment["message"] = f"Payment processing error: {str(e)}"
+                return payment
+        if success:
+            payment.update(success=True, transaction_id=transaction_id,
+                           message=f"Payment successful! {message}")
+        else:
+            payment["message"] = f"Payment failed: {message}"
+        return payment
+    
+    payments = await asyncio.gather(*(settle(fee) for fee in owed))
+    paid = [p for p in payments if p["success"]]
+    return {
+        "status": "ok",
+        "patron_id": patron_id,
+        "payments": payments,
+        "paid_count": len(paid),
+        "failed_count": len(payments) - len(paid),
+        "total_paid": round(sum(p["amount"] for p in paid), 2),
+    }
+
+
 def refund_late_fee_payment(transaction_id: str, amount: float, payment_gateway: PaymentGateway = None) -> Tuple[bool, str]:
     """
     Refund a late fee payment (e.g., if book was returned on time but fees were charged in error).
@@ -450,7 +1019,7 @@ def refund_late_fee_payment(transaction_id: str, amount: float, payment_gateway:
     if amount <= 0:
         return False, "Refund amount must be greater than 0."
     
-    if amount > 15.00:  # Maximum late fee per book
+    if amount > get_fee_policy().max_fee:  # Maximum late fee per book
         return False, "Refund amount exceeds maximum late fee."
     
     # Use provided gateway or create new one
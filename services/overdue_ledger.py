@@ -0,0 +1,154 @@
+"""
+Overdue Ledger Module - Materialized table of overdue loans and their fees
+Rows are added when a loan passes its due date, rewritten only while the
+fee is still growing, and removed by trigger when the loan is returned, so
+listing a patron's overdue fees is a single indexed read
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from database import get_db_connection
+from .fee_policy import FeePolicy, days_overdue, due_day, get_fee_policy
+
+
+def _read_state(conn):
+    return conn.execute(
+        """
+        SELECT refreshed_on, last_record_id, policy,
+               (SELECT COALESCE(MAX(id), 0) FROM borrow_records) AS max_record_id
+        FROM overdue_ledger_state WHERE id = 1
+        """
+    ).fetchone()
+
+
+def _is_fresh(state, today: date, policy: FeePolicy) -> bool:
+    return (state is not None and state["refreshed_on"] == today.isoformat()
+            and state["last_record_id"] >= state["max_record_id"] and state["policy"] == repr(policy))
+
+
+def refresh_overdue_ledger(today: Optional[date] = None, full: bool = False,
+                           policy: Optional[FeePolicy] = None) -> Dict:
+    """
+    Bring the overdue ledger up to date for a day.
+
+    Only loans that crossed their due date since the last refresh (found
+    through the active due-date index) or were recorded since then are
+    added, and only rows whose fee is still below the policy's maximum are
+    rewritten. A first run, a changed fee policy, or full=True rebuilds the
+    ledger from every active loan.
+
+    Returns:
+        dict: as_of, full, added, updated, size
+    """
+    today = today or datetime.now().date()
+    policy = policy or get_fee_policy()
+    today_key = today.isoformat()
+
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        state = _read_state(conn)
+        full = (full or state is None or state["policy"] != repr(policy)
+                or state["refreshed_on"] > today_key)
+
+        if full:
+            conn.execute('DELETE FROM overdue_loans')
+            crossed = conn.execute(
+                """
+                SELECT id, patron_id, book_id, due_date FROM borrow_records
+                WHERE return_date IS NULL AND due_date < ?
+                """, (today_key,)
+            ).fetchall()
+        else:
+            # Due dates are ISO timestamps: "< 'YYYY-MM-DD'" means due before that day.
+            # New records are found by rowid range (+due_date keeps the planner off the due index)
+            crossed = conn.execute(
+                """
+                SELECT id, patron_id, book_id, due_date FROM borrow_records
+                WHERE return_date IS NULL AND due_date >= ? AND due_date < ?
+                UNION
+                SELECT id, patron_id, book_id, due_date FROM borrow_records
+                WHERE id > ? AND return_date IS NULL AND +due_date < ?
+                """, (state["refreshed_on"], today_key, state["last_record_id"], today_key)
+            ).fetchall()
+
+        added = []
+        for r in crossed:
+            due = due_day(r["due_date"])
+            if due is None:
+                continue
+            added.append((r["id"], r["patron_id"], r["book_id"], due.isoformat(),
+                          policy.fee(days_overdue(due, today)), today_key))
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO overdue_loans
+                (record_id, patron_id, book_id, due_date, fee_amount, updated_on)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, added
+        )
+
+        growing = conn.execute(
+            "SELECT record_id, due_date FROM overdue_loans WHERE fee_amount < ? AND updated_on < ?",
+            (policy.max_fee, today_key)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE overdue_loans SET fee_amount = ?, updated_on = ? WHERE record_id = ?",
+            [(policy.fee(days_overdue(due_day(r["due_date"]), today)), today_key, r["record_id"])
+             for r in growing]
+        )
+
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO overdue_ledger_state (id, refreshed_on, last_record_id, policy)
+            VALUES (1, ?, (SELECT COALESCE(MAX(id), 0) FROM borrow_records), ?)
+            """, (today_key, repr(policy))
+        )
+        size = conn.execute('SELECT COUNT(*) FROM overdue_loans').fetchone()[0]
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {"as_of": today_key, "full": full, "added": len(added), "updated": len(growing), "size": size}
+
+
+def _entry(row, today: date) -> Dict:
+    return {
+        "patron_id": row["patron_id"],
+        "book_id": row["book_id"],
+        "due_date": row["due_date"],
+        "days_overdue": days_overdue(due_day(row["due_date"]), today),
+        "fee_amount": row["fee_amount"],
+    }
+
+
+def _ensure_fresh(today: date):
+    conn = get_db_connection()
+    try:
+        state = _read_state(conn)
+    finally:
+        conn.close()
+    if not _is_fresh(state, today, get_fee_policy()):
+        refresh_overdue_ledger(today)
+
+
+def get_patron_overdue(patron_id: str, today: Optional[date] = None) -> List[Dict]:
+    """Get every overdue loan of a patron from the ledger, oldest due date first."""
+    today = today or datetime.now().date()
+    _ensure_fresh(today)
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            """
+            SELECT patron_id, book_id, due_date, fee_amount FROM overdue_loans
+            WHERE patron_id = ?
+            ORDER BY due_date, book_id
+            """, (patron_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [_entry(r, today) for r in rows]
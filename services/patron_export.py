@@ -0,0 +1,116 @@
+"""
+Patron Export Module - Status reports for every patron in one streaming pass
+Walks borrow_records once in (patron_id, return_date) index order and
+yields one report per patron, in the same shape as get_patron_status_report,
+holding only the current patron's active loans and last few returns
+"""
+
+import csv
+import io
+import itertools
+import json
+from collections import deque
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+from database import get_db_connection
+from .library_service import PATRON_RECENT_RETURNS, assemble_status_report
+
+# Same day arithmetic as PATRON_STATUS_SQL, for every loan at once.
+# ORDER BY matches idx_borrow_records_patron_return, so SQLite walks the
+# index instead of sorting; active loans (NULL return_date) come first.
+PATRON_EXPORT_SQL = """
+    SELECT l.patron_id, l.book_id, l.borrow_date, l.return_date,
+           l.borrow_day, l.return_day, l.due_day,
+           MAX(0, CAST(julianday(:today) - julianday(l.due_day) AS INTEGER)) AS days_overdue,
+           b.title, b.author, b.isbn
+    FROM (
+        SELECT patron_id, book_id, borrow_date, return_date,
+               date(borrow_date) AS borrow_day, date(return_date) AS return_day,
+               CASE WHEN return_date IS NOT NULL THEN date(due_date)
+                    WHEN due_date IS NULL OR due_date = '' THEN date(borrow_date, '+14 days')
+                    ELSE date(due_date) END AS due_day
+        FROM borrow_records
+    ) l
+    LEFT JOIN books b ON b.id = l.book_id
+    ORDER BY l.patron_id, l.return_date
+"""
+
+CSV_FIELDS = ["patron_id", "active_count", "overdue_count", "total_accrued_fee", "lifetime_loans"]
+
+
+def iter_patron_status_reports(today: Optional[date] = None) -> Iterator[Dict]:
+    """
+    Yield the status report of every patron with loan history, by patron ID.
+
+    Each report equals get_patron_status_report(patron_id) for the same
+    day. Rows are read from the cursor as they are produced, so memory is
+    bounded by one patron's active loans, not by the size of the table.
+    """
+    today_key = (today or datetime.now().date()).isoformat()
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(PATRON_EXPORT_SQL, {"today": today_key})
+        for patron_id, loans in itertools.groupby(rows, key=lambda r: r["patron_id"]):
+            active_rows = []
+            # Returns arrive oldest first: keep the tail
+            returned_rows = deque(maxlen=PATRON_RECENT_RETURNS)
+            lifetime_loans = 0
+            for r in loans:
+                lifetime_loans += 1
+                if r["return_date"] is None:
+                    active_rows.append(r)
+                else:
+                    returned_rows.append(r)
+            active_rows.sort(key=lambda r: r["borrow_date"], reverse=True)
+            yield assemble_status_report(patron_id, active_rows, list(reversed(returned_rows)),
+                                         lifetime_loans)
+    finally:
+        conn.close()
+
+
+def iter_reports_ndjson(reports: Iterable[Dict]) -> Iterator[str]:
+    """Serialize reports as newline-delimited JSON, one line at a time."""
+    for report in reports:
+        yield json.dumps(report) + "\n"
+
+
+def iter_reports_csv(reports: Iterable[Dict]) -> Iterator[str]:
+    """Serialize report summaries as CSV (header first), one line at a time."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for report in reports:
+        writer.writerow(dict(report["summary"], patron_id=report["patron_id"]))
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+EXPORT_FORMATS = {
+    "ndjson": (iter_reports_ndjson, "application/x-ndjson"),
+    "csv": (iter_reports_csv, "text/csv"),
+}
+
+
+def export_patron_status_reports(out, fmt: str = "ndjson", today: Optional[date] = None) -> int:
+    """
+    Write every patron's status report to a text stream.
+
+    Returns:
+        int: number of patrons exported
+    """
+    serialize, _ = EXPORT_FORMATS[fmt]
+    count = 0
+
+    def counted():
+        nonlocal count
+        for report in iter_patron_status_reports(today):
+            count += 1
+            yield report
+
+    for chunk in serialize(counted()):
+        out.write(chunk)
+    return count
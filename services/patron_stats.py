@@ -0,0 +1,74 @@
+"""
+Patron Stats Module - Consistency check for the per-patron loan counters
+patron_stats is kept current by triggers on borrow_records; this recounts
+every patron from the loan history, reports rows that drifted (e.g. after
+triggers were dropped or the table was edited by hand) and can repair them
+"""
+
+from typing import Dict
+
+from database import get_db_connection
+from migrations import PATRON_STATS_SELECT
+
+STATS_COLUMNS = ("active_count", "lifetime_count", "next_due_date")
+
+
+def check_patron_stats(repair: bool = False) -> Dict:
+    """
+    Compare patron_stats with counts recomputed from borrow_records.
+
+    The check runs in one transaction, so concurrent circulation cannot
+    produce false mismatches. With repair=True each mismatched row is
+    replaced by its recomputed value.
+
+    Returns:
+        dict: patrons (number checked), mismatches (one {patron_id, stored,
+        actual} per drifted patron, either side None when the row is
+        missing) and repaired (rows rewritten)
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE' if repair else 'BEGIN')
+        actual = {r["patron_id"]: tuple(r)[1:] for r in conn.execute(PATRON_STATS_SELECT)}
+        stored = {r["patron_id"]: tuple(r)[1:] for r in conn.execute(
+            'SELECT patron_id, active_count, lifetime_count, next_due_date FROM patron_stats'
+        )}
+        drifted = sorted(pid for pid in actual.keys() | stored.keys() if actual.get(pid) != stored.get(pid))
+
+        if repair and drifted:
+            conn.executemany(
+                'DELETE FROM patron_stats WHERE patron_id = ?',
+                [(pid,) for pid in drifted if pid not in actual]
+            )
+            # Rewritten rows get a new version so cached status reports are not reused
+            conn.executemany(
+                '''
+                INSERT INTO patron_stats (patron_id, active_count, lifetime_count, next_due_date, version)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT (patron_id) DO UPDATE SET
+                    active_count = excluded.active_count,
+                    lifetime_count = excluded.lifetime_count,
+                    next_due_date = excluded.next_due_date,
+                    version = version + 1
+                ''',
+                [(pid,) + actual[pid] for pid in drifted if pid in actual]
+            )
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    def as_dict(values):
+        return dict(zip(STATS_COLUMNS, values)) if values is not None else None
+
+    return {
+        "patrons": len(actual.keys() | stored.keys()),
+        "mismatches": [
+            {"patron_id": pid, "stored": as_dict(stored.get(pid)), "actual": as_dict(actual.get(pid))}
+            for pid in drifted
+        ],
+        "repaired": len(drifted) if repair else 0,
+    }
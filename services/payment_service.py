@@ -6,11 +6,51 @@ For Assignment 3: You will learn to mock this service in their tests
 since we cannot make actual payment API calls during testing.
 """
 
+import asyncio
 import requests
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Tuple
 import time
 
 
+def _charge_outcome(patron_id: str, amount: float, transaction_id: str) -> Tuple[bool, str, str]:
+    """The gateway's answer to a charge (simulated by amount and patron ID format)."""
+    if amount <= 0:
+        return False, "", "Invalid amount: must be greater than 0"
+    
+    if amount > 1000:
+        return False, "", "Payment declined: amount exceeds limit"
+    
+    if len(patron_id) != 6:
+        return False, "", "Invalid patron ID format"
+    
+    return True, transaction_id, f"Payment of ${amount:.2f} processed successfully"
+
+
+def _refund_outcome(transaction_id: str, amount: float) -> Tuple[bool, str]:
+    """The gateway's answer to a refund."""
+    if not transaction_id or not transaction_id.startswith("txn_"):
+        return False, "Invalid transaction ID"
+    
+    if amount <= 0:
+        return False, "Invalid refund amount"
+    
+    refund_id = f"refund_{transaction_id}_{int(time.time())}"
+    return True, f"Refund of ${amount:.2f} processed successfully. Refund ID: {refund_id}"
+
+
+def _status_outcome(transaction_id: str) -> Dict:
+    """The gateway's answer to a status check."""
+    if not transaction_id or not transaction_id.startswith("txn_"):
+        return {"status": "not_found", "message": "Transaction not found"}
+    
+    return {
+        "transaction_id": transaction_id,
+        "status": "completed",
+        "amount": 10.50,
+        "timestamp": time.time()
+    }
+
+
 class PaymentGateway:
     """
     Simulates an external payment gateway API.
@@ -68,19 +108,7 @@ class PaymentGateway:
         
         # For this template, we simulate different scenarios based on amount
         # This allows testing without a real API
-        
-        if amount <= 0:
-            return False, "", "Invalid amount: must be greater than 0"
-        
-        if amount > 1000:
-            return False, "", "Payment declined: amount exceeds limit"
-        
-        if len(patron_id) != 6:
-            return False, "", "Invalid patron ID format"
-        
-        # Simulate successful payment
-        transaction_id = f"txn_{patron_id}_{int(time.time())}"
-        return True, transaction_id, f"Payment of ${amount:.2f} processed successfully"
+        return _charge_outcome(patron_id, amount, f"txn_{patron_id}_{int(time.time())}")
     
     def refund_payment(self, transaction_id: str, amount: float) -> Tuple[bool, str]:
         """
@@ -97,15 +125,7 @@ class PaymentGateway:
             tuple: (success: bool, message: str)
         """
         time.sleep(0.5)
-        
-        if not transaction_id or not transaction_id.startswith("txn_"):
-            return False, "Invalid transaction ID"
-        
-        if amount <= 0:
-            return False, "Invalid refund amount"
-        
-        refund_id = f"refund_{transaction_id}_{int(time.time())}"
-        return True, f"Refund of ${amount:.2f} processed successfully. Refund ID: {refund_id}"
+        return _refund_outcome(transaction_id, amount)
     
     def verify_payment_status(self, transaction_id: str) -> Dict:
         """
@@ -122,13 +142,95 @@ class PaymentGateway:
         """
         time.sleep(0.3)
         
-        if not transaction_id or not transaction_id.startswith("txn_"):
-            return {"status": "not_found", "message": "Transaction not found"}
-        
         # Simulate status check
-        return {
-            "transaction_id": transaction_id,
-            "status": "completed",
-            "amount": 10.50,
-            "timestamp": time.time()
-        }
\ No newline at end of file
+        return _status_outcome(transaction_id)
+
+
+class AsyncPaymentGateway:
+    """
+    asyncio client for the same payment gateway API as PaymentGateway.
+    
+    Every call awaits the network instead of blocking, so many payments
+    can be in flight at once from one event loop (see pay_all_late_fees).
+    Answers follow the same simulated rules as PaymentGateway.
+    """
+    
+    def __init__(self, api_key: str = "test_key_12345", latency: float = 0.5):
+        """
+        Initialize the async payment gateway client.
+        
+        Args:
+            api_key: API key for authentication (default is test key)
+            latency: simulated round trip of one request, in seconds
+        """
+        self.api_key = api_key
+        self.base_url = "https://api.payment-gateway.example.com"
+        self.latency = latency
+    
+    async def process_payment(self, patron_id: str, amount: float, description: str = "") -> Tuple[bool, str, str]:
+        """
+        Process a payment through the external gateway (PaymentGateway.process_payment, awaited).
+        
+        Returns:
+            tuple: (success: bool, transaction_id: str, message: str)
+        """
+        # Stands in for an awaited POST to f"{self.base_url}/charges"
+        await asyncio.sleep(self.latency)
+        return _charge_outcome(patron_id, amount, f"txn_{patron_id}_{int(time.time())}")
+    
+    async def refund_payment(self, transaction_id: str, amount: float) -> Tuple[bool, str]:
+        """
+        Refund a previous payment (PaymentGateway.refund_payment, awaited).
+        
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        await asyncio.sleep(self.latency)
+        return _refund_outcome(transaction_id, amount)
+    
+    async def verify_payment_status(self, transaction_id: str) -> Dict:
+        """Check the status of a payment transaction (PaymentGateway.verify_payment_status, awaited)."""
+        await asyncio.sleep(self.latency)
+        return _status_outcome(transaction_id)
+
+
+class FakeAsyncPaymentGateway(AsyncPaymentGateway):
+    """
+    In-process stand-in for AsyncPaymentGateway, for tests and local runs.
+    
+    Records every charge and refund, issues predictable transaction IDs
+    (txn_<patron>_<n>), tracks how many requests were in flight at once,
+    and declines charges whose description is listed in declined.
+    """
+    
+    def __init__(self, latency: float = 0.0, declined: Iterable[str] = ()):
+        super().__init__(api_key="fake", latency=latency)
+        self.declined = set(declined)
+        self.charges: List[Dict] = []
+        self.refunds: List[Dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def _round_trip(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+    
+    async def process_payment(self, patron_id: str, amount: float, description: str = "") -> Tuple[bool, str, str]:
+        await self._round_trip()
+        self.charges.append({"patron_id": patron_id, "amount": amount, "description": description})
+        if description in self.declined:
+            return False, "", "Payment declined by issuer"
+        return _charge_outcome(patron_id, amount, f"txn_{patron_id}_{len(self.charges)}")
+    
+    async def refund_payment(self, transaction_id: str, amount: float) -> Tuple[bool, str]:
+        await self._round_trip()
+        self.refunds.append({"transaction_id": transaction_id, "amount": amount})
+        return _refund_outcome(transaction_id, amount)
+    
+    async def verify_payment_status(self, transaction_id: str) -> Dict:
+        await self._round_trip()
+        return _status_outcome(transaction_id)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Report Cache Module - Bounded LRU cache of serialized patron status reports
+Each entry is stored with the ETag it was computed for and only served
+while the patron's current ETag still matches
+"""
+
+from typing import Dict, Optional
+
+from lru import LRUCache
+
+PATRON_REPORT_CACHE_SIZE = 1024
+
+
+class PatronReportCache(LRUCache):
+    """
+    LRU cache of status report bodies keyed by patron ID.
+
+    get() returns the body only when it was stored under the ETag the
+    caller computed; a stale entry is dropped on sight, so no TTL is needed
+    (the ETag already changes with circulation and with the date).
+    """
+
+    def __init__(self, max_size: int = PATRON_REPORT_CACHE_SIZE):
+        super().__init__(max_size)
+
+    def get(self, patron_id: str, etag: str) -> Optional[bytes]:
+        entry = super().get(patron_id, check=lambda entry: entry[0] == etag)
+        return entry[1] if entry is not None else None
+
+    def put(self, patron_id: str, etag: str, body: bytes):
+        super().put(patron_id, (etag, body))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = super().stats()
+            stats["stale"] = self.rejections
+        return stats
+
+
+patron_report_cache = PatronReportCache()
@@ -0,0 +1,60 @@
+"""
+Search Cache Module - Bounded LRU/TTL cache of search results
+Entries are tied to a catalog version and dropped as soon as it changes
+"""
+
+import time
+from typing import Dict, Hashable, List, Optional
+
+from lru import LRUCache
+
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 60.0
+
+
+class SearchResultCache(LRUCache):
+    """
+    LRU cache of search results keyed by (search type, normalized needle, backend).
+
+    get() and put() take the catalog version the caller observed; when it
+    differs from the version the cache holds, every entry is discarded.
+    The TTL is a backstop for writes no version reflects.
+    """
+
+    def __init__(self, max_size: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL, clock=time.monotonic):
+        super().__init__(max_size, ttl, clock)
+        self._version = None
+        self.invalidations = 0
+
+    def _sync_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version) -> Optional[List[Dict]]:
+        with self._lock:
+            self._sync_version(version)
+            results = super().get(key)
+        return [dict(book) for book in results] if results is not None else None
+
+    def put(self, key: Hashable, version, results: List[Dict]):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if self._version is None:
+                self._version = version
+            elif version != self._version:
+                # The catalog moved on while these results were computed
+                return
+            super().put(key, [dict(book) for book in results])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = super().stats()
+            stats.update(expirations=self.expirations, invalidations=self.invalidations, ttl=self.ttl)
+        return stats
+
+
+search_cache = SearchResultCache()
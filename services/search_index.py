@@ -0,0 +1,317 @@
+"""
+Search Index Module - In-memory indexes backing search_books_in_catalog
+Trigram postings over casefolded titles and authors and digit 4-gram
+postings over ISBNs, plus sorted title/author arrays for autocomplete,
+kept current through database catalog notifications and rebuilt when the
+database's catalog revision shows a write made elsewhere
+"""
+
+import abc
+import bisect
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+import database
+from database import add_catalog_listener, get_available_copies, get_catalog_revision
+
+SEARCH_FIELDS = ("title", "author")
+ISBN_GRAM = 4
+ISBN_LENGTH = 13
+SUGGEST_LIMIT = 8
+# Sorts after any character a prefix can be followed by
+PREFIX_END = "\U0010ffff"
+# Catalog events whose write moves the stored catalog revision
+# (availability updates do not)
+REVISION_EVENTS = ("insert",)
+
+
+def ngrams(text: str, n: int) -> Set[str]:
+    """All n-character substrings of text."""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def trigrams(text: str) -> Set[str]:
+    """All 3-character substrings of text."""
+    return ngrams(text, 3)
+
+
+def digits_only(text: str) -> str:
+    """The digits of text, in order (how ISBN search normalizes both sides)."""
+    return "".join(ch for ch in (text or "") if ch.isdigit())
+
+
+class _CatalogMirror(abc.ABC):
+    """
+    Build and freshness bookkeeping shared by the in-memory catalog indexes.
+
+    An index is built lazily from a catalog loader and then updated by
+    catalog listeners, which only hear about writes made through this
+    process. It also records the database's catalog revision at build
+    time and counts the revision-moving notifications it applied since;
+    if the revision has moved by more than that (another process such as
+    the import CLI, or raw SQL, added, removed or renamed books) the next
+    lookup rebuilds it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._source = None
+        self._revision: Optional[int] = None
+        self._notified = 0
+        self.builds = 0
+        self._reset()
+
+    @abc.abstractmethod
+    def _reset(self):
+        """Empty the index structures."""
+
+    @abc.abstractmethod
+    def build(self, books: List[Dict]):
+        """Replace the index contents with books."""
+
+    @abc.abstractmethod
+    def _apply(self, event: str, payload):
+        """Apply one catalog notification."""
+
+    def _expected_revision(self) -> Optional[int]:
+        return None if self._revision is None else self._revision + self._notified
+
+    def ensure_built(self, loader: Callable[[], List[Dict]]):
+        """(Re)build from loader unless already built for this database and nothing changed behind the listeners."""
+        source = database.DATABASE
+        revision = get_catalog_revision()
+        with self._lock:
+            if self._source != source or revision != self._expected_revision():
+                self.build(loader() or [])
+                self._source = source
+                self._revision = revision
+                self._notified = 0
+
+    def invalidate(self):
+        """Drop the index; the next lookup rebuilds it."""
+        with self._lock:
+            self._source = None
+            self._reset()
+
+    def on_catalog_change(self, event: str, payload):
+        """Catalog listener: apply a change this process committed."""
+        with self._lock:
+            if self._source is None:
+                return
+            if event in REVISION_EVENTS:
+                self._notified += 1
+            self._apply(event, payload)
+
+
+class CatalogIndex(_CatalogMirror):
+    """
+    Inverted n-gram index over casefolded book titles/authors and ISBN digits.
+
+    The index is built lazily from a catalog loader (get_all_books) and then
+    maintained incrementally: inserted books are added, and other catalog
+    writes it was not notified of trigger a rebuild (see _CatalogMirror).
+    Availability is not kept current here; each result set reads it from
+    the database in one query.
+    A needle of 3+ characters is answered by intersecting the posting sets
+    of its trigrams and confirming the substring, so results are exactly
+    those of a casefolded substring scan. ISBNs are indexed the same way
+    over their digits, with 4-grams since the alphabet is only ten symbols.
+    """
+
+    def __init__(self):
+        self._books: Dict[int, Dict] = {}
+        self._folded: Dict[str, Dict[int, str]] = {}
+        self._postings: Dict[str, Dict[str, Set[int]]] = {}
+        self._isbn_digits: Dict[int, str] = {}
+        self._isbn_postings: Dict[str, Set[int]] = {}
+        self._long_isbns: Set[int] = set()
+        super().__init__()
+
+    def _reset(self):
+        self._books = {}
+        self._folded = {field: {} for field in SEARCH_FIELDS}
+        self._postings = {field: {} for field in SEARCH_FIELDS}
+        self._isbn_digits = {}
+        self._isbn_postings = {}
+        self._long_isbns = set()
+
+    def build(self, books: List[Dict]):
+        """Index a full catalog, replacing any previous contents."""
+        with self._lock:
+            self._reset()
+            for book in books:
+                self._add(book)
+            self.builds += 1
+
+    def _add(self, book: Dict):
+        book_id = book.get("id")
+        self._books[book_id] = dict(book)
+        for field in SEARCH_FIELDS:
+            folded = (book.get(field) or "").casefold()
+            self._folded[field][book_id] = folded
+            postings = self._postings[field]
+            for gram in trigrams(folded):
+                postings.setdefault(gram, set()).add(book_id)
+        isbn = book.get("isbn") or ""
+        digits = digits_only(isbn)
+        self._isbn_digits[book_id] = digits
+        for gram in ngrams(digits, ISBN_GRAM):
+            self._isbn_postings.setdefault(gram, set()).add(book_id)
+        if len(isbn) > ISBN_LENGTH:
+            self._long_isbns.add(book_id)
+
+    def _apply(self, event: str, payload):
+        # Availability is read per result set, so only new books matter
+        if event == "insert":
+            self._add(payload)
+
+    @staticmethod
+    def _lookup(hays: Dict[int, str], postings: Dict[str, Set[int]], needle: str, n: int) -> Set[int]:
+        if len(needle) < n:
+            return {book_id for book_id, hay in hays.items() if needle in hay}
+        lists = sorted((postings.get(gram, set()) for gram in ngrams(needle, n)), key=len)
+        ids = set(lists[0])
+        for ids_for_gram in lists[1:]:
+            if not ids:
+                break
+            ids &= ids_for_gram
+        # Grams can co-occur without forming the needle, so confirm it
+        return {book_id for book_id in ids if needle in hays[book_id]}
+
+    def search(self, field: str, needle: str) -> List[Dict]:
+        """
+        Find books whose casefolded field contains the casefolded needle.
+
+        Returns:
+            list: copies of the matching book dicts in (title, id) order
+        """
+        with self._lock:
+            ids = self._lookup(self._folded[field], self._postings[field], needle, 3)
+        return self._materialize(ids)
+
+    def search_isbn(self, needle: str) -> List[Dict]:
+        """
+        Find books whose ISBN digits contain the digit string needle.
+
+        Returns:
+            list: copies of the matching book dicts in (title, id) order
+        """
+        with self._lock:
+            ids = self._lookup(self._isbn_digits, self._isbn_postings, needle, ISBN_GRAM)
+        return self._materialize(ids)
+
+    def exact_isbn_is_unique(self) -> bool:
+        """
+        Whether a 13-digit needle can only match the book whose isbn equals it.
+
+        True unless some stored ISBN is longer than 13 characters (and so
+        could contain the needle among other characters).
+        """
+        with self._lock:
+            return not self._long_isbns
+
+    def _materialize(self, ids: Set[int]) -> List[Dict]:
+        with self._lock:
+            books = [dict(self._books[book_id]) for book_id in ids if book_id in self._books]
+        available = get_available_copies([b["id"] for b in books])
+        for book in books:
+            if book["id"] in available:
+                book["available_copies"] = available[book["id"]]
+        books.sort(key=lambda b: (b.get("title") or "", b.get("id") or 0))
+        return books
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "books": len(self._books),
+                "trigrams": sum(len(p) for p in self._postings.values()),
+                "isbn_grams": len(self._isbn_postings),
+                "builds": self.builds,
+            }
+
+
+class PrefixIndex(_CatalogMirror):
+    """
+    Sorted arrays of distinct casefolded titles and authors for autocomplete.
+
+    A prefix selects a contiguous slice of each array, found with two
+    bisections, so a lookup costs O(log n + limit) however large the
+    catalog is. Built and kept fresh like CatalogIndex; inserted books
+    are added in place with insort rather than by rebuilding.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, List[str]] = {}
+        self._display: Dict[str, Dict[str, str]] = {}
+        super().__init__()
+
+    def _reset(self):
+        self._keys = {field: [] for field in SEARCH_FIELDS}
+        self._display = {field: {} for field in SEARCH_FIELDS}
+
+    def build(self, books: List[Dict]):
+        """Index a full catalog, replacing any previous contents."""
+        with self._lock:
+            self._reset()
+            for book in books:
+                for field in SEARCH_FIELDS:
+                    text = (book.get(field) or "").strip()
+                    if text:
+                        self._display[field].setdefault(text.casefold(), text)
+            for field in SEARCH_FIELDS:
+                self._keys[field] = sorted(self._display[field])
+            self.builds += 1
+
+    def _add(self, book: Dict):
+        for field in SEARCH_FIELDS:
+            text = (book.get(field) or "").strip()
+            folded = text.casefold()
+            if text and folded not in self._display[field]:
+                self._display[field][folded] = text
+                bisect.insort(self._keys[field], folded)
+
+    def _apply(self, event: str, payload):
+        # Only new books bring new titles and authors
+        if event == "insert":
+            self._add(payload)
+
+    def suggest(self, prefix: str, field: Optional[str] = None, limit: int = SUGGEST_LIMIT) -> List[Dict]:
+        """
+        Complete a prefix from the indexed titles and/or authors.
+
+        Args:
+            prefix: start of a title or author (compared casefolded)
+            field: "title", "author", or None for both
+            limit: maximum number of suggestions
+
+        Returns:
+            list: {"text", "field"} dicts in casefolded text order
+        """
+        needle = (prefix or "").strip().casefold()
+        if not needle or limit <= 0:
+            return []
+        fields = [field] if field in SEARCH_FIELDS else list(SEARCH_FIELDS)
+        with self._lock:
+            ranges = []
+            for name in fields:
+                keys = self._keys[name]
+                lo = bisect.bisect_left(keys, needle)
+                hi = bisect.bisect_left(keys, needle + PREFIX_END, lo)
+                ranges.append([(folded, name) for folded in keys[lo:min(hi, lo + limit)]])
+            merged = itertools.islice(heapq.merge(*ranges), limit)
+            return [{"text": self._display[name][folded], "field": name} for folded, name in merged]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {field: len(keys) for field, keys in self._keys.items()}
+            stats["builds"] = self.builds
+            return stats
+
+
+catalog_index = CatalogIndex()
+add_catalog_listener(catalog_index.on_catalog_change)
+
+prefix_index = PrefixIndex()
+add_catalog_listener(prefix_index.on_catalog_change)
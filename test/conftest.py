@@ -0,0 +1,35 @@
+import pytest
+from flask import Flask
+import database as db
+import services.library_service as svc
+from routes.api_routes import api_bp
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """A migrated, empty library database in tmp_path with its own connection pool; yields tmp_path."""
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "library.db"))
+    db.reset_pool()
+    db.init_database()
+    yield tmp_path
+    db.reset_pool()
+
+@pytest.fixture
+def api_client():
+    """A test client for the API blueprint; its request-scoped connection goes back to the pool on teardown."""
+    app = Flask(__name__)
+    db.init_app(app)
+    app.register_blueprint(api_bp)
+    return app.test_client()
+
+@pytest.fixture(autouse=True)
+def restore_search_backend():
+    """create_app() switches the process-wide search backend; put it back after each test."""
+    backend = svc.SEARCH_BACKEND
+    yield
+    svc.set_search_backend(backend)
+
+@pytest.fixture(autouse=True)
+def reset_service_caches():
+    """Service caches are keyed on the database path; tests swap loaders and connections under one path."""
+    yield
+    svc.reset_caches()
@@ -0,0 +1,56 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+import database as db
+
+@pytest.fixture
+def tmp_db(tmp_db):
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 2, 2)
+    return db.get_book_by_isbn("9780132350884")["id"]
+
+def borrow(patron_id, book_id):
+    now = datetime.now()
+    return db.borrow_book_atomic(patron_id, book_id, now, now + timedelta(days=14))
+
+def test_borrow_claims_copy_and_records_loan(tmp_db):
+    assert borrow("123456", tmp_db) == (True, "ok")
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 1
+    assert db.get_patron_borrow_count("123456") == 1
+
+def test_borrow_unavailable_leaves_no_record(tmp_db):
+    borrow("111111", tmp_db)
+    borrow("222222", tmp_db)
+    assert borrow("333333", tmp_db) == (False, "unavailable")
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 0
+    assert db.get_patron_borrow_count("333333") == 0
+
+def test_borrow_unknown_book_is_unavailable(tmp_db):
+    assert borrow("123456", 999) == (False, "unavailable")
+
+def test_concurrent_borrows_never_oversell(tmp_db):
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker(n):
+        barrier.wait()
+        results.append(borrow(f"{100000 + n}", tmp_db)[0])
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(True) == 2
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 0
+
+def test_return_closes_one_loan_and_releases_copy(tmp_db):
+    borrow("123456", tmp_db)
+    borrow("123456", tmp_db)
+    assert db.return_book_atomic("123456", tmp_db, datetime.now()) == (True, "ok")
+    assert db.get_patron_borrow_count("123456") == 1
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 1
+
+def test_return_without_loan(tmp_db):
+    assert db.return_book_atomic("123456", tmp_db, datetime.now()) == (False, "no_active_loan")
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 2
@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pytest
+import database as db
+
+@pytest.fixture
+def tmp_db(tmp_db):
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 2, 2)
+    return db.get_book_by_isbn("9780132350884")["id"]
+
+def test_repeat_lookups_hit_cache(tmp_db, monkeypatch):
+    before = db.get_book_cache_stats()
+    assert db.get_book_metadata(tmp_db)["title"] == "Clean Code"
+    # Hits are served without touching the database
+    monkeypatch.setattr(db, "get_db_connection", lambda: pytest.fail("metadata hit queried the database"))
+    for _ in range(3):
+        assert db.get_book_metadata(tmp_db)["title"] == "Clean Code"
+    stats = db.get_book_cache_stats()
+    assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (3, 1)
+
+def test_cache_holds_metadata_only(tmp_db):
+    assert set(db.get_book_metadata(tmp_db)) == set(db.BOOK_METADATA_COLUMNS)
+    assert set(db.get_book_cache().get(tmp_db)) == set(db.BOOK_METADATA_COLUMNS)
+
+def test_full_reads_bypass_cache(tmp_db):
+    db.get_book_metadata(tmp_db)
+    before = db.get_book_cache_stats()
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 2
+    assert db.get_book_by_isbn("9780132350884")["id"] == tmp_db
+    assert db.get_book_cache_stats()["hits"] == before["hits"]
+
+def test_availability_written_elsewhere_is_seen(tmp_db):
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 2
+    db.get_book_metadata(tmp_db)
+    # Another worker process borrows both copies, then returns one
+    other = sqlite3.connect(db.DATABASE)
+    other.execute("UPDATE books SET available_copies = 0 WHERE id = ?", (tmp_db,))
+    other.commit()
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 0
+    other.execute("UPDATE books SET available_copies = 1 WHERE id = ?", (tmp_db,))
+    other.commit()
+    other.close()
+    assert db.get_book_by_isbn("9780132350884")["available_copies"] == 1
+
+def test_book_deleted_elsewhere_is_not_returned(tmp_db):
+    db.get_book_metadata(tmp_db)
+    other = sqlite3.connect(db.DATABASE)
+    other.execute("DELETE FROM books WHERE id = ?", (tmp_db,))
+    other.commit()
+    other.close()
+    assert db.get_book_by_id(tmp_db) is None
+
+def test_cached_rows_are_copies(tmp_db):
+    db.get_book_metadata(tmp_db)["title"] = "Mutated"
+    assert db.get_book_metadata(tmp_db)["title"] == "Clean Code"
+
+def test_unknown_book_is_not_cached(tmp_db):
+    assert db.get_book_metadata(tmp_db + 1) is None
+    assert db.get_book_cache().get(tmp_db + 1) is None
+
+def test_own_availability_changes_are_seen(tmp_db):
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 2
+    now = datetime.now()
+    db.borrow_book_atomic("123456", tmp_db, now, now + timedelta(days=14))
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 1
+    db.return_book_atomic("123456", tmp_db, now)
+    assert db.get_book_by_id(tmp_db)["available_copies"] == 2
+    db.update_book_availability(tmp_db, -2)
+    assert db.get_book_by_isbn("9780132350884")["available_copies"] == 0
+
+def test_insert_invalidates_isbn_and_misses_are_not_cached(tmp_db):
+    assert db.get_book_by_isbn("9780451524935") is None
+    db.insert_book("1984", "George Orwell", "9780451524935", 1, 1)
+    assert db.get_book_by_isbn("9780451524935")["title"] == "1984"
+
+def test_lru_eviction():
+    cache = db.BookCache(max_size=2)
+    for n in range(3):
+        cache.put({"id": n, "isbn": str(n), "title": f"t{n}"})
+    assert cache.get(0) is None
+    assert cache.get_by_isbn("2")["id"] == 2
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+
+def test_stale_read_is_not_cached_after_invalidation():
+    cache = db.BookCache()
+    generation = cache.generation
+    cache.invalidate(1)
+    cache.put({"id": 1, "isbn": "1", "available_copies": 5}, generation)
+    assert cache.get(1) is None
+
+def test_cache_is_per_database(tmp_db, tmp_path, monkeypatch):
+    db.get_book_metadata(tmp_db)
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "other.db"))
+    db.init_database()
+    assert db.get_book_metadata(tmp_db) is None
@@ -0,0 +1,79 @@
+import json
+import database as db
+import cli
+from services.catalog_import import import_books_from_file
+
+def write_csv(path, rows):
+    path.write_text("title,author,isbn,total_copies\n" + "".join(",".join(r) + "\n" for r in rows))
+    return str(path)
+
+def test_csv_import_in_batches(tmp_db):
+    rows = [(f"Book {n}", "Author", f"{9780000000000 + n}", "2") for n in range(25)]
+    report = import_books_from_file(write_csv(tmp_db / "books.csv", rows), batch_size=10)
+    assert report["status"] == "ok"
+    assert report["processed"] == 25 and report["inserted"] == 25 and report["errors"] == []
+    book = db.get_book_by_isbn("9780000000007")
+    assert book["title"] == "Book 7" and book["available_copies"] == 2
+
+def test_reports_invalid_rows_with_r1_messages(tmp_db):
+    rows = [("", "Author", "9780000000001", "1"),
+            ("Title", "Author", "123", "1"),
+            ("Title", "Author", "9780000000003", "zero"),
+            ("Good", "Author", "9780000000004", "1")]
+    report = import_books_from_file(write_csv(tmp_db / "bad.csv", rows))
+    assert report["inserted"] == 1 and report["invalid"] == 3
+    assert [(e["line"], e["message"]) for e in report["errors"]] == [
+        (2, "Title is required."),
+        (3, "ISBN must be exactly 13 digits."),
+        (4, "Total copies must be a positive integer."),
+    ]
+
+def test_duplicates_in_catalog_and_file(tmp_db):
+    db.insert_book("Existing", "Author", "9780000000001", 1, 1)
+    rows = [("Dup of existing", "A", "9780000000001", "1"),
+            ("New", "A", "9780000000002", "1"),
+            ("New again", "A", "9780000000002", "1"),
+            ("Next batch", "A", "9780000000002", "1")]
+    report = import_books_from_file(write_csv(tmp_db / "dups.csv", rows), batch_size=3)
+    assert report["inserted"] == 1 and report["duplicates"] == 3
+    assert db.get_book_by_isbn("9780000000001")["title"] == "Existing"
+    assert db.get_book_by_isbn("9780000000002")["title"] == "New"
+
+def test_jsonl_import(tmp_db):
+    path = tmp_db / "books.jsonl"
+    path.write_text(json.dumps({"title": "Dune", "author": "Herbert", "isbn": "9780441013593", "total_copies": 3})
+                    + "\n\nnot json\n[1, 2]\n")
+    report = import_books_from_file(str(path))
+    assert report["inserted"] == 1 and report["invalid"] == 2
+    assert [e["line"] for e in report["errors"]] == [3, 4]
+
+def test_unsupported_format(tmp_db):
+    report = import_books_from_file(str(tmp_db / "books.xml"))
+    assert report["status"] == "error"
+
+def test_cli_import_books(tmp_db, monkeypatch, capsys):
+    path = write_csv(tmp_db / "cli.csv", [("CLI Book", "Author", "9780000000009", "1")])
+    code = cli.main(["--database", db.DATABASE, "import-books", path])
+    assert code == 0
+    assert "inserted=1" in capsys.readouterr().out
+    assert db.get_book_by_isbn("9780000000009") is not None
+
+def test_jsonl_rows_checked_like_add_book_form(tmp_db):
+    rows = [
+        {"title": "Fractional", "author": "A", "isbn": "9780000000001", "total_copies": 2.9},
+        {"title": "Boolean", "author": "A", "isbn": "9780000000002", "total_copies": True},
+        {"title": 123, "author": "A", "isbn": "9780000000003", "total_copies": 1},
+        {"title": "Numeric ISBN", "author": "A", "isbn": 9780000000004, "total_copies": 1},
+        {"title": "Text copies", "author": "A", "isbn": "9780000000005", "total_copies": "2"},
+    ]
+    path = tmp_db / "typed.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    report = import_books_from_file(str(path))
+    assert report["inserted"] == 1
+    assert [(e["line"], e["message"]) for e in report["errors"]] == [
+        (1, "Total copies must be a positive integer."),
+        (2, "Total copies must be a positive integer."),
+        (3, "Title must be text."),
+        (4, "ISBN must be exactly 13 digits."),
+    ]
+    assert db.get_book_by_isbn("9780000000005")["total_copies"] == 2
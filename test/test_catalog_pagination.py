@@ -0,0 +1,53 @@
+import pytest
+import database as db
+import services.library_service as svc
+from app import create_app
+
+@pytest.fixture
+def tmp_db(tmp_db):
+    # Two books share a title so (title, id) ties are exercised
+    titles = ["Alpha", "Bravo", "Bravo", "Charlie", "Delta", "Echo", "Foxtrot"]
+    for n, title in enumerate(titles):
+        db.insert_book(title, "Author", f"{9780000000000 + n}", 1, 1)
+
+def walk(page_size):
+    page = svc.get_catalog_page(None, page_size)
+    pages = [page]
+    while page["next_cursor"]:
+        page = svc.get_catalog_page(page["next_cursor"], page_size)
+        pages.append(page)
+    return pages
+
+def test_keyset_pages_cover_catalog_in_order(tmp_db):
+    pages = walk(3)
+    ids = [b["id"] for p in pages for b in p["books"]]
+    assert ids == [b["id"] for b in sorted(db.get_all_books(), key=lambda b: (b["title"], b["id"]))]
+    assert [len(p["books"]) for p in pages] == [3, 3, 1]
+    assert pages[0]["prev_cursor"] is None and pages[-1]["next_cursor"] is None
+
+def test_prev_cursor_returns_previous_page(tmp_db):
+    first, second, _ = walk(3)
+    back = svc.get_catalog_page(second["prev_cursor"], 3)
+    assert back["books"] == first["books"]
+    assert back["prev_cursor"] is None
+
+def test_page_size_is_clamped(tmp_db):
+    assert svc.get_catalog_page(None, 0)["page_size"] == 1
+    assert svc.get_catalog_page(None, 10_000)["page_size"] == svc.CATALOG_MAX_PAGE_SIZE
+
+def test_invalid_cursor_raises(tmp_db):
+    with pytest.raises(ValueError):
+        svc.get_catalog_page("not-a-cursor", 3)
+
+def test_books_api_and_catalog_page(tmp_db):
+    client = create_app().test_client()
+    data = client.get("/api/books?limit=4").get_json()
+    assert data["count"] == 4 and data["prev_cursor"] is None
+    rest = client.get(f"/api/books?limit=4&cursor={data['next_cursor']}").get_json()
+    assert rest["count"] == 3 and rest["next_cursor"] is None
+    assert client.get("/api/books?cursor=bogus").status_code == 400
+
+    html = client.get("/catalog?page_size=10").get_data(as_text=True)
+    assert "Foxtrot" in html and "Next" not in html
+    html = client.get(f"/catalog?page_size=25&cursor={data['next_cursor']}").get_data(as_text=True)
+    assert "Echo" in html and "Alpha" not in html
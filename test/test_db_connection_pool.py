@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+import database as db
+
+def test_helpers_reuse_pooled_connection(tmp_db):
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 2, 2)
+    book = db.get_book_by_isbn("9780132350884")
+    assert db.get_book_by_id(book["id"])["title"] == "Clean Code"
+    assert db.get_patron_borrow_count("123456") == 0
+
+    stats = db.get_connection_stats()
+    assert stats["opened"] == 1
+    assert stats["checkouts"] >= 4
+    assert stats["in_use"] == 0
+
+def test_close_releases_only_once(tmp_db):
+    conn = db.get_db_connection()
+    conn.close()
+    conn.close()
+    assert db.get_connection_stats()["idle"] == 1
+
+def test_release_rolls_back_uncommitted_work(tmp_db):
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) VALUES ('A', 'B', '1111111111111', 1, 1)")
+    conn.close()
+    assert db.get_book_by_isbn("1111111111111") is None
+
+def test_pool_is_bounded(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "bounded.db"), max_size=1, timeout=0.05)
+    conn, opened = pool.acquire()
+    assert opened is True
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    pool.release(conn)
+    again, opened = pool.acquire()
+    assert again is conn and opened is False
+
+def test_one_connection_per_request(tmp_db):
+    app = Flask(__name__)
+    app.config["DB_CONNECTION_STATS"] = True
+    db.init_app(app)
+
+    @app.route("/probe")
+    def probe():
+        db.get_all_books()
+        db.get_book_by_id(1)
+        db.get_patron_borrow_count("123456")
+        return db.get_request_connection_stats()
+
+    client = app.test_client()
+    resp = client.get("/probe")
+    assert resp.get_json() == {"calls": 3, "opened": 1}
+    assert resp.headers["X-DB-Connections"] == "calls=3, opened=1"
+
+    resp = client.get("/probe")
+    assert resp.get_json() == {"calls": 3, "opened": 0}
+    assert db.get_connection_stats()["in_use"] == 0
+
+def test_failed_write_does_not_poison_request_connection(tmp_db):
+    app = Flask(__name__)
+    db.init_app(app)
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 2, 2)
+    book_id = db.get_book_by_isbn("9780132350884")["id"]
+
+    with app.app_context():
+        # Duplicate ISBN: the INSERT fails after the implicit BEGIN
+        assert db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 2, 2) is False
+        now = datetime.now()
+        assert db.borrow_book_atomic("123456", book_id, now, now + timedelta(days=14)) == (True, "ok")
+
+def test_close_rolls_back_request_transaction(tmp_db):
+    app = Flask(__name__)
+    db.init_app(app)
+    with app.app_context():
+        conn = db.get_db_connection()
+        conn.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                     "VALUES ('A', 'B', '1111111111111', 1, 1)")
+        conn.close()
+        assert not conn.in_transaction
+        assert db.get_book_by_isbn("1111111111111") is None
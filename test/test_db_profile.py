@@ -0,0 +1,53 @@
+import pytest
+from flask import Flask
+import database as db
+
+@pytest.fixture
+def profile_db(tmp_path, monkeypatch):
+    # Not the shared tmp_db: the database must not exist before the profile is chosen
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "library.db"))
+    db.configure_profile("performance")
+    yield
+    db.configure_profile("performance")
+
+def pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+def test_performance_profile_applied(profile_db):
+    db.init_database()
+    conn = db.get_db_connection()
+    try:
+        assert pragma(conn, "journal_mode") == "wal"
+        assert pragma(conn, "synchronous") == 1  # NORMAL
+        assert pragma(conn, "cache_size") == -20000
+        assert pragma(conn, "temp_store") == 2  # MEMORY
+        assert pragma(conn, "busy_timeout") == 5000
+    finally:
+        conn.close()
+
+def test_default_profile_keeps_sqlite_defaults(profile_db):
+    db.configure_profile("default")
+    db.init_database()
+    conn = db.get_db_connection()
+    try:
+        assert pragma(conn, "journal_mode") == "delete"
+        assert pragma(conn, "synchronous") == 2  # FULL
+    finally:
+        conn.close()
+
+def test_profile_selected_from_app_config(profile_db):
+    app = Flask(__name__)
+    app.config["DB_PROFILE"] = "default"
+    app.config["DB_PRAGMAS"] = {"busy_timeout": 250}
+    db.init_app(app)
+    assert db.DB_PRAGMAS == {"busy_timeout": 250}
+    with app.app_context():
+        assert pragma(db.get_db_connection(), "busy_timeout") == 250
+
+def test_rejects_unknown_profile_and_pragmas():
+    with pytest.raises(ValueError):
+        db.resolve_profile("turbo")
+    with pytest.raises(ValueError):
+        db.resolve_profile("default", {"foreign_keys": "ON"})
+    with pytest.raises(ValueError):
+        db.resolve_profile("default", {"synchronous": "OFF; DROP TABLE books"})
@@ -0,0 +1,91 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+import database as db
+from services.due_scheduler import DueDateScheduler, LogSink, MailSpoolSink, overdue_at
+
+NOW = datetime(2025, 3, 1, 9, 30)
+
+@pytest.fixture
+def tmp_db(tmp_db):
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 5, 5)
+    return tmp_db
+
+def loan(record_id, due, patron="123456", book_id=1):
+    return {"record_id": record_id, "patron_id": patron, "book_id": book_id, "due_date": due.isoformat()}
+
+def test_overdue_starts_the_day_after_due():
+    assert overdue_at(NOW.isoformat()) == datetime(2025, 3, 2)
+
+def test_events_fire_in_due_order_only_when_due():
+    events = []
+    sched = DueDateScheduler([events.append], clock=lambda: NOW)
+    for record_id, days in [(1, 3), (2, 1), (3, 2)]:
+        sched.schedule(loan(record_id, NOW + timedelta(days=days)))
+    assert sched.next_due() == datetime(2025, 3, 3)
+    assert sched.run_due(NOW) == []
+    assert [e["record_id"] for e in sched.run_due(NOW + timedelta(days=3))] == [2, 3]
+    assert [e["record_id"] for e in events] == [2, 3]
+    assert sched.stats() == {"pending": 1, "heap": 1, "emitted": 2}
+
+def test_return_cancels_and_duplicates_ignored():
+    events = []
+    sched = DueDateScheduler([events.append])
+    sched.on_loan_change("borrow", loan(1, NOW))
+    sched.on_loan_change("borrow", loan(1, NOW))
+    sched.on_loan_change("borrow", loan(2, NOW))
+    sched.on_loan_change("return", loan(1, NOW))
+    assert [e["record_id"] for e in sched.run_due(NOW + timedelta(days=2))] == [2]
+    assert sched.next_due() is None
+
+def test_failing_sink_does_not_block_others():
+    events = []
+    def broken(event):
+        raise RuntimeError("smtp down")
+    sched = DueDateScheduler([broken, events.append])
+    sched.schedule(loan(1, NOW))
+    sched.run_due(NOW + timedelta(days=1))
+    assert len(events) == 1
+
+def test_seed_and_listen_to_circulation(tmp_db):
+    now = datetime.now()
+    db.borrow_book_atomic("111111", 1, now - timedelta(days=30), now - timedelta(days=16))
+    db.borrow_book_atomic("222222", 1, now, now + timedelta(days=14))
+    events = []
+    sched = DueDateScheduler([events.append])
+    db.add_loan_listener(sched.on_loan_change)
+    try:
+        # Already-overdue loans are not re-announced on startup
+        assert sched.seed() == 1
+        db.borrow_book_atomic("333333", 1, now, now + timedelta(days=7))
+        db.return_book_atomic("222222", 1, now)
+        fired = sched.run_due(now + timedelta(days=20))
+    finally:
+        db.remove_loan_listener(sched.on_loan_change)
+    assert [e["patron_id"] for e in fired] == ["333333"]
+
+def test_worker_wakes_for_earlier_deadline():
+    fired = threading.Event()
+    clock = [NOW]
+    sched = DueDateScheduler([lambda e: fired.set()], clock=lambda: clock[0])
+    sched.seed = lambda since=None: 0
+    sched.start()
+    try:
+        sched.schedule(loan(1, NOW + timedelta(days=30)))
+        clock[0] = NOW + timedelta(days=2)
+        # A loan that is already overdue wakes the sleeping worker immediately
+        sched.schedule(loan(2, NOW))
+        assert fired.wait(2)
+    finally:
+        sched.stop()
+    assert sched.stats()["emitted"] == 1
+
+def test_sinks(tmp_path, caplog):
+    event = dict(loan(7, NOW), overdue_at=overdue_at(NOW.isoformat()).isoformat())
+    with caplog.at_level("WARNING"):
+        LogSink()(event)
+    assert "Loan 7 overdue" in caplog.text
+    MailSpoolSink(str(tmp_path / "spool"))(event)
+    (mail,) = (tmp_path / "spool").iterdir()
+    assert mail.name == "2025-03-02-7.eml"
+    assert "X-Patron-ID: 123456" in mail.read_text()
@@ -0,0 +1,66 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import services.library_service as svc
+from services.fee_policy import FeePolicy, get_fee_policy, set_fee_policy
+
+def r5_fee(days):
+    """The rule as R5 states it, written out longhand."""
+    if days <= 0:
+        return 0.0
+    return round(min(min(days, 7) * 0.50 + max(0, days - 7) * 1.00, 15.00), 2)
+
+def test_default_policy_is_r5():
+    policy = FeePolicy()
+    assert [policy.fee(d) for d in range(-3, 60)] == [r5_fee(d) for d in range(-3, 60)]
+    assert policy.fee(10_000) == 15.0 and policy.max_fee == 15.0
+    # The table stops where the cap is reached: 7 * 0.50 + 12 * 1.00 >= 15
+    assert len(policy._table) == 20
+
+def test_batch_and_array_agree_with_scalar():
+    np = pytest.importorskip("numpy")
+    policy = FeePolicy(first_rate=0.25, later_rate=0.75, tier_days=5, cap=9.0, grace_days=3)
+    days = list(range(-2, 40)) + [5000]
+    expected = [policy.fee(d) for d in days]
+    assert policy.fees(days) == expected
+    assert policy.fee_array(np.array(days)).tolist() == expected
+
+def test_grace_and_uncapped_growth():
+    policy = FeePolicy(grace_days=2)
+    assert [policy.fee(d) for d in (1, 2, 3, 9, 10)] == [0.0, 0.0, 0.5, 3.5, 4.5]
+    flat = FeePolicy(later_rate=0.0, cap=100.0)
+    assert flat.fee(7) == flat.fee(500) == 3.5 and flat.max_fee == 3.5
+    huge = FeePolicy(cap=1e9)
+    assert huge.fee(5000) == 3.5 + 4993.0
+
+def test_rejects_negative_settings():
+    with pytest.raises(ValueError):
+        FeePolicy(cap=-1)
+
+@pytest.fixture
+def policy():
+    set_fee_policy(FeePolicy(cap=5.0))
+    yield get_fee_policy()
+    set_fee_policy()
+
+def test_refund_cap_follows_policy(policy):
+    ok, msg = svc.refund_late_fee_payment("txn_1", 6.0)
+    assert not ok and msg == "Refund amount exceeds maximum late fee."
+
+def thirty_days_overdue():
+    now = datetime.now()
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, author TEXT, isbn TEXT)")
+    conn.execute("""CREATE TABLE borrow_records (id INTEGER PRIMARY KEY, patron_id TEXT, book_id INTEGER,
+                    borrow_date TEXT, due_date TEXT, return_date TEXT)""")
+    conn.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES (?, 1, ?, ?)",
+                 ("123456", (now - timedelta(days=44)).isoformat(), (now - timedelta(days=30)).isoformat()))
+    return conn
+
+def test_service_fees_follow_policy(policy, monkeypatch):
+    monkeypatch.setattr(svc, "get_db_connection", thirty_days_overdue)
+    assert svc.calculate_late_fee_for_book("123456", 1)["fee_amount"] == 5.0
+    report = svc.get_patron_status_report("123456")
+    assert report["summary"]["total_accrued_fee"] == 5.0
+    assert report["active_loans"][0]["accrued_fee"] == 5.0
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+import pytest
+import database as db
+import cli
+from services import fee_sweep
+from services.fee_policy import FeePolicy
+from services.library_service import calculate_late_fee_for_book
+
+def add_loan(patron_id, book_id, days_ago_due, returned=False):
+    now = datetime.now()
+    conn = db.get_db_connection()
+    try:
+        conn.execute(
+            "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) VALUES (?, ?, ?, ?, ?)",
+            (patron_id, book_id, (now - timedelta(days=days_ago_due + 14)).isoformat(),
+             (now - timedelta(days=days_ago_due)).isoformat(), now.isoformat() if returned else None),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+@pytest.fixture
+def loans(tmp_db):
+    # Due in the future, today, inside the first week, past it, and past the cap
+    for book_id, days in enumerate([-3, 0, 1, 7, 8, 12, 22, 23, 60], start=1):
+        add_loan(f"{100000 + book_id % 3:06d}", book_id, days)
+    add_loan("100001", 50, 30, returned=True)
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_sweep_matches_per_loan_calculation(loans, fast):
+    if fast:
+        pytest.importorskip("numpy")
+    sweep = fee_sweep.sweep_late_fees(vectorized=fast)
+    assert len(sweep["loans"]) == 9 and sweep["skipped"] == 0
+    for loan in sweep["loans"]:
+        single = calculate_late_fee_for_book(loan["patron_id"], loan["book_id"])
+        assert (loan["days_overdue"], loan["fee_amount"], loan["due_date"]) == \
+               (single["days_overdue"], single["fee_amount"], single["due_date"])
+
+def test_vectorized_and_scalar_agree(loans):
+    pytest.importorskip("numpy")
+    fast = fee_sweep.sweep_late_fees(vectorized=True)
+    slow = fee_sweep.sweep_late_fees(vectorized=False)
+    assert fast == slow
+    assert sum(l["fee_amount"] for l in fast["loans"]) == fast["total_fee"]
+    assert set(fast["patrons"]) == {"100000", "100001", "100002"}
+
+def test_sweep_uses_given_policy(loans):
+    pytest.importorskip("numpy")
+    policy = FeePolicy(grace_days=2, cap=5.0)
+    for fast in (True, False):
+        sweep = fee_sweep.sweep_late_fees(vectorized=fast, policy=policy)
+        fees = {l["book_id"]: l["fee_amount"] for l in sweep["loans"]}
+        assert (fees[3], fees[5], fees[9]) == (0.0, 3.0, 5.0)
+
+def test_unreadable_due_dates_are_skipped(loans):
+    conn = db.get_db_connection()
+    conn.execute("UPDATE borrow_records SET due_date = 'soon' WHERE book_id = 9")
+    # A readable date followed by junk is still unreadable to fromisoformat
+    conn.execute("UPDATE borrow_records SET due_date = '2025-02-26 nonsense' WHERE book_id = 5")
+    conn.commit()
+    conn.close()
+    for fast in (True, False):
+        sweep = fee_sweep.sweep_late_fees(vectorized=fast)
+        assert sweep["skipped"] == 2 and len(sweep["loans"]) == 7
+
+def test_cli_writes_csv(loans, capsys):
+    assert cli.main(["--database", db.DATABASE, "sweep-late-fees"]) == 0
+    out, err = capsys.readouterr()
+    assert out.splitlines()[0] == "record_id,patron_id,book_id,due_date,days_overdue,fee_amount"
+    assert len(out.splitlines()) == 10
+    assert "loans=9" in err
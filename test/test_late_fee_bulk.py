@@ -0,0 +1,84 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import services.library_service as svc
+
+def make_db():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE borrow_records (
+        id INTEGER PRIMARY KEY, patron_id TEXT, book_id INTEGER,
+        borrow_date TEXT, due_date TEXT, return_date TEXT)""")
+    return conn
+
+def seed(conn, patron, book_id, borrowed_days_ago, returned_days_ago=None):
+    now = datetime.now()
+    borrowed_at = now - timedelta(days=borrowed_days_ago)
+    returned_at = None if returned_days_ago is None else (now - timedelta(days=returned_days_ago)).isoformat()
+    conn.execute("INSERT INTO borrow_records(patron_id,book_id,borrow_date,due_date,return_date) VALUES(?,?,?,?,?)",
+                 (patron, book_id, borrowed_at.isoformat(), (borrowed_at + timedelta(days=14)).isoformat(), returned_at))
+
+@pytest.fixture
+def conns(monkeypatch):
+    """A fresh connection per call (the service closes what it gets), counting queries."""
+    conn = make_db()
+    seed(conn, "123456", 1, 19)
+    seed(conn, "123456", 1, 40, returned_days_ago=20)
+    seed(conn, "123456", 2, 26, returned_days_ago=0)
+    seed(conn, "123456", 3, 5)
+    seed(conn, "654321", 1, 60)
+    conn.commit()
+    calls = []
+
+    class Conn:
+        def execute(self, *args):
+            calls.append(args[0])
+            return conn.execute(*args)
+        def close(self):
+            pass
+
+    monkeypatch.setattr(svc, "get_db_connection", Conn)
+    return calls
+
+PAIRS = [("123456", 1), ("123456", 2), ("654321", 1), ("123456", 9), ("12", 1), ("123456", 3)]
+
+def test_bulk_matches_single_calls_in_one_query(conns):
+    bulk = svc.calculate_late_fees_bulk(PAIRS)
+    assert len(conns) == 1
+    single = [svc.calculate_late_fee_for_book(p, b) for p, b in PAIRS]
+    for got, want in zip(bulk, single):
+        got.pop("calculated_at", None), want.pop("calculated_at", None)
+        assert got == want
+    assert [r["status"] for r in bulk] == ["ok", "ok", "ok", "error", "error", "ok"]
+    assert bulk[0]["fee_amount"] == 2.5 and bulk[2]["fee_amount"] == 15.0
+
+def test_whole_patron(conns):
+    results = svc.calculate_late_fees_bulk(patron_id="123456")
+    assert len(conns) == 1
+    assert [r["book_id"] for r in results] == [1, 2, 3]
+    assert [r["days_overdue"] for r in results] == [5, 12, 0]
+    assert svc.calculate_late_fees_bulk(patron_id="abc")[0]["status"] == "error"
+
+def test_empty_batch_runs_no_query(conns):
+    assert svc.calculate_late_fees_bulk([]) == []
+    assert svc.calculate_late_fees_bulk([("bad", 1)])[0]["status"] == "error"
+    assert conns == []
+
+def test_needs_pairs_or_patron(conns):
+    with pytest.raises(ValueError):
+        svc.calculate_late_fees_bulk()
+    with pytest.raises(ValueError):
+        svc.calculate_late_fees_bulk([("123456", 1)], patron_id="123456")
+
+def test_batch_endpoints(conns, monkeypatch, api_client):
+    body = {"loans": [{"patron_id": p, "book_id": b} for p, b in PAIRS]}
+    resp = api_client.post("/api/late_fee/batch", json=body).get_json()
+    assert resp["count"] == 6 and resp["results"][1]["fee_amount"] == 8.5
+    assert api_client.post("/api/late_fee/batch", json={"loans": [{"patron_id": 1, "book_id": 1}]}).status_code == 400
+    monkeypatch.setattr("routes.api_routes.LATE_FEE_BATCH_MAX_LOANS", 2)
+    assert api_client.post("/api/late_fee/batch", json=body).status_code == 400
+    resp = api_client.get("/api/late_fee/654321").get_json()
+    assert resp["count"] == 1 and resp["results"][0]["days_overdue"] == 46
+    resp = api_client.get("/api/late_fee/12ab")
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "Invalid patron ID. Must be exactly 6 digits."}
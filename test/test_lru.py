@@ -0,0 +1,30 @@
+from lru import LRUCache
+
+def test_evicts_least_recently_used():
+    evicted = []
+    cache = LRUCache(max_size=2, on_evict=lambda key, value: evicted.append(key))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert evicted == ["b"] and cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "evictions": 1, "size": 2, "max_size": 2}
+
+def test_ttl_and_check_drop_entries():
+    now = [0.0]
+    cache = LRUCache(max_size=4, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("b", check=lambda value: value == 3) is None
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert (cache.expirations, cache.rejections, cache.misses, len(cache)) == (1, 1, 2, 0)
+
+def test_zero_size_disables_and_pop_is_not_a_lookup():
+    cache = LRUCache(max_size=0)
+    cache.put("a", 1)
+    assert len(cache) == 0
+    cache.configure(max_size=1)
+    cache.put("a", 1)
+    assert cache.pop("a") == 1 and cache.pop("a") is None
+    assert cache.hits == cache.misses == 0
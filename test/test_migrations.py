@@ -0,0 +1,82 @@
+import sqlite3
+import migrations
+
+def connect(path):
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def index_names(conn):
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+    return {r["name"] for r in rows}
+
+def query_plan(conn, sql, params=()):
+    return " ".join(r["detail"] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+def test_fresh_database_reaches_latest_version(tmp_path):
+    conn = connect(tmp_path / "fresh.db")
+    applied = migrations.migrate(conn)
+    assert applied == [v for v, _, _ in migrations.MIGRATIONS]
+    assert migrations.get_schema_version(conn) == migrations.LATEST_VERSION
+    assert {"idx_borrow_records_active", "idx_borrow_records_patron_return", "idx_books_title"} <= index_names(conn)
+
+def test_migrate_is_idempotent(tmp_path):
+    conn = connect(tmp_path / "again.db")
+    migrations.migrate(conn)
+    assert migrations.migrate(conn) == []
+
+def test_concurrent_start_skips_committed_migrations(tmp_path, monkeypatch):
+    first, second = connect(tmp_path / "race.db"), connect(tmp_path / "race.db")
+    real = migrations.get_schema_version
+    raced = []
+    def stale_then_real(conn):
+        # second reads user_version, then first migrates before second takes the lock
+        if conn is second and not raced:
+            raced.append(migrations.migrate(first))
+            return 0
+        return real(conn)
+    monkeypatch.setattr(migrations, "get_schema_version", stale_then_real)
+    assert migrations.migrate(second) == []
+    assert real(second) == migrations.LATEST_VERSION
+    assert migrations.migrate(second) == []
+
+def test_legacy_database_keeps_data(tmp_path):
+    conn = connect(tmp_path / "legacy.db")
+    conn.executescript("""
+        CREATE TABLE books(id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, author TEXT NOT NULL,
+            isbn TEXT UNIQUE NOT NULL, total_copies INTEGER NOT NULL, available_copies INTEGER NOT NULL);
+        CREATE TABLE borrow_records(id INTEGER PRIMARY KEY AUTOINCREMENT, patron_id TEXT NOT NULL,
+            book_id INTEGER NOT NULL, borrow_date TEXT NOT NULL, due_date TEXT NOT NULL, return_date TEXT);
+        INSERT INTO books(title, author, isbn, total_copies, available_copies) VALUES ('1984', 'Orwell', '9780451524935', 1, 1);
+    """)
+    assert migrations.get_schema_version(conn) == 0
+    migrations.migrate(conn)
+    assert conn.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 1
+    assert migrations.get_schema_version(conn) == migrations.LATEST_VERSION
+
+def test_hot_queries_use_indexes(tmp_path):
+    conn = connect(tmp_path / "plan.db")
+    migrations.migrate(conn)
+    for sql, params in [
+        ("SELECT COUNT(*) FROM borrow_records WHERE patron_id = ? AND return_date IS NULL", ("123456",)),
+        ("UPDATE borrow_records SET return_date = ? WHERE patron_id = ? AND book_id = ? AND return_date IS NULL",
+         ("2025-01-01", "123456", 1)),
+        ("SELECT COUNT(*) FROM borrow_records WHERE patron_id = ?", ("123456",)),
+    ]:
+        plan = query_plan(conn, sql, params)
+        assert "USING" in plan and "SCAN" not in plan, plan
+    plan = query_plan(conn, "SELECT * FROM books ORDER BY title")
+    assert "idx_books_title" in plan and "TEMP B-TREE" not in plan
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    conn = connect(tmp_path / "broken.db")
+    migrations.migrate(conn, target=1)
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:1] + [
+        (2, "broken", ["CREATE INDEX idx_ok ON books (isbn)", "CREATE INDEX idx_bad ON nope (x)"]),
+    ])
+    try:
+        migrations.migrate(conn, target=2)
+    except sqlite3.OperationalError:
+        pass
+    assert migrations.get_schema_version(conn) == 1
+    assert "idx_ok" not in index_names(conn)
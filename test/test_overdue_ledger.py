@@ -0,0 +1,128 @@
+from datetime import date, datetime, timedelta
+import pytest
+import database as db
+import cli
+from services.fee_policy import FeePolicy, set_fee_policy
+import services.library_service as svc
+from services.overdue_ledger import get_patron_overdue, refresh_overdue_ledger
+
+TODAY = date(2025, 3, 1)
+
+@pytest.fixture
+def tmp_db(tmp_db):
+    yield tmp_db
+    set_fee_policy()
+
+def add_loan(patron_id, book_id, due):
+    conn = db.get_db_connection()
+    try:
+        cur = conn.execute(
+            "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES (?, ?, ?, ?)",
+            (patron_id, book_id, datetime.combine(due - timedelta(days=14), datetime.min.time()).isoformat(),
+             datetime.combine(due, datetime.min.time()).replace(hour=15).isoformat()))
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+def days_before(n):
+    return TODAY - timedelta(days=n)
+
+def ledger_entry(patron_id, book_id, day):
+    return next((e for e in get_patron_overdue(patron_id, day) if e["book_id"] == book_id), None)
+
+def test_first_refresh_builds_ledger(tmp_db):
+    add_loan("100001", 1, days_before(3))
+    add_loan("100001", 2, days_before(40))
+    add_loan("100002", 1, days_before(-2))
+    add_loan("100002", 3, TODAY)
+    result = refresh_overdue_ledger(TODAY)
+    assert result["full"] and result["added"] == 2 and result["size"] == 2
+    entry = ledger_entry("100001", 1, TODAY)
+    assert entry == {"patron_id": "100001", "book_id": 1, "due_date": days_before(3).isoformat(),
+                     "days_overdue": 3, "fee_amount": 1.5}
+    assert ledger_entry("100002", 3, TODAY) is None
+
+def test_incremental_refresh_touches_only_changed_loans(tmp_db):
+    add_loan("100001", 1, days_before(3))
+    add_loan("100001", 2, days_before(40))
+    add_loan("100002", 1, days_before(-2))
+    refresh_overdue_ledger(TODAY)
+
+    later = TODAY + timedelta(days=5)
+    result = refresh_overdue_ledger(later)
+    # The loan that crossed its due date is added; only the uncapped fee is rewritten
+    assert not result["full"] and result["added"] == 1 and result["updated"] == 1
+    assert ledger_entry("100001", 1, later)["fee_amount"] == 4.5
+    assert ledger_entry("100001", 2, later)["days_overdue"] == 45
+    assert ledger_entry("100002", 1, later)["fee_amount"] == 1.5
+    assert refresh_overdue_ledger(later) == {"as_of": later.isoformat(), "full": False,
+                                             "added": 0, "updated": 0, "size": 3}
+
+def test_return_removes_row(tmp_db):
+    add_loan("100001", 1, days_before(3))
+    refresh_overdue_ledger(TODAY)
+    assert db.update_borrow_record_return_date("100001", 1, datetime.now())
+    assert ledger_entry("100001", 1, TODAY) is None
+
+def test_reads_refresh_stale_ledger(tmp_db):
+    refresh_overdue_ledger(TODAY)
+    # Recorded after the refresh, already overdue: picked up by record id
+    add_loan("100003", 7, days_before(10))
+    assert [e["book_id"] for e in get_patron_overdue("100003", TODAY)] == [7]
+
+def test_policy_change_rebuilds(tmp_db):
+    add_loan("100001", 1, days_before(30))
+    refresh_overdue_ledger(TODAY)
+    set_fee_policy(FeePolicy(cap=5.0))
+    assert ledger_entry("100001", 1, TODAY)["fee_amount"] == 5.0
+
+def test_matches_fee_policy_over_time(tmp_db):
+    dues = [days_before(n) for n in (0, 1, 6, 7, 8, 19, 20, 90)]
+    for book_id, due in enumerate(dues, start=1):
+        add_loan("100001", book_id, due)
+    policy = FeePolicy()
+    for step in range(0, 30, 3):
+        day = TODAY + timedelta(days=step)
+        refresh_overdue_ledger(day)
+        for book_id, due in enumerate(dues, start=1):
+            entry = ledger_entry("100001", book_id, day)
+            days_over = (day - due).days
+            assert (entry["fee_amount"] if entry else 0.0) == policy.fee(days_over)
+
+def test_ledger_and_fee_lookup_read_due_dates_alike(tmp_db):
+    add_loan("100001", 1, date.today() - timedelta(days=9))
+    due = (date.today() - timedelta(days=4)).isoformat()
+    conn = db.get_db_connection()
+    try:
+        conn.executemany(
+            "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES ('100001', ?, ?, ?)",
+            [(2, "2025-01-01T10:00:00", due + " 09:30:00"), (3, "2025-01-01T10:00:00", due + " nonsense")])
+        conn.commit()
+    finally:
+        conn.close()
+
+    ledger = {e["book_id"]: e for e in get_patron_overdue("100001")}
+    assert sorted(ledger) == [1, 2]
+    for book_id, entry in ledger.items():
+        fee = svc.calculate_late_fee_for_book("100001", book_id)
+        assert (fee["days_overdue"], fee["fee_amount"]) == (entry["days_overdue"], entry["fee_amount"])
+    assert svc.calculate_late_fee_for_book("100001", 3)["status"] == "error"
+
+def test_api_and_cli(tmp_db, capsys, api_client):
+    add_loan("100001", 1, date.today() - timedelta(days=10))
+    assert cli.main(["--database", db.DATABASE, "refresh-overdue"]) == 0
+    assert "added=1" in capsys.readouterr().out
+    resp = api_client.get("/api/overdue/100001").get_json()
+    assert resp["count"] == 1 and resp["total_fee"] == 6.5
+    assert api_client.get("/api/overdue/abc").status_code == 400
+
+def test_refresh_queries_use_indexes(tmp_db):
+    conn = db.get_db_connection()
+    try:
+        for sql in ("SELECT id FROM borrow_records WHERE return_date IS NULL AND due_date >= ? AND due_date < ?",
+                    "SELECT id FROM borrow_records WHERE id > ? AND return_date IS NULL AND +due_date < ?"):
+            plan = " ".join(r["detail"] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, (1, "x")))
+            assert "SEARCH" in plan and "SCAN" not in plan, plan
+    finally:
+        conn.close()
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import migrations
+import services.library_service as svc
+import services.patron_export as export
+from services.fee_policy import set_fee_policy
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    migrations.migrate(conn)
+    conn.execute("INSERT INTO books (id, title, author, isbn, total_copies, available_copies) "
+                 "VALUES (1, 'Clean Code', 'RCM', '9780132350884', 9, 9)")
+    conn.execute("INSERT INTO books (id, title, author, isbn, total_copies, available_copies) "
+                 "VALUES (2, 'Refactoring', 'MF', '9780201485677', 9, 9)")
+
+    class Shared:
+        """The services close each connection they get; keep this one open across calls."""
+        def execute(self, *args):
+            return conn.execute(*args)
+        def close(self):
+            pass
+
+    monkeypatch.setattr(svc, "get_db_connection", Shared)
+    monkeypatch.setattr(export, "get_db_connection", Shared)
+    set_fee_policy()
+    return conn
+
+def loan(conn, patron, borrowed_days_ago, returned_days_ago=None, book=1, due=...):
+    now = datetime.now()
+    borrowed = now - timedelta(days=borrowed_days_ago)
+    due_date = (borrowed + timedelta(days=14)).isoformat() if due is ... else due
+    returned = None if returned_days_ago is None else (now - timedelta(days=returned_days_ago)).isoformat()
+    conn.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) "
+                 "VALUES (?, ?, ?, ?, ?)", (patron, book, borrowed.isoformat(), due_date, returned))
+
+@pytest.fixture
+def history(conn):
+    # 111111: overdue and current loans, more returns than the report keeps
+    loan(conn, "111111", 30)
+    loan(conn, "111111", 2, book=2)
+    for n in range(7):
+        loan(conn, "111111", 60 + n, returned_days_ago=30 + n, book=1 + n % 2)
+    # 222222: only returns, one of them late
+    loan(conn, "222222", 40, returned_days_ago=5)
+    loan(conn, "222222", 10, returned_days_ago=8, book=2)
+    # 333333: legacy loan without a due date, and a book no longer in the catalog
+    loan(conn, "333333", 20, due="")
+    loan(conn, "333333", 1, book=99)
+    return conn
+
+def test_reports_match_single_patron_report(history):
+    reports = list(export.iter_patron_status_reports())
+    assert [r["patron_id"] for r in reports] == ["111111", "222222", "333333"]
+    for report in reports:
+        assert report == svc.get_patron_status_report(report["patron_id"])
+
+def test_report_shape(history):
+    first = next(export.iter_patron_status_reports())
+    assert first["summary"] == {"active_count": 2, "overdue_count": 1,
+                                "total_accrued_fee": 12.5, "lifetime_loans": 9}
+    assert len(first["recent_returns"]) == svc.PATRON_RECENT_RETURNS
+
+def test_streams_lazily(history):
+    # A consumer can stop after any patron; closing releases the connection
+    reports = export.iter_patron_status_reports()
+    assert next(reports)["patron_id"] == "111111"
+    reports.close()
+
+def test_empty_table(conn):
+    assert list(export.iter_patron_status_reports()) == []
+    out = io.StringIO()
+    assert export.export_patron_status_reports(out, fmt="csv") == 0
+    assert out.getvalue().strip() == ",".join(export.CSV_FIELDS)
+
+def test_ndjson_and_csv_writers(history):
+    out = io.StringIO()
+    assert export.export_patron_status_reports(out, fmt="ndjson") == 3
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["patron_id"] for r in lines] == ["111111", "222222", "333333"]
+
+    out = io.StringIO()
+    export.export_patron_status_reports(out, fmt="csv")
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert rows[1] == {"patron_id": "222222", "active_count": "0", "overdue_count": "0",
+                       "total_accrued_fee": "0.0", "lifetime_loans": "2"}
+
+def test_streamed_endpoint(history, api_client):
+
+    resp = api_client.get("/api/patrons/status")
+    assert resp.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["patron_id"] for line in resp.get_data(as_text=True).splitlines()] == [
+        "111111", "222222", "333333"]
+
+    resp = api_client.get("/api/patrons/status?format=csv")
+    assert resp.mimetype == "text/csv"
+    assert resp.get_data(as_text=True).splitlines()[0] == ",".join(export.CSV_FIELDS)
+
+    assert api_client.get("/api/patrons/status?format=xml").status_code == 400
@@ -0,0 +1,112 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import database as db
+import migrations
+from services.patron_stats import check_patron_stats
+import services.library_service as svc
+
+@pytest.fixture
+def tmp_db(tmp_db):
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 5, 5)
+    return db.get_book_by_isbn("9780132350884")["id"]
+
+def borrow(patron_id, book_id, days_ago=0):
+    borrowed = datetime.now() - timedelta(days=days_ago)
+    return db.borrow_book_atomic(patron_id, book_id, borrowed, borrowed + timedelta(days=14))
+
+def sql(statement, params=()):
+    conn = db.get_db_connection()
+    try:
+        conn.execute(statement, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_counters_follow_circulation(tmp_db):
+    borrow("123456", tmp_db, days_ago=20)
+    borrow("123456", tmp_db, days_ago=2)
+    stats = db.get_patron_stats("123456")
+    assert stats["active_count"] == 2 and stats["lifetime_count"] == 2
+    oldest_due = (datetime.now() - timedelta(days=6)).date().isoformat()
+    assert stats["next_due_date"][:10] == oldest_due
+
+    db.return_book_atomic("123456", tmp_db, datetime.now())
+    stats = db.get_patron_stats("123456")
+    assert (stats["active_count"], stats["lifetime_count"]) == (1, 2)
+    # The hint moves to the remaining loan
+    assert stats["next_due_date"][:10] == (datetime.now() + timedelta(days=12)).date().isoformat()
+    assert db.get_patron_borrow_count("123456") == 1
+
+    db.return_book_atomic("123456", tmp_db, datetime.now())
+    assert db.get_patron_stats("123456") == {"active_count": 0, "lifetime_count": 2, "next_due_date": None}
+    assert check_patron_stats()["mismatches"] == []
+
+def test_legacy_helpers_and_raw_updates_keep_counters(tmp_db):
+    now = datetime.now()
+    db.insert_borrow_record("111111", tmp_db, now, now + timedelta(days=14))
+    db.insert_borrow_record("111111", tmp_db, now, now + timedelta(days=7))
+    db.update_borrow_record_return_date("111111", tmp_db, now)
+    sql("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES ('222222', ?, ?, '')",
+        (tmp_db, now.isoformat()))
+    sql("UPDATE borrow_records SET patron_id = '333333' WHERE patron_id = '222222'")
+    sql("DELETE FROM borrow_records WHERE patron_id = '111111' AND return_date IS NOT NULL "
+        "AND id = (SELECT MIN(id) FROM borrow_records WHERE patron_id = '111111')")
+    result = check_patron_stats()
+    assert result["mismatches"] == []
+    assert db.get_patron_stats("222222")["lifetime_count"] == 0
+    assert db.get_patron_stats("333333") == {"active_count": 1, "lifetime_count": 1, "next_due_date": None}
+
+def test_unknown_patron_reads_as_zero(tmp_db):
+    assert db.get_patron_borrow_count("999999") == 0
+
+def test_borrow_count_is_primary_key_read(tmp_db):
+    conn = db.get_db_connection()
+    try:
+        plan = " ".join(r["detail"] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT active_count FROM patron_stats WHERE patron_id = ?", ("123456",)))
+    finally:
+        conn.close()
+    assert "PRIMARY KEY" in plan and "SCAN" not in plan
+
+def test_migration_backfills_existing_loans(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "old.db"))
+    conn.row_factory = sqlite3.Row
+    migrations.migrate(conn, target=4)
+    conn.executemany(
+        "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) VALUES (?, 1, ?, ?, ?)",
+        [("123456", "2025-01-01", "2025-01-15", None),
+         ("123456", "2025-01-02", "2025-01-10", None),
+         ("123456", "2024-12-01", "2024-12-15", "2024-12-10"),
+         ("654321", "2024-12-01", "2024-12-15", "2024-12-20")])
+    conn.commit()
+    migrations.migrate(conn)
+    rows = {r["patron_id"]: tuple(r)[1:] for r in conn.execute(
+        "SELECT patron_id, active_count, lifetime_count, next_due_date FROM patron_stats")}
+    assert rows == {"123456": (2, 3, "2025-01-10"), "654321": (0, 1, None)}
+
+def test_checker_reports_and_repairs_drift(tmp_db):
+    borrow("123456", tmp_db)
+    borrow("654321", tmp_db)
+    sql("UPDATE patron_stats SET active_count = 4 WHERE patron_id = '123456'")
+    sql("INSERT INTO patron_stats (patron_id, active_count, lifetime_count) VALUES ('111111', 1, 1)")
+
+    result = check_patron_stats()
+    assert result["patrons"] == 3 and result["repaired"] == 0
+    assert [m["patron_id"] for m in result["mismatches"]] == ["111111", "123456"]
+    assert result["mismatches"][0]["actual"] is None
+    assert result["mismatches"][1]["stored"]["active_count"] == 4
+    assert result["mismatches"][1]["actual"]["active_count"] == 1
+
+    assert check_patron_stats(repair=True)["repaired"] == 2
+    assert check_patron_stats()["mismatches"] == []
+    assert db.get_patron_borrow_count("123456") == 1
+
+def test_status_report_lifetime_from_counters(tmp_db):
+    borrow("123456", tmp_db)
+    borrow("123456", tmp_db)
+    db.return_book_atomic("123456", tmp_db, datetime.now())
+    assert svc.get_patron_status_report("123456")["summary"]["lifetime_loans"] == 2
+    # The count comes from patron_stats, not a recount of borrow_records
+    sql("UPDATE patron_stats SET lifetime_count = 7 WHERE patron_id = '123456'")
+    assert svc.get_patron_status_report("123456")["summary"]["lifetime_loans"] == 7
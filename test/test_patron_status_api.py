@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta
+import pytest
+import database as db
+import services.library_service as svc
+from services.fee_policy import FeePolicy, set_fee_policy
+from services.report_cache import PatronReportCache, patron_report_cache
+
+@pytest.fixture
+def book_id(tmp_db):
+    set_fee_policy()
+    patron_report_cache.clear()
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 3, 3)
+    yield db.get_book_by_isbn("9780132350884")["id"]
+    set_fee_policy()
+
+@pytest.fixture
+def client(book_id, api_client):
+    return api_client
+
+@pytest.fixture
+def report_calls(monkeypatch):
+    calls = []
+    real = svc.get_patron_status_report
+    def counting(patron_id, today=None):
+        calls.append(patron_id)
+        return real(patron_id, today)
+    monkeypatch.setattr("routes.api_routes.get_patron_status_report", counting)
+    return calls
+
+def borrow(patron_id, book_id, days_ago=0):
+    borrowed = datetime.now() - timedelta(days=days_ago)
+    return db.borrow_book_atomic(patron_id, book_id, borrowed, borrowed + timedelta(days=14))
+
+def test_report_with_etag(client, book_id):
+    borrow("123456", book_id, days_ago=20)
+    resp = client.get("/api/patron/123456/status")
+    assert resp.status_code == 200
+    assert resp.headers["ETag"]
+    assert resp.headers["Cache-Control"] == "no-cache"
+    report = resp.get_json()
+    assert report == svc.get_patron_status_report("123456")
+    assert report["summary"]["overdue_count"] == 1
+
+def test_unchanged_report_is_not_modified(client, book_id, report_calls):
+    borrow("123456", book_id)
+    etag = client.get("/api/patron/123456/status").headers["ETag"]
+    resp = client.get("/api/patron/123456/status", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.data == b""
+    assert report_calls == ["123456"]
+
+def test_body_served_from_cache(client, book_id, report_calls):
+    borrow("123456", book_id)
+    first = client.get("/api/patron/123456/status")
+    second = client.get("/api/patron/123456/status")
+    assert second.data == first.data
+    assert report_calls == ["123456"]
+    assert patron_report_cache.stats()["hits"] == 1
+
+def test_circulation_changes_etag(client, book_id, report_calls):
+    borrow("123456", book_id)
+    etag = client.get("/api/patron/123456/status").headers["ETag"]
+    db.return_book_atomic("123456", book_id, datetime.now())
+    resp = client.get("/api/patron/123456/status", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert resp.get_json()["summary"]["active_count"] == 0
+    assert report_calls == ["123456", "123456"]
+
+def test_other_patrons_keep_their_etag(client, book_id):
+    borrow("123456", book_id)
+    etag = client.get("/api/patron/123456/status").headers["ETag"]
+    borrow("654321", book_id)
+    resp = client.get("/api/patron/123456/status", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+def test_etag_changes_with_date_and_policy(book_id):
+    borrow("123456", book_id)
+    today = date.today()
+    etag = svc.get_patron_status_etag("123456", today)
+    assert svc.get_patron_status_etag("123456", today) == etag
+    assert svc.get_patron_status_etag("123456", today + timedelta(days=1)) != etag
+    set_fee_policy(FeePolicy(grace_days=3))
+    assert svc.get_patron_status_etag("123456", today) != etag
+
+def test_patron_without_loans(client):
+    resp = client.get("/api/patron/111111/status")
+    assert resp.status_code == 200
+    assert resp.get_json()["summary"]["lifetime_loans"] == 0
+
+def test_invalid_patron(client):
+    assert client.get("/api/patron/12ab/status").status_code == 400
+
+def test_cache_drops_stale_entries_and_evicts():
+    cache = PatronReportCache(max_size=2)
+    cache.put("111111", "a", b"1")
+    assert cache.get("111111", "b") is None
+    assert cache.get("111111", "a") is None
+    cache.put("111111", "a", b"1")
+    cache.put("222222", "a", b"2")
+    cache.put("333333", "a", b"3")
+    assert cache.get("111111", "a") is None
+    assert cache.get("333333", "a") == b"3"
+    assert cache.stats()["stale"] == 1 and cache.stats()["evictions"] == 1
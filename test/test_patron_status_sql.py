@@ -0,0 +1,92 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import migrations
+import services.library_service as svc
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrations.migrate(conn)
+    conn.execute("INSERT INTO books (id, title, author, isbn, total_copies, available_copies) "
+                 "VALUES (1, 'Clean Code', 'RCM', '9780132350884', 9, 9)")
+
+    class Shared:
+        """The service closes each connection it gets; keep this one open across calls."""
+        def execute(self, *args):
+            return conn.execute(*args)
+        def close(self):
+            pass
+
+    monkeypatch.setattr(svc, "get_db_connection", Shared)
+    return conn
+
+def loan(conn, borrowed_days_ago, due=..., returned_days_ago=None, patron="123456"):
+    now = datetime.now()
+    borrowed = now - timedelta(days=borrowed_days_ago)
+    due_date = (borrowed + timedelta(days=14)).isoformat() if due is ... else due
+    returned = None if returned_days_ago is None else (now - timedelta(days=returned_days_ago)).isoformat()
+    conn.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) "
+                 "VALUES (?, 1, ?, ?, ?)", (patron, borrowed.isoformat(), due_date, returned))
+
+def test_one_statement_per_report(conn, monkeypatch):
+    calls = []
+    shared = svc.get_db_connection
+    class Counting(shared):
+        def execute(self, *args):
+            calls.append(args[0])
+            return super().execute(*args)
+    monkeypatch.setattr(svc, "get_db_connection", Counting)
+    loan(conn, 20)
+    loan(conn, 40, returned_days_ago=10)
+    svc.get_patron_status_report("123456")
+    # The first report also looks up whether patron_stats exists
+    assert len(calls) == 2 and "sqlite_master" in calls[0]
+    svc.get_patron_status_report("123456")
+    assert calls[2:] == [svc.PATRON_STATUS_SQL]
+
+def test_recent_returns_newest_five(conn):
+    for n in range(8):
+        loan(conn, 60 + n, returned_days_ago=40 + n)
+    loan(conn, 3)
+    loan(conn, 1)
+    report = svc.get_patron_status_report("123456")
+    assert report["summary"]["lifetime_loans"] == 10
+    assert [r["returned_at"][:10] for r in report["recent_returns"]] == [
+        (datetime.now() - timedelta(days=40 + n)).date().isoformat() for n in range(5)]
+    # Active loans newest first
+    assert [l["borrowed_at"][:10] for l in report["active_loans"]] == [
+        (datetime.now() - timedelta(days=d)).date().isoformat() for d in (1, 3)]
+
+def test_days_overdue_computed_in_sql(conn):
+    loan(conn, 30)
+    loan(conn, 20, due="")
+    loan(conn, 5)
+    report = svc.get_patron_status_report("123456")
+    # A missing due date falls back to borrow date + 14 days
+    assert [l["days_overdue"] for l in report["active_loans"]] == [0, 6, 16]
+    assert [l["accrued_fee"] for l in report["active_loans"]] == [0.0, 3.0, 12.5]
+    assert report["summary"]["overdue_count"] == 2
+    assert report["summary"]["total_accrued_fee"] == 15.5
+
+def test_unreadable_rows_are_skipped(conn):
+    loan(conn, 30, due="not a date")
+    loan(conn, 10)
+    conn.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) "
+                 "VALUES ('123456', 1, '2025-01-01', '2025-01-15', 'garbage')")
+    report = svc.get_patron_status_report("123456")
+    assert report["summary"]["active_count"] == 1
+    assert report["summary"]["lifetime_loans"] == 3
+    assert report["recent_returns"] == []
+
+def test_other_patrons_not_included(conn):
+    loan(conn, 30, patron="654321")
+    loan(conn, 30, returned_days_ago=1, patron="654321")
+    report = svc.get_patron_status_report("123456")
+    assert report["summary"] == {"active_count": 0, "overdue_count": 0, "total_accrued_fee": 0.0, "lifetime_loans": 0}
+
+def test_uncounted_variant_recounts_loans():
+    assert "patron_stats" in svc.PATRON_STATUS_SQL
+    assert "patron_stats" not in svc.PATRON_STATUS_SQL_UNCOUNTED
+    assert "COUNT(*) FROM borrow_records" in svc.PATRON_STATUS_SQL_UNCOUNTED
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+import database as db
+import services.library_service as svc
+from services.payment_service import AsyncPaymentGateway, FakeAsyncPaymentGateway
+
+LATENCY = 0.05
+
+def owed(*amounts):
+    return [{"status": "ok", "patron_id": "123456", "book_id": n, "fee_amount": amount, "days_overdue": 3}
+            for n, amount in enumerate(amounts, start=1)]
+
+@pytest.fixture
+def books(mocker):
+    #STUB: one query for the titles of the owed books
+    return mocker.patch(
+        "services.library_service.get_book_titles",
+        side_effect=lambda book_ids: {book_id: f"Book {book_id}" for book_id in book_ids if book_id < 90},
+    )
+
+def stub_fees(mocker, fees):
+    #STUB: one query for all of the patron's late fees
+    return mocker.patch("services.library_service.calculate_late_fees_bulk", return_value=fees)
+
+def test_five_books_are_charged_concurrently(mocker, books):
+    stub_fees(mocker, owed(1.0, 2.0, 3.0, 4.0, 5.0))
+    gateway = FakeAsyncPaymentGateway(latency=LATENCY)
+    result = asyncio.run(svc.pay_all_late_fees("123456", gateway))
+
+    # All five charges were awaiting the gateway at once
+    assert gateway.max_in_flight == 5
+    assert result["paid_count"] == 5 and result["failed_count"] == 0
+    assert result["total_paid"] == 15.0
+    assert [p["book_id"] for p in result["payments"]] == [1, 2, 3, 4, 5]
+    assert result["payments"][0]["transaction_id"].startswith("txn_123456_")
+    assert result["payments"][0]["message"].startswith("Payment successful!")
+    assert sorted(c["description"] for c in gateway.charges) == [f"Late fees for 'Book {n}'" for n in range(1, 6)]
+    books.assert_called_once_with([1, 2, 3, 4, 5])
+
+def test_concurrency_is_bounded(mocker, books):
+    stub_fees(mocker, owed(*[1.0] * 6))
+    gateway = FakeAsyncPaymentGateway(latency=0.01)
+    result = asyncio.run(svc.pay_all_late_fees("123456", gateway, max_concurrency=2))
+    assert gateway.max_in_flight == 2
+    assert result["paid_count"] == 6
+
+def test_failures_do_not_stop_other_charges(mocker, books):
+    fees = owed(1.0, 2.0, 3.0)
+    fees.append({"status": "ok", "patron_id": "123456", "book_id": 99, "fee_amount": 4.0, "days_overdue": 5})
+    stub_fees(mocker, fees)
+    gateway = FakeAsyncPaymentGateway(declined={"Late fees for 'Book 2'"})
+    real = gateway.process_payment
+
+    async def flaky(patron_id, amount, description=""):
+        if description == "Late fees for 'Book 3'":
+            raise ConnectionError("gateway timeout")
+        return await real(patron_id, amount, description)
+    gateway.process_payment = flaky
+
+    result = asyncio.run(svc.pay_all_late_fees("123456", gateway))
+    by_book = {p["book_id"]: p for p in result["payments"]}
+    assert by_book[1]["success"] is True
+    assert by_book[2]["message"] == "Payment failed: Payment declined by issuer"
+    assert by_book[3]["message"] == "Payment processing error: gateway timeout"
+    assert by_book[99]["message"] == "Book not found."
+    assert (result["paid_count"], result["failed_count"], result["total_paid"]) == (1, 3, 1.0)
+
+def test_only_books_with_fees_are_charged(mocker, books):
+    stub_fees(mocker, owed(0.0, 2.5) + [{"status": "error", "message": "Corrupt borrow record timestamps.",
+                                          "fee_amount": 0.0, "days_overdue": 0}])
+    gateway = FakeAsyncPaymentGateway()
+    result = asyncio.run(svc.pay_all_late_fees("123456", gateway))
+    assert [p["book_id"] for p in result["payments"]] == [2]
+    assert len(gateway.charges) == 1
+
+def test_nothing_owed(mocker, books):
+    stub_fees(mocker, [])
+    gateway = FakeAsyncPaymentGateway()
+    result = asyncio.run(svc.pay_all_late_fees("123456", gateway))
+    assert result == {"status": "ok", "patron_id": "123456", "payments": [],
+                      "paid_count": 0, "failed_count": 0, "total_paid": 0}
+    assert gateway.charges == []
+
+def test_titles_are_read_in_one_query(tmp_db):
+    db.insert_book("The Hobbit", "J.R.R. Tolkien", "9780547928227", 1, 1)
+    db.insert_book("Clean Code", "Robert C. Martin", "9780132350884", 1, 1)
+    hobbit = db.get_book_by_isbn("9780547928227")["id"]
+    assert db.get_book_titles([hobbit, 999]) == {hobbit: "The Hobbit"}
+    assert db.get_book_titles([]) == {}
+
+def test_invalid_arguments():
+    assert asyncio.run(svc.pay_all_late_fees("12345"))["status"] == "error"
+    assert asyncio.run(svc.pay_all_late_fees("123456", max_concurrency=0))["status"] == "error"
+
+def test_async_gateway_matches_sync_rules():
+    gateway = AsyncPaymentGateway(latency=0)
+    ok, txn, _ = asyncio.run(gateway.process_payment("123456", 10.0))
+    assert ok and txn.startswith("txn_123456_")
+    assert asyncio.run(gateway.process_payment("123456", 1500.0)) == (
+        False, "", "Payment declined: amount exceeds limit")
+    assert asyncio.run(gateway.refund_payment("bogus", 5.0)) == (False, "Invalid transaction ID")
+    assert asyncio.run(gateway.verify_payment_status(txn))["status"] == "completed"
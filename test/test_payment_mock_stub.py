@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import Mock
 import services.library_service as svc
 from services.payment_service import PaymentGateway
-# Stubbing: calculate_late_fee_for_book, get_book_by_id
+# Stubbing: calculate_late_fee_for_book, get_book_metadata
 # Mocking: PaymentGateway.process_payment
 
 
@@ -22,7 +22,7 @@ def test_pay_late_fees_success_stub_db_mock_gateway(mocker):
 
     #STUB: book lookup
     mocker.patch(
-        "services.library_service.get_book_by_id",
+        "services.library_service.get_book_metadata",
         return_value={
             "id": 1,
             "title": "Stubbed Book",
@@ -61,7 +61,7 @@ def test_pay_late_fees_payment_declined(mocker):
     )
 
     mocker.patch(
-        "services.library_service.get_book_by_id",
+        "services.library_service.get_book_metadata",
         return_value={
             "id": 1,
             "title": "Decline Book",
@@ -111,7 +111,7 @@ def test_pay_late_fees_zero_fee_does_not_call_gateway(mocker):
     )
 
     mocker.patch(
-        "services.library_service.get_book_by_id",
+        "services.library_service.get_book_metadata",
         return_value={
             "id": 1,
             "title": "Zero Fee Book",
@@ -144,7 +144,7 @@ def test_pay_late_fees_network_error_handled(mocker):
     )
 
     mocker.patch(
-        "services.library_service.get_book_by_id",
+        "services.library_service.get_book_metadata",
         return_value={
             "id": 1,
             "title": "Network Book",
@@ -172,7 +172,7 @@ def test_pay_late_fees_unable_to_calculate_with_stub(mocker):
     )
 
     mocker.patch(
-        "services.library_service.get_book_by_id",
+        "services.library_service.get_book_metadata",
         return_value={"id": 1, "title": "Doesn't Matter"},
     )
 
@@ -6,24 +6,18 @@ def patch_return_happy(monkeypatch):
     books = {1: {"id": 1, "title": "Clean Code", "available_copies": 0}}
     loan = {"returned_at": None}
 
-    def get_book_by_id(book_id):
+    def get_book_metadata(book_id):
         return books.get(book_id)
 
-    def update_borrow_record_return_date(patron_id, book_id, return_date=None):
+    def return_book_atomic(patron_id, book_id, return_date):
         if patron_id != "123456" or book_id != 1 or loan["returned_at"] is not None:
-            return False, "No active loan found for this patron and book."
-        loan["returned_at"] = return_date or datetime.now()
-        return True, "Return recorded"
+            return False, "no_active_loan"
+        loan["returned_at"] = return_date
+        books[book_id]["available_copies"] += 1
+        return True, "ok"
 
-    def update_book_availability(book_id, delta):
-        if book_id not in books:
-            return False
-        books[book_id]["available_copies"] += delta
-        return True
-
-    monkeypatch.setattr(svc, "get_book_by_id", get_book_by_id)
-    monkeypatch.setattr(svc, "update_borrow_record_return_date", update_borrow_record_return_date)
-    monkeypatch.setattr(svc, "update_book_availability", update_book_availability)
+    monkeypatch.setattr(svc, "get_book_metadata", get_book_metadata)
+    monkeypatch.setattr(svc, "return_book_atomic", return_book_atomic)
     return books, loan
 
 def test_return_success(monkeypatch):
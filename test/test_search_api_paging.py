@@ -0,0 +1,72 @@
+import json
+import pytest
+import services.library_service as svc
+from services.search_cache import search_cache
+
+# Same casefolded title/author for ids 3 and 4: ties break on (title, id)
+BOOKS = [
+    {"id": i, "title": f"Book {i:02d}", "author": "Author", "isbn": f"97800000000{i:02d}", "available_copies": 1}
+    for i in range(1, 13)
+] + [
+    {"id": 13, "title": "book 03", "author": "author", "isbn": "9780000000013", "available_copies": 1},
+]
+
+@pytest.fixture
+def client(monkeypatch, api_client):
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in BOOKS])
+    monkeypatch.setattr(svc, "SEARCH_BACKEND", "scan")
+    search_cache.clear()
+    return api_client
+
+def collect_pages(client, url):
+    ids, cursor = [], None
+    while True:
+        resp = client.get(url + (f"&cursor={cursor}" if cursor else "")).get_json()
+        ids += [b["id"] for b in resp["results"]]
+        assert resp["count"] == len(resp["results"])
+        cursor = resp["next_cursor"]
+        if not cursor:
+            return ids
+
+def test_pages_cover_results_once_in_order(client):
+    expected = [b["id"] for b in svc.search_books_in_catalog("book", "title")]
+    assert len(expected) == 13
+    assert collect_pages(client, "/api/search?q=book&limit=4") == expected
+
+def test_limit_is_capped(client, monkeypatch):
+    monkeypatch.setattr(svc, "SEARCH_MAX_PAGE_SIZE", 5)
+    resp = client.get("/api/search?q=book&limit=1000").get_json()
+    assert resp["limit"] == 5 and resp["count"] == 5
+    assert resp["next_cursor"]
+
+def test_small_result_fits_one_page(client):
+    resp = client.get("/api/search?q=book 07").get_json()
+    assert [b["id"] for b in resp["results"]] == [7]
+    assert resp["next_cursor"] is None
+    assert resp["search_term"] == "book 07"
+
+def test_bad_cursor_rejected(client):
+    assert client.get("/api/search?q=book&cursor=garbage").status_code == 400
+    assert client.get("/api/search?q=book&format=ndjson&cursor=garbage").status_code == 400
+
+def test_ndjson_stream(client):
+    resp = client.get("/api/search?q=book&format=ndjson&limit=10")
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    books, trailer = lines[:-1], lines[-1]
+    expected = [b["id"] for b in svc.search_books_in_catalog("book", "title")]
+    assert [b["id"] for b in books] == expected[:10]
+    assert trailer["count"] == 10
+
+    rest = client.get(f"/api/search?q=book&format=ndjson&cursor={trailer['next_cursor']}")
+    lines = [json.loads(line) for line in rest.get_data(as_text=True).splitlines()]
+    assert [b["id"] for b in lines[:-1]] == expected[10:]
+    assert lines[-1] == {"count": 3, "next_cursor": None}
+
+def test_cursor_survives_catalog_insert(client, monkeypatch):
+    first = client.get("/api/search?q=book&limit=2").get_json()
+    grown = BOOKS + [{"id": 14, "title": "Book 00", "author": "Author", "isbn": "9780000000014", "available_copies": 1}]
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in grown])
+    nxt = client.get(f"/api/search?q=book&limit=2&cursor={first['next_cursor']}").get_json()
+    # The new book sorts before the cursor, so the next page doesn't repeat or skip anything
+    assert [b["id"] for b in nxt["results"]] == [3, 13]
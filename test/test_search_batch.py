@@ -0,0 +1,66 @@
+import pytest
+import services.library_service as svc
+from services.search_cache import search_cache
+
+BOOKS = [
+    {"id": 1, "title": "The Hobbit", "author": "J.R.R. Tolkien", "isbn": "9780547928227", "available_copies": 1},
+    {"id": 2, "title": "Clean Code", "author": "Robert C. Martin", "isbn": "9780132350884", "available_copies": 1},
+    {"id": 3, "title": "Clean Architecture", "author": "Robert C. Martin", "isbn": "978-0134494166", "available_copies": 0},
+]
+
+QUERIES = [
+    ("9780132350884", "isbn"), ("9780134494166", "isbn"), ("0000000000000", "isbn"),
+    ("clean", "title"), ("martin", "author"), ("  ", "title"), ("CLEAN", "title"), ("978", "isbn"),
+]
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    def loader():
+        calls.append(1)
+        return [dict(b) for b in BOOKS]
+    monkeypatch.setattr(svc, "get_all_books", loader)
+    monkeypatch.setattr(svc, "SEARCH_BACKEND", "scan")
+    search_cache.clear()
+    return calls
+
+def test_batch_matches_single_searches_with_one_load(loads):
+    batch = svc.search_books_batch(QUERIES)
+    assert len(loads) == 1
+    search_cache.clear()
+    assert batch == [svc.search_books_in_catalog(term, stype) for term, stype in QUERIES]
+
+def test_batch_uses_and_fills_cache(loads):
+    svc.search_books_in_catalog("clean", "title")
+    svc.search_books_batch([("clean", "title"), ("hobbit", "title")])
+    assert len(loads) == 2
+    svc.search_books_batch([("clean", "title"), ("hobbit", "title")])
+    assert len(loads) == 2
+
+def test_long_isbn_falls_back_to_substring(loads, monkeypatch):
+    books = BOOKS + [{"id": 4, "title": "Odd", "author": "X", "isbn": "19780132350884", "available_copies": 1}]
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in books])
+    assert [b["id"] for b in svc.search_books_batch([("9780132350884", "isbn")])[0]] == [2, 4]
+
+def test_index_backend_agrees(loads, monkeypatch, tmp_db):
+    expected = svc.search_books_batch(QUERIES)
+    monkeypatch.setattr(svc, "SEARCH_BACKEND", "index")
+    assert svc.search_books_batch(QUERIES) == expected
+
+@pytest.fixture
+def client(loads, api_client):
+    return api_client
+
+def test_batch_endpoint(client):
+    body = {"queries": [{"q": "clean"}, {"q": "9780547928227", "type": "isbn"}], "limit": 1}
+    resp = client.post("/api/search/batch", json=body).get_json()
+    assert resp["count"] == 2
+    first, second = resp["results"]
+    assert first["search_term"] == "clean" and first["count"] == 1 and first["has_more"] is True
+    assert [b["id"] for b in second["results"]] == [1] and second["has_more"] is False
+
+def test_batch_endpoint_validation(client, monkeypatch):
+    assert client.post("/api/search/batch", json={"queries": "clean"}).status_code == 400
+    assert client.post("/api/search/batch", json={"queries": [{"q": 5}]}).status_code == 400
+    monkeypatch.setattr("routes.api_routes.SEARCH_BATCH_MAX_QUERIES", 1)
+    assert client.post("/api/search/batch", json={"queries": [{"q": "a"}, {"q": "b"}]}).status_code == 400
@@ -0,0 +1,71 @@
+import pytest
+import database as db
+import services.library_service as svc
+from services.search_cache import SearchResultCache, search_cache
+
+BOOKS = [
+    {"id": 1, "title": "The Hobbit", "author": "J.R.R. Tolkien", "isbn": "9780547928227", "available_copies": 1},
+    {"id": 2, "title": "Clean Code", "author": "Robert C. Martin", "isbn": "9780132350884", "available_copies": 1},
+]
+
+@pytest.fixture
+def counted_loader(monkeypatch):
+    calls = []
+    def loader():
+        calls.append(1)
+        return [dict(b) for b in BOOKS]
+    monkeypatch.setattr(svc, "get_all_books", loader)
+    monkeypatch.setattr(svc, "SEARCH_BACKEND", "scan")
+    search_cache.clear()
+    return calls
+
+def test_repeat_query_served_from_cache(counted_loader):
+    first = svc.search_books_in_catalog("hobbit", "title")
+    hits = search_cache.stats()["hits"]
+    # Same normalized query: whitespace and case don't matter
+    assert svc.search_books_in_catalog("  HOBBIT ", "title") == first
+    assert svc.search_books_in_catalog("hobbit", "TITLE") == first
+    assert len(counted_loader) == 1
+    assert search_cache.stats()["hits"] == hits + 2
+
+def test_search_type_is_part_of_key(counted_loader):
+    assert svc.search_books_in_catalog("martin", "title") == []
+    assert [b["id"] for b in svc.search_books_in_catalog("martin", "author")] == [2]
+
+def test_catalog_change_invalidates(counted_loader):
+    svc.search_books_in_catalog("code", "title")
+    db.notify_catalog_change("availability", 2)
+    svc.search_books_in_catalog("code", "title")
+    assert len(counted_loader) == 2
+
+def test_cached_results_are_copies(counted_loader):
+    svc.search_books_in_catalog("code", "title")[0]["title"] = "Mutated"
+    assert svc.search_books_in_catalog("code", "title")[0]["title"] == "Clean Code"
+
+def test_ttl_and_lru():
+    now = [0.0]
+    cache = SearchResultCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1, [{"id": 1}])
+    cache.put("b", 1, [{"id": 2}])
+    cache.put("c", 1, [{"id": 3}])
+    assert cache.get("a", 1) is None and cache.stats()["evictions"] == 1
+    now[0] = 11
+    assert cache.get("b", 1) is None and cache.stats()["expirations"] == 1
+
+def test_results_from_old_version_not_stored():
+    cache = SearchResultCache()
+    cache.get("a", 1)
+    cache.put("a", 0, [{"id": 1}])
+    assert cache.get("a", 1) is None
+
+def test_stats_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "library.db"))
+    from app import create_app
+    client = create_app().test_client()
+    client.get("/api/search?q=gatsby")
+    client.get("/api/search?q=gatsby")
+    stats = client.get("/api/search/stats").get_json()
+    assert stats["backend"] == "index"
+    assert stats["cache"]["hits"] >= 1
+    svc.set_search_backend("scan")
+    db.reset_pool()
@@ -0,0 +1,60 @@
+import pytest
+import database as db
+import migrations
+import services.library_service as svc
+from services.search_cache import search_cache
+
+BOOKS = [
+    ("The Hobbit", "J.R.R. Tolkien", "9780547928227"),
+    ("The Fellowship of the Ring", "J.R.R. Tolkien", "9780547928210"),
+    ("Clean Code", "Robert C. Martin", "9780132350884"),
+    ("clean code", "Robert C. Martin", "9780132350885"),
+    ("Straße der Besten", "Ann \"Quote\" Writer", "9780000000001"),
+]
+
+@pytest.fixture
+def tmp_db(tmp_db):
+    for title, author, isbn in BOOKS:
+        db.insert_book(title, author, isbn, 1, 1)
+    yield
+    svc.set_search_backend("scan")
+
+def search(term, stype, backend):
+    svc.set_search_backend(backend)
+    return svc.search_books_in_catalog(term, stype)
+
+def test_fts_index_created_by_migration(tmp_db):
+    conn = db.get_db_connection()
+    try:
+        assert migrations.fts_available(conn)
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize("term,stype", [
+    ("the", "title"), ("CLEAN", "title"), ("ring", "title"), ("tolkien", "author"),
+    ("aße", "title"), ('"quote"', "author"), ("ho", "title"), ("zzz", "title"),
+])
+def test_fts_matches_scan(tmp_db, term, stype):
+    assert search(term, stype, "fts") == search(term, stype, "scan")
+
+def test_fts_candidates_follow_catalog_changes(tmp_db):
+    db.insert_book("The Silmarillion", "J.R.R. Tolkien", "9780618391110", 1, 1)
+    assert [b["title"] for b in search("silmar", "title", "fts")] == ["The Silmarillion"]
+    conn = db.get_db_connection()
+    try:
+        conn.execute("UPDATE books SET title = 'Unfinished Tales' WHERE isbn = '9780618391110'")
+        conn.commit()
+    finally:
+        conn.close()
+    # Raw SQL bypasses the catalog version, so drop cached results by hand
+    search_cache.clear()
+    assert search("silmar", "title", "fts") == []
+    assert [b["title"] for b in search("unfinished", "title", "fts")] == ["Unfinished Tales"]
+
+def test_short_terms_fall_back_to_scan(tmp_db):
+    assert db.search_books_fts("title", "ho") is None
+    assert [b["title"] for b in search("ho", "title", "fts")] == ["The Hobbit"]
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        svc.set_search_backend("elastic")
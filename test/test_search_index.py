@@ -0,0 +1,144 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import database as db
+import services.library_service as svc
+from services.search_index import CatalogIndex, catalog_index
+
+BOOKS = [
+    {"id": 1, "title": "The Hobbit", "author": "J.R.R. Tolkien", "isbn": "9780547928227"},
+    {"id": 2, "title": "Clean Code", "author": "Robert C. Martin", "isbn": "9780132350884"},
+    {"id": 3, "title": "clean code", "author": "Robert C. Martin", "isbn": "9780132350885"},
+    {"id": 4, "title": "Straße der Besten", "author": "Ann Writer", "isbn": "9780000000001"},
+    {"id": 5, "title": "ΣΊΣΥΦΟΣ", "author": None, "isbn": "9780000000002"},
+]
+
+@pytest.fixture
+def backend(tmp_db):
+    yield svc.set_search_backend
+    svc.set_search_backend("scan")
+    catalog_index.invalidate()
+
+def search(term, stype, backend_name, set_backend):
+    set_backend(backend_name)
+    return svc.search_books_in_catalog(term, stype)
+
+@pytest.mark.parametrize("term,stype", [
+    ("hobbit", "title"), ("CLEAN", "title"), ("an co", "title"), ("ss", "title"),
+    ("straße", "title"), ("σίσυφος", "title"), ("e", "title"), ("he", "title"),
+    ("tolkien", "author"), ("martin", "author"), ("xyz", "author"), ("t", "nope"),
+])
+def test_index_matches_scan(monkeypatch, backend, term, stype):
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in BOOKS])
+    assert search(term, stype, "index", backend) == search(term, stype, "scan", backend)
+
+def test_randomized_equivalence(monkeypatch, backend):
+    rng = random.Random(327)
+    alphabet = "abcAB ßé"
+    books = [{"id": n, "title": "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))),
+              "author": "x", "isbn": str(n)} for n in range(1, 200)]
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in sorted(books, key=lambda b: (b["title"], b["id"]))])
+    for _ in range(100):
+        term = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+        if term.strip():
+            assert search(term, "title", "index", backend) == search(term, "title", "scan", backend)
+
+def test_built_once_and_rebuilt_after_reset(monkeypatch, backend):
+    calls = []
+    def loader():
+        calls.append(1)
+        return [dict(b) for b in BOOKS]
+    monkeypatch.setattr(svc, "get_all_books", loader)
+    for term in ("hobbit", "clean", "code"):
+        search(term, "title", "index", backend)
+    assert len(calls) == 1
+    monkeypatch.setattr(svc, "get_all_books", lambda: [])
+    svc.reset_caches()
+    assert search("hobbit", "title", "index", backend) == []
+
+def test_incremental_insert_and_availability(tmp_db, backend):
+    db.insert_book("The Hobbit", "J.R.R. Tolkien", "9780547928227", 1, 1)
+    assert len(search("hobbit", "title", "index", backend)) == 1
+    builds = catalog_index.builds
+
+    db.insert_book("The Hobbit Companion", "David Day", "9780000000003", 1, 1)
+    book_id = db.get_book_by_isbn("9780547928227")["id"]
+    now = datetime.now()
+    db.borrow_book_atomic("123456", book_id, now, now + timedelta(days=14))
+
+    found = search("hobbit", "title", "index", backend)
+    assert [b["title"] for b in found] == ["The Hobbit", "The Hobbit Companion"]
+    assert found[0]["available_copies"] == 0
+    assert catalog_index.builds == builds
+    assert found == search("hobbit", "title", "scan", backend)
+
+def test_writes_from_another_connection_rebuild(tmp_db, backend):
+    db.insert_book("The Hobbit", "J.R.R. Tolkien", "9780547928227", 1, 1)
+    assert len(search("hobbit", "title", "index", backend)) == 1
+    assert svc.suggest_books("the h") == [{"text": "The Hobbit", "field": "title"}]
+    builds = catalog_index.builds
+
+    # e.g. cli.py import-books, which never reaches this process's listeners
+    other = sqlite3.connect(db.DATABASE)
+    other.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                  "VALUES ('The Hobbit Companion', 'David Day', '9780000000003', 1, 1)")
+    other.execute("UPDATE books SET available_copies = 0 WHERE isbn = '9780547928227'")
+    other.commit()
+    other.close()
+
+    found = search("hobbit", "title", "index", backend)
+    assert [(b["title"], b["available_copies"]) for b in found] == [("The Hobbit", 0), ("The Hobbit Companion", 1)]
+    assert catalog_index.builds == builds + 1
+    assert [s["text"] for s in svc.suggest_books("the h")] == ["The Hobbit", "The Hobbit Companion"]
+
+def test_availability_writes_do_not_rebuild(tmp_db, backend):
+    db.insert_book("The Hobbit", "J.R.R. Tolkien", "9780547928227", 2, 2)
+    search("hobbit", "title", "index", backend)
+    builds, revision = catalog_index.builds, db.get_catalog_revision()
+
+    other = sqlite3.connect(db.DATABASE)
+    other.execute("UPDATE books SET available_copies = 1 WHERE isbn = '9780547928227'")
+    other.commit()
+    other.close()
+
+    assert db.get_catalog_revision() == revision
+    # Cached results only see foreign availability writes after their TTL
+    svc.search_cache.clear()
+    assert search("hobbit", "title", "index", backend)[0]["available_copies"] == 1
+    assert catalog_index.builds == builds
+
+def test_results_are_copies(tmp_db):
+    index = CatalogIndex()
+    index.build([dict(b) for b in BOOKS])
+    index.search("title", "hobbit")[0]["title"] = "Mutated"
+    assert index.search("title", "hobbit")[0]["title"] == "The Hobbit"
+
+ISBN_BOOKS = [
+    {"id": 1, "title": "X", "author": "Y", "isbn": "978-0-13-2350"},
+    {"id": 2, "title": "A", "author": "B", "isbn": "9780132350884"},
+    {"id": 3, "title": "C", "author": "D", "isbn": "9780547928227"},
+]
+
+@pytest.mark.parametrize("term", ["0132350", "978", "9780132350884", "97", "8-8", "0000", "9780547928227"])
+def test_isbn_index_matches_scan(monkeypatch, backend, term):
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in ISBN_BOOKS])
+    monkeypatch.setattr(svc, "get_book_by_isbn",
+                        lambda isbn: next((dict(b) for b in ISBN_BOOKS if b["isbn"] == isbn), None))
+    assert search(term, "isbn", "index", backend) == search(term, "isbn", "scan", backend)
+
+def test_exact_isbn_uses_unique_lookup(monkeypatch, backend):
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in ISBN_BOOKS])
+    lookups = []
+    def get_book_by_isbn(isbn):
+        lookups.append(isbn)
+        return dict(ISBN_BOOKS[1])
+    monkeypatch.setattr(svc, "get_book_by_isbn", get_book_by_isbn)
+    assert [b["id"] for b in search("978-0132350884", "isbn", "index", backend)] == [2]
+    assert lookups == ["9780132350884"]
+
+def test_long_stored_isbn_disables_short_circuit(monkeypatch, backend):
+    books = ISBN_BOOKS + [{"id": 4, "title": "Z", "author": "Z", "isbn": "ISBN 9780132350884"}]
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in books])
+    monkeypatch.setattr(svc, "get_book_by_isbn", lambda isbn: pytest.fail("should use postings"))
+    assert [b["id"] for b in search("9780132350884", "isbn", "index", backend)] == [2, 4]
@@ -0,0 +1,48 @@
+import pytest
+import services.library_service as svc
+from services.search_cache import search_cache
+
+BOOKS = [
+    {"id": 1, "title": "Mastering Python", "author": "A", "isbn": "9780000000001", "available_copies": 1},
+    {"id": 2, "title": "Python", "author": "B", "isbn": "9780000000002", "available_copies": 0},
+    {"id": 3, "title": "Pythonic Code", "author": "C", "isbn": "9780000000003", "available_copies": 1},
+    {"id": 4, "title": "Monty Pythons", "author": "D", "isbn": "9780000000004", "available_copies": 1},
+    {"id": 5, "title": "Learnpython", "author": "E", "isbn": "9780000000005", "available_copies": 1},
+    {"id": 6, "title": "Python Tricks", "author": "F", "isbn": "9780000000006", "available_copies": 0},
+]
+
+@pytest.fixture(autouse=True)
+def catalog(monkeypatch):
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in BOOKS])
+    monkeypatch.setattr(svc, "SEARCH_BACKEND", "scan")
+    search_cache.clear()
+
+@pytest.mark.parametrize("hay, rank", [
+    ("python", 3), ("python tricks", 2), ("monty python", 1), ("learnpython", 0),
+])
+def test_match_rank(hay, rank):
+    assert svc.match_rank(hay, "python") == rank
+
+def test_ranked_order():
+    ids = [b["id"] for b in svc.search_books_ranked("python", "title", k=10)]
+    # exact, prefixes in title order, word boundaries, then bare substrings
+    assert ids == [2, 6, 3, 1, 4, 5]
+
+def test_top_k_is_prefix_of_full_ranking():
+    full = svc.search_books_ranked("python", "title", k=10)
+    assert svc.search_books_ranked("python", "title", k=3) == full[:3]
+
+def test_availability_boost_within_tier():
+    ids = [b["id"] for b in svc.search_books_ranked("python", "title", k=3, boost_available=True)]
+    assert ids == [2, 3, 6]
+    ids = [b["id"] for b in svc.search_books_ranked("py", "title", k=10, boost_available=True)]
+    assert ids[:2] == [3, 2]
+
+def test_ranked_isbn_and_empty():
+    assert [b["id"] for b in svc.search_books_ranked("978-0000000004", "isbn")] == [4]
+    assert svc.search_books_ranked("   ", "title") == []
+
+def test_api_relevance_mode(api_client):
+    resp = api_client.get("/api/search?q=python&sort=relevance&k=2").get_json()
+    assert resp["sort"] == "relevance"
+    assert [b["id"] for b in resp["results"]] == [2, 6]
@@ -0,0 +1,54 @@
+import timeit
+import pytest
+import database as db
+import services.library_service as svc
+from services.search_index import PrefixIndex, prefix_index
+
+BOOKS = [
+    {"id": 1, "title": "The Hobbit", "author": "J.R.R. Tolkien", "isbn": "9780547928227"},
+    {"id": 2, "title": "The Two Towers", "author": "J.R.R. Tolkien", "isbn": "9780547928203"},
+    {"id": 3, "title": "Thinking, Fast and Slow", "author": "Daniel Kahneman", "isbn": "9780374533557"},
+    {"id": 4, "title": "the hobbit", "author": "Someone Else", "isbn": "9780000000004"},
+]
+
+@pytest.fixture
+def index():
+    idx = PrefixIndex()
+    idx.build(BOOKS)
+    return idx
+
+def texts(suggestions):
+    return [(s["field"], s["text"]) for s in suggestions]
+
+def test_prefix_range_is_casefolded_and_distinct(index):
+    assert texts(index.suggest("THE ", "title")) == [("title", "The Hobbit"), ("title", "The Two Towers")]
+    assert texts(index.suggest("j.r", "author")) == [("author", "J.R.R. Tolkien")]
+
+def test_both_fields_merged_in_order_and_capped(index):
+    assert texts(index.suggest("t")) == [
+        ("title", "The Hobbit"), ("title", "The Two Towers"), ("title", "Thinking, Fast and Slow"),
+    ]
+    assert len(index.suggest("t", limit=2)) == 2
+    assert index.suggest("   ") == [] and index.suggest("zzz") == []
+
+def test_insert_updates_in_place(index):
+    index._source = db.DATABASE
+    index.on_catalog_change("insert", {"id": 5, "title": "Thud!", "author": "Terry Pratchett"})
+    assert texts(index.suggest("th", "title"))[-1] == ("title", "Thud!")
+    assert texts(index.suggest("terry")) == [("author", "Terry Pratchett")]
+    assert index.stats()["builds"] == 1
+
+def test_lookup_is_fast_on_large_catalog():
+    idx = PrefixIndex()
+    idx.build([{"id": i, "title": f"Title {i:06d}", "author": f"Author {i % 997}"} for i in range(50000)])
+    per_call = min(timeit.repeat(lambda: idx.suggest("title 0123", limit=8), number=200, repeat=3)) / 200
+    assert per_call < 0.001
+
+def test_suggest_endpoint(monkeypatch, api_client):
+    monkeypatch.setattr(svc, "get_all_books", lambda: [dict(b) for b in BOOKS])
+    prefix_index.invalidate()
+    resp = api_client.get("/api/suggest?q=tol&type=author").get_json()
+    assert resp == {"query": "tol", "suggestions": []}
+    resp = api_client.get("/api/suggest?q=dan").get_json()
+    assert texts(resp["suggestions"]) == [("author", "Daniel Kahneman")]
+    assert len(api_client.get("/api/suggest?q=t&limit=500").get_json()["suggestions"]) == 3